@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Closed-form answers for the cases queueing theory already solves
+(hw5.simulate(engine="analytic")), plus a cross-check against simulation.
+
+With Poisson arrivals, exponential service and FCFS:
+  - scenario 2 (one shared queue, c CPUs) is an M/M/c queue
+  - scenario 1 with random dispatch splits the Poisson stream into c
+    independent Poisson streams of rate lambda/c, so it's c separate
+    M/M/1 queues
+
+Both have exact formulas for mean turnaround, queue length and utilization
+(Erlang C for M/M/c), and even for the whole turnaround distribution, so a
+sweep point takes microseconds instead of a simulation. Anything else
+(jsq / pod / rr dispatch, stealing, non-FCFS disciplines, non-exponential
+interarrival or service distributions, traces) has no closed form here and
+raises ValueError - simulate those.
+
+compare() checks a simulation against the exact mean: it disagrees
+"significantly" when the exact value is outside the run's batch-means CI.
+Keep in mind a 95% CI misses the truth ~5% of the time even when nothing is
+wrong, and a run that starts empty is biased low near saturation unless
+warm-up is dropped (warmup="mser").
+"""
+
+import math
+
+from distributions import is_exponential
+from histogram import PERCENTILES
+from simstats import default_stats
+
+
+def erlang_c(c, a):
+    """
+    Probability an arriving job has to wait in an M/M/c queue.
+
+    Params:
+        c: number of servers (CPUs)
+        a: offered load lambda/mu (has to be < c)
+
+    Goes through the Erlang B recursion, which doesn't overflow for big c
+    (no a^c / c! anywhere).
+    """
+    b = 1.0
+    for k in range(1, c + 1):
+        b = a * b / (k + a * b)
+    return c * b / (c - a * (1.0 - b))
+
+
+def mmc(lmbda, mu, c):
+    """
+    Steady-state M/M/c metrics (c=1 is plain M/M/1).
+
+    Returns a dict with:
+        rho: utilization of each server
+        prob_wait: Erlang C, P(a job has to queue)
+        wait: mean time in queue, turnaround: mean time in system
+        queue_len: mean jobs waiting (not in service), in_system: mean jobs
+    Raises ValueError when rho >= 1 (no steady state).
+    """
+    rho = lmbda / (c * mu)
+    if rho >= 1.0:
+        raise ValueError(f"unstable: utilization {rho:.4f} >= 1, there's no steady state")
+    prob_wait = erlang_c(c, lmbda / mu) if lmbda > 0 else 0.0
+    wait = prob_wait / (c * mu - lmbda)
+    return {
+        "rho": rho,
+        "prob_wait": prob_wait,
+        "wait": wait,
+        "turnaround": wait + 1.0 / mu,
+        "queue_len": lmbda * wait,
+        "in_system": lmbda * (wait + 1.0 / mu),
+    }
+
+
+def turnaround_sf(t, lmbda, mu, c, prob_wait):
+    """
+    P(turnaround > t) for FCFS M/M/c: service ~ Exp(mu), plus (with
+    probability prob_wait) a wait ~ Exp(c*mu - lambda).
+    """
+    theta = c * mu - lmbda
+    service_only = math.exp(-mu * t)
+    if abs(theta - mu) < 1e-12 * mu:
+        with_wait = (1.0 + mu * t) * math.exp(-mu * t)
+    else:
+        with_wait = (theta * math.exp(-mu * t) - mu * math.exp(-theta * t)) / (theta - mu)
+    return (1.0 - prob_wait) * service_only + prob_wait * with_wait
+
+
+def turnaround_quantile(q, lmbda, mu, c, prob_wait):
+    """q-quantile of the turnaround (bisection on turnaround_sf)."""
+    target = 1.0 - q
+    lo, hi = 0.0, 1.0 / mu
+    while turnaround_sf(hi, lmbda, mu, c, prob_wait) > target:
+        lo, hi = hi, hi * 2.0
+    for _ in range(100):
+        mid = (lo + hi) / 2.0
+        if turnaround_sf(mid, lmbda, mu, c, prob_wait) > target:
+            lo = mid
+        else:
+            hi = mid
+    return (lo + hi) / 2.0
+
+
+def unsupported(scenario, policy="random", steal=None, discipline="fcfs",
+                interarrival="exp", service="exp"):
+    """Why a configuration has no closed form here, or None if it has one."""
+    if scenario not in (1, 2):
+        return f"unknown scenario {scenario}"
+    if not is_exponential(interarrival):
+        return "no closed form for non-Poisson arrivals (interarrival has to be exp)"
+    if not is_exponential(service):
+        return "no closed form for non-exponential service (service has to be exp)"
+    if discipline != "fcfs":
+        return f"no closed form for discipline {discipline!r} (FCFS only)"
+    if scenario == 1:
+        if policy != "random":
+            return f"no closed form for dispatch policy {policy!r} (random only)"
+        if steal is not None:
+            return "no closed form with work stealing"
+    return None
+
+
+def solve(lmbda, avg_service, scenario, num_cpus, policy="random", steal=None,
+          discipline="fcfs", interarrival="exp", service="exp"):
+    """
+    Exact steady-state stats for one configuration.
+
+    Params are the same as hw5.simulate(). Returns the same dict layout:
+    avg_turnaround, avg_ready_q(_per_cpu), cpu_utils, throughput and the
+    turnaround percentiles are exact; the CI is the mean itself (width 0);
+    anything that only a run has (completed, events, hist, ...) is 0 / None.
+
+    Raises ValueError if there's no closed form (see unsupported()) or the
+    system is overloaded.
+    """
+    reason = unsupported(scenario, policy, steal, discipline, interarrival, service)
+    if reason is not None:
+        raise ValueError(reason)
+    mu = 1.0 / avg_service
+    if scenario == 1:
+        # random split -> every CPU is its own M/M/1 at lambda/c
+        lam, c = lmbda / num_cpus, 1
+    else:
+        lam, c = lmbda, num_cpus
+    m = mmc(lam, mu, c)
+    if scenario == 1:
+        avg_ready_q = m["queue_len"] * num_cpus
+        per_cpu = [m["queue_len"]] * num_cpus
+    else:
+        avg_ready_q = m["queue_len"]
+        per_cpu = None
+
+    stats = default_stats(num_cpus)
+    stats.update({
+        "avg_turnaround": m["turnaround"],
+        "throughput": lmbda,
+        "cpu_utils": [m["rho"]] * num_cpus,
+        "avg_ready_q": avg_ready_q,
+        "avg_ready_q_per_cpu": per_cpu,
+        "policy": policy if scenario == 1 else "global",
+        "turnaround_ci_low": m["turnaround"],
+        "turnaround_ci_high": m["turnaround"],
+        "turnaround_ci_rel_hw": 0.0,
+    })
+    for name, q in PERCENTILES.items():
+        stats["turnaround_" + name] = turnaround_quantile(q, lam, mu, c, m["prob_wait"])
+    return stats
+
+
+def compare(exact, simulated):
+    """
+    Checks a simulate() result against the solve() result for the same point.
+
+    Returns a dict:
+        exact / simulated: the two mean turnarounds
+        rel_error: (simulated - exact) / exact
+        ci_low / ci_high: the run's batch-means CI
+        util_error / queue_error: same relative error for utilization and
+                                  queue length (no CI for those, just FYI)
+        disagree: True if exact is outside the CI, None if the run has too
+                  few batches for a CI
+    """
+    ex = exact["avg_turnaround"]
+    sim = simulated["avg_turnaround"]
+    low = simulated["turnaround_ci_low"]
+    high = simulated["turnaround_ci_high"]
+    if math.isnan(low) or math.isnan(high):
+        disagree = None
+    else:
+        disagree = not (low <= ex <= high)
+    sim_util = sum(simulated["cpu_utils"]) / len(simulated["cpu_utils"])
+    ex_util = exact["cpu_utils"][0]
+    return {
+        "exact": ex,
+        "simulated": sim,
+        "rel_error": (sim - ex) / ex,
+        "ci_low": low,
+        "ci_high": high,
+        "util_error": (sim_util - ex_util) / ex_util if ex_util else float('nan'),
+        "queue_error": ((simulated["avg_ready_q"] - exact["avg_ready_q"]) / exact["avg_ready_q"]
+                        if exact["avg_ready_q"] else float('nan')),
+        "disagree": disagree,
+    }
+
+
+def validate(lmbda, avg_service, scenario, num_cpus, **sim_kwargs):
+    """
+    Runs hw5.simulate() (sim_kwargs passed through) next to solve() and
+    compares them. Returns (compare() dict, simulated stats).
+    """
+    import hw5
+    exact = solve(lmbda, avg_service, scenario, num_cpus,
+                  policy=sim_kwargs.get("policy", "random"), steal=sim_kwargs.get("steal"),
+                  discipline=sim_kwargs.get("discipline", "fcfs"),
+                  interarrival=sim_kwargs.get("interarrival", "exp"),
+                  service=sim_kwargs.get("service", "exp"))
+    stats = hw5.simulate(lmbda, avg_service, scenario, num_cpus, **sim_kwargs)
+    return compare(exact, stats), stats
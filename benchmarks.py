@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the HW5 simulator.
+
+Subcommands:
+  scaling    - events/sec of simulate() as the number of CPUs grows (4 .. 10,000).
+               Each event should cost the same no matter how many CPUs there
+               are, so the events/sec column should stay roughly flat.
+  eventlist  - heap vs calendar queue (eventlist.py) for given CPU counts and
+               loads: a "hold" micro-benchmark at the matching number of
+               pending events, then whole simulate() runs with each backend.
+               Prints the fastest one per configuration.
+  suite      - the regression suite: simulate() over a grid of scenario x
+               CPUs (4 .. 10,000) x load x run length. Reports events/sec,
+               ns/event, peak memory and setup time per point, saves it as a
+               JSON baseline (--save) and/or checks it against one
+               (--baseline): any point whose events/sec dropped by more than
+               --threshold is flagged and the exit code is 1.
+  compare    - same check between two saved JSON files (e.g. before/after a
+               change, to prove a speedup)
+
+Examples:
+  python3 benchmarks.py scaling
+  python3 benchmarks.py scaling --scenario 2 --load 0.95 --jobs 200000
+  python3 benchmarks.py eventlist --cpus 4 1024 100000 --load 0.5 0.95
+  python3 benchmarks.py suite --save baseline.json
+  python3 benchmarks.py suite --quick --baseline baseline.json --threshold 0.1
+  python3 benchmarks.py compare before.json after.json
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import hw5
+import variates
+from eventlist import EVENT_LISTS, make_event_list
+from result_cache import code_version
+
+
+DEFAULT_CPU_COUNTS = [4, 16, 64, 256, 1024, 4096, 10_000]
+
+# suite grid (--quick is a smaller one for a fast check while working)
+SUITE_GRID = {"scenarios": [1, 2], "cpus": [4, 64, 1024, 10_000], "loads": [0.5, 0.9],
+              "jobs": [20_000, 200_000], "repeats": 3}
+QUICK_GRID = {"scenarios": [1, 2], "cpus": [4, 1024], "loads": [0.9],
+              "jobs": [50_000], "repeats": 2}
+
+# engines worth timing (analytic doesn't simulate anything)
+SIM_ENGINES = ("event", "numpy")
+
+
+def positive_int(text):
+    """argparse type for counts that have to be at least 1."""
+    n = int(text)
+    if n < 1:
+        raise argparse.ArgumentTypeError(f"has to be at least 1, got {n}")
+    return n
+
+
+def time_simulation(lmbda, avg_service, scenario, num_cpus, jobs, engine="event", seed=1):
+    """
+    Runs one simulation and times it.
+
+    Returns (stats, elapsed_seconds).
+    """
+    t0 = time.perf_counter()
+    stats = hw5.simulate(lmbda, avg_service, scenario, num_cpus,
+                         target_completions=jobs, seed=seed, engine=engine)
+    return stats, time.perf_counter() - t0
+
+
+def run_scaling(cpu_counts, scenarios, load, avg_service, jobs, engine="event"):
+    """
+    Events/sec for every (scenario, num_cpus) combo at a fixed per-CPU load.
+
+    lambda is scaled with the CPU count (load * num_cpus / avg_service) so
+    every run sees the same utilization.
+    """
+    rows = []
+    for scenario in scenarios:
+        print(f"\nScenario {scenario} (load={load}, {jobs} jobs, engine={engine})")
+        print(f"{'CPUs':>8} | {'lambda':>12} | {'events':>10} | {'seconds':>8} | {'events/sec':>12}")
+        print("-" * 62)
+
+        for num_cpus in cpu_counts:
+            lmbda = load * num_cpus / avg_service
+            stats, elapsed = time_simulation(lmbda, avg_service, scenario, num_cpus, jobs, engine)
+            ev_rate = stats["events"] / elapsed if elapsed > 0 else float('inf')
+            rows.append({"scenario": scenario, "num_cpus": num_cpus,
+                         "events": stats["events"], "seconds": elapsed,
+                         "events_per_sec": ev_rate})
+            print(f"{num_cpus:>8} | {lmbda:>12.1f} | {stats['events']:>10} | "
+                  f"{elapsed:>8.3f} | {ev_rate:>12,.0f}")
+
+        rates = [r["events_per_sec"] for r in rows if r["scenario"] == scenario]
+        print(f"  slowest / fastest: {min(rates) / max(rates):.2f} (1.00 = perfectly flat)")
+
+    return rows
+
+
+def time_hold(backend, pending, ops, seed=1):
+    """
+    Classic "hold model" for event lists: fill it with `pending` events,
+    then repeat pop + push(popped time + exp(1)) `ops` times, so the size
+    stays constant. Returns ns per hold (one pop + one push).
+    """
+    rng = random.Random(seed)
+    exp = rng.expovariate
+    events = make_event_list(backend)
+    push = events.push
+    pop = events.pop
+    for seq in range(pending):
+        push((exp(1.0), seq, None))
+
+    seq = pending
+    t0 = time.perf_counter()
+    for _ in range(ops):
+        t = pop()[0]
+        push((t + exp(1.0), seq, None))
+        seq += 1
+    return (time.perf_counter() - t0) / ops * 1e9
+
+
+def run_eventlist(cpu_counts, loads, scenario, avg_service, jobs, hold_ops, sim_cpu_limit):
+    """
+    Picks the fastest event list backend for every (num_cpus, load).
+
+    The pending event count in simulate() is about (busy CPUs + 1), i.e.
+    load * num_cpus + 1, so that's the size the hold benchmark runs at.
+    Whole simulations only run up to sim_cpu_limit CPUs (they get slow).
+
+    Returns a list of dicts, one per configuration, with "best" = backend.
+    """
+    rows = []
+    print(f"\nEvent list backends (scenario {scenario}, hold ops={hold_ops}, sim jobs={jobs})")
+    header = f"{'CPUs':>8} | {'load':>5} | {'pending':>8}"
+    for b in EVENT_LISTS:
+        header += f" | {b + ' ns/hold':>16}"
+    for b in EVENT_LISTS:
+        header += f" | {b + ' ev/s':>14}"
+    print(header + " | best")
+    print("-" * len(header) + "-------------")
+
+    for num_cpus in cpu_counts:
+        for load in loads:
+            pending = max(1, round(load * num_cpus) + 1)
+            row = {"num_cpus": num_cpus, "load": load, "pending": pending}
+            line = f"{num_cpus:>8} | {load:>5.2f} | {pending:>8}"
+
+            for b in EVENT_LISTS:
+                row[f"{b}_ns_per_hold"] = time_hold(b, pending, hold_ops)
+                line += f" | {row[f'{b}_ns_per_hold']:>16.0f}"
+
+            run_sim = num_cpus <= sim_cpu_limit
+            for b in EVENT_LISTS:
+                if run_sim:
+                    lmbda = load * num_cpus / avg_service
+                    t0 = time.perf_counter()
+                    stats = hw5.simulate(lmbda, avg_service, scenario, num_cpus,
+                                         target_completions=jobs, event_list=b)
+                    rate = stats["events"] / (time.perf_counter() - t0)
+                    row[f"{b}_events_per_sec"] = rate
+                    line += f" | {rate:>14,.0f}"
+                else:
+                    line += f" | {'-':>14}"
+
+            # whole-sim speed decides when we have it, otherwise the hold numbers
+            if run_sim:
+                row["best"] = max(EVENT_LISTS, key=lambda b: row[f"{b}_events_per_sec"])
+            else:
+                row["best"] = min(EVENT_LISTS, key=lambda b: row[f"{b}_ns_per_hold"])
+            rows.append(row)
+            print(f"{line} | {row['best']}")
+
+    return rows
+
+
+# ============================================================================
+# REGRESSION SUITE
+# ============================================================================
+
+def import_time():
+    """Seconds for a fresh interpreter to import hw5 (best of 3)."""
+    cmd = [sys.executable, "-c", "import time; t = time.perf_counter(); import hw5; "
+                                 "print(time.perf_counter() - t)"]
+    here = os.path.dirname(os.path.abspath(__file__))
+    best = float('inf')
+    for _ in range(3):
+        out = subprocess.run(cmd, capture_output=True, text=True, check=True, cwd=here).stdout
+        best = min(best, float(out))
+    return best
+
+
+def bench_point(scenario, num_cpus, load, jobs, avg_service=0.02, engine="event",
+                repeats=3, memory=True):
+    """
+    One suite point: best-of-`repeats` wall time (the least disturbed run,
+    noise only ever makes things slower), plus
+      - setup_sec: a run with 1 completion, i.e. mostly the O(num_cpus)
+        setup before the first event
+      - peak_mem_bytes: peak Python heap during a separate run with
+        tracemalloc on (it slows things down a lot, so never timed)
+    """
+    lmbda = load * num_cpus / avg_service
+    best = float('inf')
+    for _ in range(repeats):
+        stats, elapsed = time_simulation(lmbda, avg_service, scenario, num_cpus, jobs, engine)
+        best = min(best, elapsed)
+    events = stats["events"]
+
+    _, setup = time_simulation(lmbda, avg_service, scenario, num_cpus, 1, engine)
+
+    peak = None
+    if memory:
+        tracemalloc.start()
+        time_simulation(lmbda, avg_service, scenario, num_cpus, jobs, engine)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {"scenario": scenario, "num_cpus": num_cpus, "load": load, "jobs": jobs,
+            "engine": engine, "events": events, "seconds": best,
+            "events_per_sec": events / best if best > 0 else float('inf'),
+            "ns_per_event": best / events * 1e9 if events else float('nan'),
+            "setup_sec": setup, "peak_mem_bytes": peak}
+
+
+def point_key(row):
+    return (row["scenario"], row["num_cpus"], row["load"], row["jobs"], row["engine"])
+
+
+def compare_results(baseline, current, threshold):
+    """
+    Matches points by (scenario, cpus, load, jobs, engine) and prints the
+    events/sec change of each. A drop of more than `threshold` (fraction)
+    is a regression.
+
+    Returns the list of regressed points.
+    """
+    old = {point_key(r): r for r in baseline["results"]}
+    regressions = []
+    print(f"\n{'scen':>4} | {'CPUs':>6} | {'load':>4} | {'jobs':>8} | {'baseline ev/s':>13} | "
+          f"{'now ev/s':>12} | {'change':>7}")
+    print("-" * 74)
+    for row in current["results"]:
+        base = old.get(point_key(row))
+        if base is None:
+            continue
+        change = row["events_per_sec"] / base["events_per_sec"] - 1.0
+        flag = ""
+        if change < -threshold:
+            flag = "  <-- REGRESSION"
+            regressions.append(row)
+        print(f"{row['scenario']:>4} | {row['num_cpus']:>6} | {row['load']:>4} | {row['jobs']:>8} | "
+              f"{base['events_per_sec']:>13,.0f} | {row['events_per_sec']:>12,.0f} | "
+              f"{change:>+7.1%}{flag}")
+
+    if baseline["meta"].get("code_version") == current["meta"].get("code_version"):
+        print("\n(same code version on both sides - differences are just noise)")
+    if regressions:
+        print(f"\n{len(regressions)} point(s) more than {threshold:.0%} slower than the baseline")
+    else:
+        print(f"\nNo regressions beyond {threshold:.0%}")
+    return regressions
+
+
+def run_suite(grid, avg_service=0.02, engine="event", memory=True):
+    """Runs every grid point. Returns the JSON-able result dict (meta + results)."""
+    meta = {
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.platform(),
+        "rng_backend": variates.BACKEND,
+        "code_version": code_version(),
+        "repeats": grid["repeats"],
+        "avg_service": avg_service,
+        "import_sec": import_time(),
+    }
+    print(f"Suite: {len(grid['scenarios']) * len(grid['cpus']) * len(grid['loads']) * len(grid['jobs'])} "
+          f"points, best of {grid['repeats']}, hw5 import {meta['import_sec'] * 1000:.0f} ms")
+    print(f"{'scen':>4} | {'CPUs':>6} | {'load':>4} | {'jobs':>8} | {'events/sec':>12} | "
+          f"{'ns/event':>9} | {'setup ms':>8} | {'peak MB':>8}")
+    print("-" * 80)
+
+    results = []
+    for scenario in grid["scenarios"]:
+        for num_cpus in grid["cpus"]:
+            for load in grid["loads"]:
+                for jobs in grid["jobs"]:
+                    row = bench_point(scenario, num_cpus, load, jobs, avg_service, engine,
+                                      grid["repeats"], memory)
+                    results.append(row)
+                    mem = (f"{row['peak_mem_bytes'] / 1e6:>8.1f}"
+                           if row["peak_mem_bytes"] is not None else f"{'-':>8}")
+                    print(f"{scenario:>4} | {num_cpus:>6} | {load:>4} | {jobs:>8} | "
+                          f"{row['events_per_sec']:>12,.0f} | {row['ns_per_event']:>9,.0f} | "
+                          f"{row['setup_sec'] * 1000:>8.2f} | {mem}")
+    return {"meta": meta, "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HW5 simulator benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("scaling", help="events/sec vs number of CPUs")
+    p.add_argument("--cpus", type=int, nargs="+", default=DEFAULT_CPU_COUNTS,
+                   help="CPU counts to try (default: 4 .. 10000)")
+    p.add_argument("--scenario", type=int, choices=(1, 2), nargs="+", default=[1, 2])
+    p.add_argument("--load", type=float, default=0.9, help="per-CPU utilization target")
+    p.add_argument("--avg-service", type=float, default=0.02)
+    p.add_argument("--jobs", type=int, default=100_000, help="completions per run")
+    p.add_argument("--engine", choices=SIM_ENGINES, default="event")
+
+    p = sub.add_parser("eventlist", help="heap vs calendar queue, fastest per CPU count/load")
+    p.add_argument("--cpus", type=int, nargs="+", default=[4, 64, 1024, 10_000, 100_000, 1_000_000],
+                   help="CPU counts (pending events ~ load * cpus)")
+    p.add_argument("--load", type=float, nargs="+", default=[0.5, 0.95],
+                   help="per-CPU utilization(s)")
+    p.add_argument("--scenario", type=int, choices=(1, 2), default=2)
+    p.add_argument("--avg-service", type=float, default=0.02)
+    p.add_argument("--jobs", type=int, default=100_000, help="completions per simulate() run")
+    p.add_argument("--hold-ops", type=int, default=200_000, help="pop+push pairs per hold run")
+    p.add_argument("--sim-cpu-limit", type=int, default=10_000,
+                   help="only run whole simulations up to this many CPUs")
+
+    p = sub.add_parser("suite", help="benchmark grid with JSON baselines + regression check")
+    p.add_argument("--quick", action="store_true", help="small grid (a couple of minutes)")
+    p.add_argument("--cpus", type=int, nargs="+", default=None)
+    p.add_argument("--load", type=float, nargs="+", default=None)
+    p.add_argument("--jobs", type=int, nargs="+", default=None, help="run lengths (completions)")
+    p.add_argument("--scenario", type=int, choices=(1, 2), nargs="+", default=None)
+    p.add_argument("--repeats", type=positive_int, default=None, help="timed runs per point (best counts)")
+    p.add_argument("--avg-service", type=float, default=0.02)
+    p.add_argument("--engine", choices=SIM_ENGINES, default="event")
+    p.add_argument("--no-memory", action="store_true", help="skip the tracemalloc run per point")
+    p.add_argument("--save", default=None, metavar="FILE", help="write the results as JSON")
+    p.add_argument("--baseline", default=None, metavar="FILE",
+                   help="compare against this JSON and exit 1 on regressions")
+    p.add_argument("--threshold", type=float, default=0.10,
+                   help="events/sec drop that counts as a regression (default 0.10 = 10%%)")
+
+    p = sub.add_parser("compare", help="regression check between two saved suite JSON files")
+    p.add_argument("baseline")
+    p.add_argument("current")
+    p.add_argument("--threshold", type=float, default=0.10)
+
+    args = parser.parse_args()
+
+    if args.command in ("suite", "compare"):
+        try:
+            if args.command == "suite":
+                grid = dict(QUICK_GRID if args.quick else SUITE_GRID)
+                for key, value in (("cpus", args.cpus), ("loads", args.load), ("jobs", args.jobs),
+                                   ("scenarios", args.scenario), ("repeats", args.repeats)):
+                    if value is not None:
+                        grid[key] = value
+                baseline = None
+                if args.baseline:
+                    with open(args.baseline) as f:
+                        baseline = json.load(f)
+                current = run_suite(grid, args.avg_service, args.engine, not args.no_memory)
+                if args.save:
+                    with open(args.save, "w") as f:
+                        json.dump(current, f, indent=1)
+                    print(f"\nSaved {len(current['results'])} points to {args.save}")
+            else:
+                with open(args.baseline) as f:
+                    baseline = json.load(f)
+                with open(args.current) as f:
+                    current = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        if baseline is not None and compare_results(baseline, current, args.threshold):
+            sys.exit(1)
+    elif args.command == "scaling":
+        run_scaling(args.cpus, args.scenario, args.load, args.avg_service, args.jobs, args.engine)
+    elif args.command == "eventlist":
+        run_eventlist(args.cpus, args.load, args.scenario, args.avg_service, args.jobs,
+                      args.hold_ops, args.sim_cpu_limit)
+    else:
+        parser.print_help()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Checkpoint files for long hw5.simulate() runs (checkpoint=..., resume=True).
+
+A checkpoint is the complete simulator state between two events: event
+list, ready queues, CPU state, every metric accumulator, the random streams
+(generator state + the unused part of their blocks) and seq. Everything is
+pickled in ONE go, so objects that share things (the dispatcher and the
+routing stream, a job sitting both in running_job and in its DEP event,
+...) still share them after loading - that's what makes a resumed run
+continue bit for bit like it was never stopped.
+
+File format:
+    MAGIC (8 bytes) + uint32 n + pickle((params, code version)) (n bytes)
+    + zlib(pickle(state))
+
+params are the simulate() arguments it was made with (read_params() gets
+just those, without unpacking the state), the code version is a hash of
+CHECKPOINT_FILES: the simulator source plus every module whose objects end
+up in the pickle (the time series sampler, ...) or that runs in the main
+loop. Loading a checkpoint from different code raises, since "bit for bit"
+would be a lie.
+
+Files are written to <path>.tmp, fsync'd and then os.replace'd over the
+old one, so a crash in the middle of writing never leaves a broken
+checkpoint behind - you always have the previous complete one. The
+directory gets fsync'd after the rename too (POSIX), otherwise a power cut
+can still undo the rename and you'd be back to the checkpoint before.
+"""
+
+import os
+import pickle
+import struct
+import zlib
+
+from result_cache import SOURCE_FILES, code_version
+
+
+MAGIC = b"HW5CKPT1"
+
+# the result cache's list + whatever else a checkpoint depends on
+CHECKPOINT_FILES = SOURCE_FILES + ("timeseries.py", "recorder.py", "traces.py",
+                                   "instrument.py", "checkpoint.py")
+
+
+def save_checkpoint(path, params, state, level=6):
+    """
+    Atomically writes a checkpoint.
+
+    Params:
+        path: checkpoint file (replaced if it exists)
+        params: the simulate() arguments of the run
+        state: {name: value} of the simulator state
+        level: zlib compression level
+
+    Returns the file size in bytes.
+    """
+    head = pickle.dumps((params, code_version(CHECKPOINT_FILES)), protocol=pickle.HIGHEST_PROTOCOL)
+    blob = zlib.compress(pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL), level)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(head)))
+        f.write(head)
+        f.write(blob)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    if os.name == "posix":      # windows can't open a directory, and doesn't need to
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    return len(MAGIC) + 4 + len(head) + len(blob)
+
+
+def _read_head(f, path):
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError(f"{path} is not a simulator checkpoint")
+    n = struct.unpack("<I", f.read(4))[0]
+    params, version = pickle.loads(f.read(n))
+    current = code_version(CHECKPOINT_FILES)
+    if version != current:
+        raise ValueError(f"{path} was written by a different version of the simulator "
+                         f"({version}, this is {current}), can't resume it exactly")
+    return params
+
+
+def read_params(path):
+    """Just the simulate() arguments a checkpoint was made with."""
+    with open(path, "rb") as f:
+        return _read_head(f, path)
+
+
+def load_checkpoint(path):
+    """
+    Reads a checkpoint back.
+
+    Returns (params, state). Raises ValueError if it isn't a checkpoint or
+    was written by a different version of the simulator code.
+    """
+    with open(path, "rb") as f:
+        params = _read_head(f, path)
+        state = pickle.loads(zlib.decompress(f.read()))
+    return params, state
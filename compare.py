@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Paired comparison of scenario 1 (per-CPU queues) vs scenario 2 (global queue).
+
+The question we actually care about is "how much better is the global
+queue", i.e. the DIFFERENCE in a metric between the two scenarios. Running
+them with independent random numbers means the difference is buried in the
+noise of both runs. Since every purpose has its own stream (variates.py),
+running both scenarios with the same seed gives them the identical arrival
+and service sequence - common random numbers (CRN) - so most of that noise
+cancels in the difference.
+
+For each replication r (seed = base_seed + r):
+    d_r = metric(scenario 1, seed) - metric(scenario 2, seed)
+and with --antithetic every replication is an antithetic pair: the same
+seed is also run with mirrored uniforms (u -> 1 - u) and d_r is the average
+of the two differences (negatively correlated, so the pair is less noisy
+than two independent runs).
+
+The d_r are i.i.d., so the paired-difference CI is a plain t interval.
+It also prints how much variance CRN saved compared to running the two
+scenarios independently (var(m1) + var(m2) vs var(d)), i.e. roughly how
+many times more jobs you'd have needed without it.
+
+Examples:
+  python3 compare.py 150 0.02 4
+  python3 compare.py 150 0.02 4 --antithetic --reps 20 --jobs 50000
+  python3 compare.py 180 0.02 4 --metric turnaround_p99 --precision 0.02
+"""
+
+import argparse
+import math
+import sys
+
+import hw5
+from simstats import mean_ci
+
+
+def _variance(values):
+    n = len(values)
+    if n < 2:
+        return float('nan')
+    m = sum(values) / n
+    return sum((v - m) ** 2 for v in values) / (n - 1)
+
+
+def run_pair(lmbda, avg_service, num_cpus, seed, metric="avg_turnaround", jobs=10_000,
+             engine="event", warmup=None, antithetic=False):
+    """
+    One replication: both scenarios on the same random numbers.
+
+    Returns (m1, m2) - the metric for scenario 1 and 2. With antithetic=True
+    each is the average over the normal and the antithetic run.
+    """
+    values = []
+    for scenario in (1, 2):
+        runs = [False, True] if antithetic else [False]
+        total = 0.0
+        for anti in runs:
+            stats = hw5.simulate(lmbda, avg_service, scenario, num_cpus,
+                                 target_completions=jobs, seed=seed, engine=engine,
+                                 warmup=warmup, antithetic=anti)
+            total += stats[metric]
+        values.append(total / len(runs))
+    return values[0], values[1]
+
+
+def compare_scenarios(lmbda, avg_service, num_cpus, reps=10, metric="avg_turnaround",
+                      jobs=10_000, base_seed=1, engine="event", warmup=None,
+                      antithetic=False, confidence=0.95, rel_precision=None,
+                      max_reps=1000, verbose=False):
+    """
+    Paired scenario 1 - scenario 2 comparison with common random numbers.
+
+    Params:
+        reps: replications to run (the minimum when rel_precision is set)
+        metric: any numeric key of simulate()'s stats dict
+        jobs: completions per simulation run
+        antithetic: make every replication an antithetic pair
+        rel_precision: if set, keep adding replications until the CI
+                       half-width on the difference is within this fraction
+                       of |mean difference| (or max_reps is hit)
+
+    Returns:
+        dict with diff_mean, diff_ci_low/high, diff_rel_hw, the per-scenario
+        means, reps, sim_runs, jobs_simulated and crn_variance_ratio
+        ((var m1 + var m2) / var d = variance reduction vs independent runs)
+    """
+    if reps < 2:
+        raise ValueError("need at least 2 replications for a CI")
+
+    m1s, m2s, diffs = [], [], []
+    runs_per_rep = 4 if antithetic else 2
+    r = 0
+    while True:
+        seed = base_seed + r
+        m1, m2 = run_pair(lmbda, avg_service, num_cpus, seed, metric, jobs,
+                          engine, warmup, antithetic)
+        m1s.append(m1)
+        m2s.append(m2)
+        diffs.append(m1 - m2)
+        r += 1
+        if verbose:
+            print(f"  rep {r:>4} (seed {seed}): scenario 1 {m1:.6f}  scenario 2 {m2:.6f}  "
+                  f"diff {m1 - m2:+.6f}")
+
+        if r < reps:
+            continue
+        if rel_precision is None or r >= max_reps:
+            break
+        mean, hw = mean_ci(diffs, confidence)
+        if mean != 0.0 and hw / abs(mean) <= rel_precision:
+            break
+
+    mean, hw = mean_ci(diffs, confidence)
+    var_d = _variance(diffs)
+    var_indep = _variance(m1s) + _variance(m2s)
+    return {
+        "metric": metric,
+        "scenario1_mean": sum(m1s) / r,
+        "scenario2_mean": sum(m2s) / r,
+        "diff_mean": mean,
+        "diff_ci_low": mean - hw,
+        "diff_ci_high": mean + hw,
+        "diff_rel_hw": hw / abs(mean) if mean else float('nan'),
+        "reps": r,
+        "sim_runs": r * runs_per_rep,
+        "jobs_simulated": r * runs_per_rep * jobs,
+        "crn_variance_ratio": var_indep / var_d if var_d > 0 else float('inf'),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Paired scenario 1 vs 2 comparison with common random numbers")
+    parser.add_argument("lmbda", type=float, help="arrival rate (jobs/sec)")
+    parser.add_argument("avg_service", type=float, help="avg service time (sec)")
+    parser.add_argument("num_cpus", type=int)
+    parser.add_argument("--reps", type=int, default=10,
+                        help="replications (minimum when --precision is set, default 10)")
+    parser.add_argument("--jobs", type=int, default=10_000, help="completions per run")
+    parser.add_argument("--metric", default="avg_turnaround",
+                        help="stats key to compare (avg_turnaround, turnaround_p99, avg_ready_q, ...)")
+    parser.add_argument("--seed", type=int, default=1, help="seed of the first replication")
+    parser.add_argument("--antithetic", action="store_true",
+                        help="run every replication as an antithetic pair")
+    parser.add_argument("--precision", type=float, default=None,
+                        help="add replications until the difference CI is within this "
+                             "fraction of the difference")
+    parser.add_argument("--max-reps", type=int, default=1000)
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument("--engine", choices=hw5.ENGINES, default="event")
+    parser.add_argument("--warmup", choices=("mser",), default=None)
+    parser.add_argument("-v", "--verbose", action="store_true", help="print every replication")
+    args = parser.parse_args()
+
+    try:
+        res = compare_scenarios(args.lmbda, args.avg_service, args.num_cpus, reps=args.reps,
+                                metric=args.metric, jobs=args.jobs, base_seed=args.seed,
+                                engine=args.engine, warmup=args.warmup,
+                                antithetic=args.antithetic, confidence=args.confidence,
+                                rel_precision=args.precision, max_reps=args.max_reps,
+                                verbose=args.verbose)
+    except KeyError:
+        print(f"Error: simulate() has no metric called {args.metric!r}")
+        sys.exit(1)
+    except (ValueError, RuntimeError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    mode = "CRN + antithetic pairs" if args.antithetic else "CRN"
+    print(f"\n{args.metric}: scenario 1 vs scenario 2 ({mode}, {args.num_cpus} CPUs, "
+          f"lambda={args.lmbda})")
+    print(f"  Scenario 1 mean: \t\t{res['scenario1_mean']:.6f}")
+    print(f"  Scenario 2 mean: \t\t{res['scenario2_mean']:.6f}")
+    print(f"  Difference (1 - 2): \t\t{res['diff_mean']:+.6f}")
+    print(f"  {args.confidence:.0%} CI: \t\t\t{res['diff_ci_low']:+.6f} {res['diff_ci_high']:+.6f} "
+          f"(±{res['diff_rel_hw']:.1%})")
+    print(f"  Replications: \t\t{res['reps']} ({res['sim_runs']} runs, "
+          f"{res['jobs_simulated']:,} jobs)")
+    ratio = res['crn_variance_ratio']
+    if math.isfinite(ratio):
+        print(f"  CRN variance reduction: \t{ratio:.1f}x (independent runs would need "
+              f"~{ratio:.0f}x the jobs for the same CI)")
+
+
+if __name__ == "__main__":
+    main()
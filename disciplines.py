@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Queue disciplines for the HW5 simulator's ready queues.
+
+The ready queues used to be plain deques, i.e. FCFS only. simulate() now
+asks make_queue() for each ready queue (per-CPU or global, doesn't matter)
+and only ever calls append(job), popleft() and len() on it, so a discipline
+is just an object with those three methods:
+
+  fcfs      - first come first served (a plain deque, the original)
+  sjf       - shortest job first, non-preemptive (heap on service time)
+  priority  - priority classes, non-preemptive: class 0 first, FCFS inside
+              a class (heap on (class, arrival order))
+  srpt      - shortest remaining processing time, PREEMPTIVE: an arriving
+              job that's shorter than what a CPU has left kicks it off
+              (heap on remaining time)
+  rr        - round robin with a time quantum: a job runs for at most one
+              quantum, then goes to the back of its queue (a deque)
+
+The preemption / time slicing itself lives in simulate() (DEP events carry
+a per-CPU generation number, so a preempted job's departure is just ignored
+when it gets popped). Those two disciplines need mutable job records:
+  [pid, arrival, service, priority_class, remaining]
+everything else uses (pid, arrival, service, priority_class) tuples.
+"""
+
+import heapq
+from collections import deque
+
+
+DISCIPLINES = ("fcfs", "sjf", "priority", "srpt", "rr")
+PREEMPTIVE = ("srpt",)       # arrivals can kick a running job off its CPU
+TIME_SLICED = ("rr",)        # running jobs get cut off after a quantum
+
+# job record fields (see module docstring)
+SERVICE = 2
+PRIORITY = 3
+REMAINING = 4
+
+
+class _HeapQueue:
+    """
+    Ready queue ordered by job[key], FIFO among equal keys.
+
+    Same append / popleft / len interface as a deque so simulate() doesn't
+    care which one it has. Each op is O(log n).
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.heap = []
+        self.count = 0      # arrival order, breaks ties + keeps jobs uncompared
+
+    def append(self, job):
+        heapq.heappush(self.heap, (job[self.key], self.count, job))
+        self.count += 1
+
+    def popleft(self):
+        return heapq.heappop(self.heap)[2]
+
+    def __len__(self):
+        return len(self.heap)
+
+
+def make_queue(discipline):
+    """
+    A fresh empty ready queue for the discipline.
+
+    Raises ValueError for unknown names.
+    """
+    if discipline in ("fcfs", "rr"):
+        return deque()
+    if discipline == "sjf":
+        return _HeapQueue(SERVICE)
+    if discipline == "priority":
+        return _HeapQueue(PRIORITY)
+    if discipline == "srpt":
+        return _HeapQueue(REMAINING)
+    raise ValueError(f"unknown discipline {discipline!r}, pick one of {', '.join(DISCIPLINES)}")
+
+
+def needs_mutable_jobs(discipline):
+    """True if jobs can be interrupted, i.e. need a remaining-time field."""
+    return discipline in PREEMPTIVE or discipline in TIME_SLICED
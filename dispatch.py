@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Dispatch policies for scenario 1 (which per-CPU queue an arriving job joins).
+
+The original scenario 1 tossed every job to a uniformly random CPU, which is
+about the worst load balancer there is. These are the usual alternatives:
+
+  random      - uniform random CPU (the original behavior)
+  rr          - round-robin: 0, 1, 2, ..., num_cpus-1, 0, ...
+  jsq         - join-the-shortest-queue (jobs waiting + running), ties
+                broken at random
+  pod<d>      - power-of-d-choices: sample d CPUs, join the shortest of them
+                ("pod" = pod2)
+  least-work  - join the CPU whose queued + remaining work finishes first
+                (uses the job service times, so it's an "oracle" policy;
+                with FCFS queues and no stealing it gives exactly the waits
+                of scenario 2)
+
+The bottom of the file has the victim pickers for work stealing (an idle
+CPU taking a waiting job from another CPU's queue): random, longest, pow2.
+
+None of them look at every CPU per arrival, so routing stays cheap with
+10,000 CPUs:
+  jsq         - CPUs bucketed by queue length + a pointer to the shortest
+                bucket, O(1) per arrival/departure
+  pod<d>      - O(d)
+  least-work  - heap of (time the CPU's work runs out, cpu), O(log n)
+
+Every policy has the same interface, used by hw5.simulate():
+  choose(now)              -> cpu id for the next arrival
+  job_added(cpu, job, now) /  job_done(cpu, job, now)
+                           -> bookkeeping, only called if tracks_load is True
+  job_removed(cpu, job, now)
+                           -> job left cpu's queue without running there
+                              (stolen), same condition
+"""
+
+import heapq
+
+
+def policy_names():
+    """Names accepted by make_dispatcher() (pod takes any d, pod2 listed)."""
+    return ["random", "rr", "jsq", "pod2", "least-work"]
+
+
+class RandomDispatch:
+    """Uniform random CPU, one draw from the routing stream per job."""
+
+    name = "random"
+    tracks_load = False
+
+    def __init__(self, num_cpus, stream):
+        self.num_cpus = num_cpus
+        self._pick = stream.index
+
+    def choose(self, now):
+        return self._pick(self.num_cpus)
+
+
+class RoundRobinDispatch:
+    """Cycles through the CPUs in order (no randomness at all)."""
+
+    name = "rr"
+    tracks_load = False
+
+    def __init__(self, num_cpus, stream=None):
+        self.num_cpus = num_cpus
+        self.next_cpu = 0
+
+    def choose(self, now):
+        cpu = self.next_cpu
+        self.next_cpu = cpu + 1 if cpu + 1 < self.num_cpus else 0
+        return cpu
+
+
+class _LengthBuckets:
+    """
+    Per-CPU job counts with O(1) "give me a CPU with the smallest (or
+    largest) count".
+
+    buckets[k] holds the CPUs that currently have k jobs (list + each CPU's
+    slot in it, swap-remove like hw5's idle pool). Counts only ever move by
+    one, so the smallest and largest non-empty buckets can be tracked with
+    two pointers.
+    """
+
+    def __init__(self, num_cpus):
+        self.count = [0] * num_cpus
+        self.buckets = [list(range(num_cpus))]
+        self.pos = list(range(num_cpus))
+        self.min_len = 0
+        self.max_len = 0
+
+    def _move(self, cpu, old, new):
+        bucket = self.buckets[old]
+        i = self.pos[cpu]
+        last = bucket.pop()
+        if last != cpu:
+            bucket[i] = last
+            self.pos[last] = i
+
+        if new == len(self.buckets):
+            self.buckets.append([])
+        bucket = self.buckets[new]
+        self.pos[cpu] = len(bucket)
+        bucket.append(cpu)
+        self.count[cpu] = new
+
+    def incr(self, cpu):
+        k = self.count[cpu]
+        self._move(cpu, k, k + 1)
+        if k == self.min_len and not self.buckets[k]:
+            self.min_len = k + 1
+        if k + 1 > self.max_len:
+            self.max_len = k + 1
+
+    def decr(self, cpu):
+        k = self.count[cpu]
+        self._move(cpu, k, k - 1)
+        if k - 1 < self.min_len:
+            self.min_len = k - 1
+        if k == self.max_len and not self.buckets[k]:
+            self.max_len = k - 1
+
+    def shortest(self):
+        """The CPUs tied for the smallest count (don't modify it)."""
+        return self.buckets[self.min_len]
+
+    def longest(self):
+        """The CPUs tied for the largest count (don't modify it)."""
+        return self.buckets[self.max_len]
+
+
+class JSQDispatch:
+    """Join-the-shortest-queue (counting the running job), random tie-break."""
+
+    name = "jsq"
+    tracks_load = True
+
+    def __init__(self, num_cpus, stream):
+        self.lengths = _LengthBuckets(num_cpus)
+        self._pick = stream.index
+
+    def choose(self, now):
+        tied = self.lengths.shortest()
+        if len(tied) == 1:
+            return tied[0]
+        return tied[self._pick(len(tied))]
+
+    def job_added(self, cpu, job, now):
+        self.lengths.incr(cpu)
+
+    def job_done(self, cpu, job, now):
+        self.lengths.decr(cpu)
+
+    job_removed = job_done
+
+
+class PowerOfDDispatch:
+    """Power-of-d-choices: d random CPUs, join the one with the fewest jobs."""
+
+    tracks_load = True
+
+    def __init__(self, num_cpus, stream, d=2):
+        if d < 1:
+            raise ValueError("power-of-d needs d >= 1")
+        self.name = f"pod{d}"
+        self.num_cpus = num_cpus
+        self.d = d
+        self.count = [0] * num_cpus
+        self._pick = stream.index
+
+    def choose(self, now):
+        pick = self._pick
+        n = self.num_cpus
+        count = self.count
+        best = pick(n)
+        for _ in range(self.d - 1):
+            c = pick(n)
+            if count[c] < count[best]:
+                best = c
+        return best
+
+    def job_added(self, cpu, job, now):
+        self.count[cpu] += 1
+
+    def job_done(self, cpu, job, now):
+        self.count[cpu] -= 1
+
+    job_removed = job_done
+
+
+class LeastWorkDispatch:
+    """
+    Join the CPU with the least remaining work (queued + rest of running job).
+
+    With FCFS per-CPU queues a CPU's work runs out at work_end[cpu], so the
+    CPU with the least work left is just the one with the smallest work_end.
+    Those sit in a heap; the chosen CPU is always the top, so job_added()
+    can update it with one heapreplace. Idle CPUs all have 0 work left; the
+    heap hands out the one that went idle first.
+
+    A stolen job (job_removed) takes its work off the victim's work_end -
+    the jobs behind it move up by exactly that much - and onto the thief's
+    (without the migration cost). A job's work is what it has left: its
+    service time, or job[4] for the mutable srpt / rr records (a preempted
+    or sliced job that went back into a queue has already run for a while). With exact work totals a job
+    only ever waits at the CPU whose work runs out first, so stealing hardly
+    ever finds anything to take here; this just keeps the books right.
+    """
+
+    name = "least-work"
+    tracks_load = True
+
+    def __init__(self, num_cpus, stream=None):
+        self.num_cpus = num_cpus
+        self.work_end = [0.0] * num_cpus
+        self.heap = [(0.0, c) for c in range(num_cpus)]   # already a valid heap
+
+    def choose(self, now):
+        heap = self.heap
+        work_end = self.work_end
+        # skip stale entries (left by job_removed or a job_added that wasn't for the top)
+        while heap[0][0] != work_end[heap[0][1]]:
+            heapq.heappop(heap)
+        return heap[0][1]
+
+    def job_added(self, cpu, job, now):
+        end = self.work_end[cpu]
+        end = (end if end > now else now) + (job[4] if len(job) > 4 else job[2])
+        self.work_end[cpu] = end
+        heap = self.heap
+        if heap[0][1] == cpu:
+            heapq.heapreplace(heap, (end, cpu))
+        else:
+            self._push(end, cpu)
+
+    def job_done(self, cpu, job, now):
+        pass    # work_end already accounts for it
+
+    def job_removed(self, cpu, job, now):
+        # the victim is busy (it had jobs waiting), so this stays >= now
+        end = self.work_end[cpu] - (job[4] if len(job) > 4 else job[2])
+        self.work_end[cpu] = end
+        self._push(end, cpu)     # the old, bigger entry goes stale
+
+    def _push(self, end, cpu):
+        heapq.heappush(self.heap, (end, cpu))
+        if len(self.heap) > 2 * self.num_cpus + 64:
+            # too many stale entries, rebuild from scratch
+            self.heap = [(w, c) for c, w in enumerate(self.work_end)]
+            heapq.heapify(self.heap)
+
+
+def make_dispatcher(name, num_cpus, stream):
+    """
+    Builds the dispatcher for a policy name.
+
+    Params:
+        name: "random", "rr", "jsq", "pod" / "pod<d>", or "least-work"
+        num_cpus: number of CPUs (= per-CPU queues)
+        stream: the routing VariateStream (random choices + tie-breaks)
+
+    Raises ValueError for unknown names.
+    """
+    if name == "random":
+        return RandomDispatch(num_cpus, stream)
+    if name == "rr":
+        return RoundRobinDispatch(num_cpus, stream)
+    if name == "jsq":
+        return JSQDispatch(num_cpus, stream)
+    if name == "least-work":
+        return LeastWorkDispatch(num_cpus, stream)
+    if name.startswith("pod"):
+        d = name[3:]
+        if d == "" or d.isdigit():
+            return PowerOfDDispatch(num_cpus, stream, int(d) if d else 2)
+    raise ValueError(f"unknown dispatch policy {name!r}, pick one of "
+                     f"{', '.join(policy_names())} (or pod<d>)")
+
+
+# ============================================================================
+# WORK STEALING
+# ============================================================================
+# an idle CPU (thief) picks a victim CPU and takes the oldest job waiting in
+# the victim's ready queue. pick(thief) returns the victim, or None if the
+# probe found nothing worth stealing (that still counts as an attempt).
+
+STEAL_MODES = ("random", "longest", "pow2")
+
+
+class RandomVictim:
+    """Probe one random CPU; steal if its queue isn't empty."""
+
+    name = "random"
+    tracks_queues = False
+
+    def __init__(self, ready_queues, stream):
+        self.ready_queues = ready_queues
+        self._pick = stream.index
+
+    def pick(self, thief):
+        v = self._pick(len(self.ready_queues))
+        return v if self.ready_queues[v] else None
+
+
+class Pow2Victim:
+    """Probe two random CPUs, steal from the one with the longer queue."""
+
+    name = "pow2"
+    tracks_queues = False
+
+    def __init__(self, ready_queues, stream):
+        self.ready_queues = ready_queues
+        self._pick = stream.index
+
+    def pick(self, thief):
+        queues = self.ready_queues
+        n = len(queues)
+        a = self._pick(n)
+        b = self._pick(n)
+        v = a if len(queues[a]) >= len(queues[b]) else b
+        return v if queues[v] else None
+
+
+class LongestVictim:
+    """
+    Steal from the longest ready queue (ties at random).
+
+    Needs queue_grew / queue_shrank calls on every enqueue / dequeue so the
+    length buckets stay current; finding the longest is then O(1).
+    """
+
+    name = "longest"
+    tracks_queues = True
+
+    def __init__(self, ready_queues, stream):
+        self.lengths = _LengthBuckets(len(ready_queues))
+        self._pick = stream.index
+
+    def pick(self, thief):
+        lengths = self.lengths
+        if lengths.max_len == 0:
+            return None
+        tied = lengths.longest()
+        if len(tied) == 1:
+            return tied[0]
+        return tied[self._pick(len(tied))]
+
+    def queue_grew(self, cpu):
+        self.lengths.incr(cpu)
+
+    def queue_shrank(self, cpu):
+        self.lengths.decr(cpu)
+
+
+def make_victim_picker(name, ready_queues, stream):
+    """
+    Victim selection for work stealing.
+
+    Params:
+        name: "random", "longest" or "pow2"
+        ready_queues: the per-CPU deques (read only)
+        stream: a uniform VariateStream for the random probes / tie-breaks
+    """
+    if name == "random":
+        return RandomVictim(ready_queues, stream)
+    if name == "pow2":
+        return Pow2Victim(ready_queues, stream)
+    if name == "longest":
+        return LongestVictim(ready_queues, stream)
+    raise ValueError(f"unknown steal mode {name!r}, pick one of {', '.join(STEAL_MODES)}")
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Interarrival / service time distributions for the HW5 simulator
+(simulate(interarrival=..., service=...), --interarrival / --service).
+
+A distribution is given as a spec string, "name" or "name:key=value":
+
+  exp                   exponential (the default, same numbers as always)
+  det                   deterministic, every value = the mean
+  lognormal:cv=2        lognormal with coefficient of variation cv (default 1)
+  pareto:alpha=2.5      Pareto with tail index alpha > 1 (default 2.5; alpha
+                        <= 2 has infinite variance - really heavy tailed)
+  hyperexp:cv=3         two-phase hyperexponential, balanced means, cv >= 1
+                        (default 2)
+  empirical:FILE        empirical CDF from a file, either one value per line
+                        (samples) or "value,cumulative_probability" per line
+                        (a CDF). interpolated linearly in between.
+
+The spec only fixes the SHAPE. Every distribution gets scaled to the mean
+simulate() asks for (1/lmbda for interarrivals, avg_service for service
+times), so a lambda sweep still sweeps the load, and scenario 1 vs 2 still
+see the same jobs for the same seed.
+
+Everything is an inverse CDF of a uniform, applied to a whole block of
+uniforms at once (numpy if installed, plain lists otherwise) - so
+variates.VariateStream refills any of them as fast as the exponential, a
+draw is still one list index, antithetic runs still mirror u -> 1-u, and
+streams still pickle for checkpoints.
+"""
+
+import bisect
+import math
+import os
+import re
+import zlib
+from statistics import NormalDist
+
+from simstats import ACKLAM_LOW, acklam_central, acklam_tail
+
+try:
+    import numpy as np
+except ImportError:  # stdlib backend, same numbers up to the normal quantile's last digits
+    np = None
+
+
+# smallest uniform we ever feed to a quantile (u can be exactly 0)
+U_MIN = 2.0 ** -53
+
+
+class Distribution:
+    """
+    Base class. Subclasses set `name`, fill `params` and implement
+    transform(u, mean): uniforms in [0, 1) (numpy array or list) -> values
+    with the given mean (same type back).
+    """
+
+    name = None
+
+    def __init__(self):
+        self.params = {}
+
+    def transform(self, u, mean):
+        raise NotImplementedError
+
+    def describe(self):
+        """Canonical spec string (what goes in the CLI output and the CSV)."""
+        if not self.params:
+            return self.name
+        return self.name + ":" + ",".join(f"{k}={v:g}" for k, v in self.params.items())
+
+    def __repr__(self):
+        return f"<{self.describe()}>"
+
+    # same spec = same distribution (checkpoint params get compared on resume)
+    def __eq__(self, other):
+        return isinstance(other, Distribution) and self.describe() == other.describe()
+
+    def __hash__(self):
+        return hash(self.describe())
+
+
+class Exponential(Distribution):
+    """Exponential. variates.py special-cases this one to keep old runs bit-identical."""
+
+    name = "exp"
+
+    def transform(self, u, mean):
+        if np is not None and isinstance(u, np.ndarray):
+            return -mean * np.log1p(-u)
+        log1p = math.log1p
+        return [-mean * log1p(-x) for x in u]
+
+
+class Deterministic(Distribution):
+    """Every value is exactly the mean."""
+
+    name = "det"
+
+    def transform(self, u, mean):
+        if np is not None and isinstance(u, np.ndarray):
+            return np.full(len(u), float(mean))
+        return [float(mean)] * len(u)
+
+
+class Lognormal(Distribution):
+    """exp(m + s*Z), s^2 = log(1 + cv^2), m picked so the mean comes out right."""
+
+    name = "lognormal"
+
+    def __init__(self, cv=1.0):
+        super().__init__()
+        if cv <= 0:
+            raise ValueError("lognormal needs cv > 0 (use det for cv = 0)")
+        self.params["cv"] = cv
+        self.sigma = math.sqrt(math.log1p(cv * cv))
+
+    def transform(self, u, mean):
+        sigma = self.sigma
+        m = math.log(mean) - sigma * sigma / 2.0
+        if np is not None and isinstance(u, np.ndarray):
+            return np.exp(m + sigma * _normal_ppf(u))
+        inv_cdf = NormalDist().inv_cdf
+        exp = math.exp
+        return [exp(m + sigma * inv_cdf(x if x > U_MIN else U_MIN)) for x in u]
+
+
+class Pareto(Distribution):
+    """Classic Pareto, x = xm * (1-u)^(-1/alpha), xm = mean * (alpha-1)/alpha."""
+
+    name = "pareto"
+
+    def __init__(self, alpha=2.5):
+        super().__init__()
+        if alpha <= 1:
+            raise ValueError("pareto needs alpha > 1 (the mean is infinite otherwise)")
+        self.params["alpha"] = alpha
+
+    def transform(self, u, mean):
+        alpha = self.params["alpha"]
+        xm = mean * (alpha - 1.0) / alpha
+        k = -1.0 / alpha
+        if np is not None and isinstance(u, np.ndarray):
+            return xm * (1.0 - u) ** k
+        return [xm * (1.0 - x) ** k for x in u]
+
+
+class HyperExponential(Distribution):
+    """
+    Two exponential phases with balanced means (p1/mu1 = p2/mu2), picked
+    with probability p1 / 1-p1. One uniform per value: u < p1 picks phase 1
+    and u/p1 is again uniform, so it's an exact inverse-CDF-style transform.
+    """
+
+    name = "hyperexp"
+
+    def __init__(self, cv=2.0):
+        super().__init__()
+        if cv < 1:
+            raise ValueError("hyperexp needs cv >= 1 (cv = 1 is just exp)")
+        self.params["cv"] = cv
+        c2 = cv * cv
+        self.p1 = (1.0 + math.sqrt((c2 - 1.0) / (c2 + 1.0))) / 2.0
+
+    def transform(self, u, mean):
+        p1 = self.p1
+        p2 = 1.0 - p1
+        # phase means (balanced: each phase carries half of the mean)
+        m1 = mean / (2.0 * p1)
+        m2 = mean / (2.0 * p2)
+        if np is not None and isinstance(u, np.ndarray):
+            first = u < p1
+            v = np.where(first, u / p1, (u - p1) / p2)
+            return np.where(first, m1, m2) * -np.log1p(-np.minimum(v, 1.0 - U_MIN))
+        log1p = math.log1p
+        out = []
+        for x in u:
+            if x < p1:
+                out.append(-m1 * log1p(-x / p1))
+            else:
+                out.append(-m2 * log1p(-min((x - p1) / p2, 1.0 - U_MIN)))
+        return out
+
+
+class Empirical(Distribution):
+    """
+    Piecewise-linear inverse CDF through points (F_i, x_i) read from a file,
+    scaled so its mean matches the requested one.
+
+    Params:
+        path: one value per line (samples: sorted, F_i = i/(n-1)) or
+              "value,cumulative_probability" per line (a CDF, F from 0 to 1).
+              blank lines and # comments are skipped, a non-numeric first
+              line is taken as a header.
+    """
+
+    name = "empirical"
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        xs, ps = _read_cdf(path)
+        self.xs = xs
+        self.ps = ps
+        with open(path, "rb") as f:
+            self.crc = zlib.crc32(f.read())
+        # mean of the piecewise-linear distribution (u below F_0 / above
+        # F_n-1 clamps to the end values)
+        base = ps[0] * xs[0] + (1.0 - ps[-1]) * xs[-1]
+        for i in range(len(xs) - 1):
+            base += (ps[i + 1] - ps[i]) * (xs[i] + xs[i + 1]) / 2.0
+        if base <= 0:
+            raise ValueError(f"{path}: the distribution's mean has to be > 0")
+        self.base_mean = base
+        if np is not None:
+            self.xs_arr = np.array(xs)
+            self.ps_arr = np.array(ps)
+
+    def describe(self):
+        # the crc makes an edited file count as a different distribution
+        # (result cache keys, CSV)
+        return f"empirical:{self.path}@{self.crc:08x}"
+
+    def transform(self, u, mean):
+        scale = mean / self.base_mean
+        if np is not None and isinstance(u, np.ndarray):
+            return np.interp(u, self.ps_arr, self.xs_arr) * scale
+        xs, ps = self.xs, self.ps
+        last = len(xs) - 1
+        out = []
+        for x in u:
+            i = bisect.bisect_right(ps, x)
+            if i == 0:
+                out.append(xs[0] * scale)
+            elif i > last:
+                out.append(xs[last] * scale)
+            else:
+                f = (x - ps[i - 1]) / (ps[i] - ps[i - 1])
+                out.append((xs[i - 1] + f * (xs[i] - xs[i - 1])) * scale)
+        return out
+
+
+# what Empirical.describe() puts after the path
+CRC_SUFFIX = re.compile(r"@[0-9a-f]{8}$")
+
+DISTRIBUTIONS = {cls.name: cls for cls in
+                 (Exponential, Deterministic, Lognormal, Pareto, HyperExponential, Empirical)}
+
+
+def parse_spec(spec):
+    """
+    Spec string -> Distribution (a Distribution passes straight through).
+    Raises ValueError for unknown names / bad params, OSError for a missing
+    empirical file.
+    """
+    if isinstance(spec, Distribution):
+        return spec
+    name, _, rest = spec.strip().partition(":")
+    if name not in DISTRIBUTIONS:
+        raise ValueError(f"unknown distribution {name!r}, pick one of {', '.join(DISTRIBUTIONS)}")
+    if name == "empirical":
+        if not rest:
+            raise ValueError("empirical needs a file: empirical:PATH")
+        # drop the @crc describe() adds (paths can have @ in them too)
+        if CRC_SUFFIX.search(rest) and not os.path.exists(rest):
+            rest = rest[:-9]
+        return Empirical(rest)
+    kwargs = {}
+    for item in filter(None, rest.split(",")):
+        key, eq, value = item.partition("=")
+        if not eq:
+            raise ValueError(f"bad distribution parameter {item!r} in {spec!r} (use key=value)")
+        try:
+            kwargs[key.strip()] = float(value)
+        except ValueError:
+            raise ValueError(f"bad value for {key} in {spec!r}") from None
+    try:
+        return DISTRIBUTIONS[name](**kwargs)
+    except TypeError:
+        raise ValueError(f"{name} doesn't take {', '.join(kwargs)}") from None
+
+
+def is_exponential(spec):
+    """True for the plain exponential (the only case with closed forms / bit-identical streams)."""
+    return isinstance(parse_spec(spec), Exponential)
+
+
+def _read_cdf(path):
+    """(xs, ps) of the inverse CDF described by an empirical file (see Empirical)."""
+    rows = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            fields = line.replace(",", " ").split()
+            try:
+                rows.append([float(x) for x in fields[:2]])
+            except ValueError:
+                if rows:
+                    raise ValueError(f"{path}: can't parse line {line!r}") from None
+                # header
+    if not rows:
+        raise ValueError(f"{path} has no values in it")
+
+    if len(rows[0]) == 1:
+        xs = sorted(r[0] for r in rows)
+        if xs[0] < 0:
+            raise ValueError(f"{path}: times can't be negative")
+        n = len(xs)
+        if n == 1:
+            return xs, [1.0]
+        return xs, [i / (n - 1) for i in range(n)]
+
+    xs = [r[0] for r in rows]
+    ps = [r[1] for r in rows]
+    if xs[0] < 0:
+        raise ValueError(f"{path}: times can't be negative")
+    if any(b < a for a, b in zip(xs, xs[1:])) or any(b < a for a, b in zip(ps, ps[1:])):
+        raise ValueError(f"{path}: values and probabilities have to be increasing")
+    if ps[0] < 0 or ps[-1] > 1:
+        raise ValueError(f"{path}: cumulative probabilities have to be within [0, 1]")
+    # drop flat steps (interp / bisect need strictly increasing F)
+    keep_x, keep_p = [xs[0]], [ps[0]]
+    for x, p in zip(xs[1:], ps[1:]):
+        if p > keep_p[-1]:
+            keep_x.append(x)
+            keep_p.append(p)
+    return keep_x, keep_p
+
+
+def _normal_ppf(u):
+    """
+    Vectorized inverse normal CDF, for the lognormal with numpy: the same
+    Acklam pieces as simstats.normal_quantile (~1e-9 relative error), with
+    the branch done by masks instead of ifs.
+    """
+    u = np.clip(u, U_MIN, 1.0 - U_MIN)
+    out = np.empty_like(u)
+
+    mid = np.abs(u - 0.5) <= 0.5 - ACKLAM_LOW
+    out[mid] = acklam_central(u[mid] - 0.5)
+
+    tail = ~mid
+    lower = u[tail] < 0.5
+    p = np.where(lower, u[tail], 1.0 - u[tail])
+    z = acklam_tail(np.sqrt(-2.0 * np.log(p)))
+    out[tail] = np.where(lower, z, -z)
+    return out
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Event list backends for hw5.simulate().
+
+Events used to be 4-tuples (t, kind, seq, data) pushed on a heapq list.
+Now an event is a compact 3-field record
+
+    (t, key, data)     key = kind << KIND_SHIFT | seq
+
+so it sorts exactly like before (time, then kind, then seq - same results
+bit for bit) with one field and one tuple slot less per pending event.
+make_key() / key_kind() pack and unpack it.
+
+Backends (same push(ev) / pop() / len() interface):
+  heap      - binary heap (heapq), O(log n) per op. push/pop are bound
+              straight to the C heapq functions, so there's no Python-level
+              wrapper in the hot loop.
+  calendar  - calendar queue (R. Brown, 1988): a ring of buckets ("days")
+              of width w, each a small sorted list. push hashes the time to
+              its bucket, pop walks forward from the current day. With w
+              matched to the event spacing that's O(1) amortized no matter
+              how many events are pending. It resizes itself (doubles /
+              halves the buckets and re-estimates w from the next few
+              events) whenever the count leaves [nbuckets/2, 2*nbuckets].
+
+Which one wins depends on how many events are pending (~ busy CPUs + 1):
+`python3 benchmarks.py eventlist` measures it for given CPU counts / loads.
+In CPython heapq is C code while the calendar queue is Python, so the heap
+usually stays ahead until around a million pending events.
+"""
+
+import heapq
+from bisect import insort
+from functools import partial
+
+
+KIND_SHIFT = 58           # room for 2^58 sequence numbers
+SEQ_MASK = (1 << KIND_SHIFT) - 1
+
+EVENT_LISTS = ("heap", "calendar")
+
+
+def make_key(kind, seq):
+    """Packs an event kind + sequence number into one sortable int."""
+    return kind << KIND_SHIFT | seq
+
+
+def key_kind(key):
+    """Event kind back out of a packed key."""
+    return key >> KIND_SHIFT
+
+
+class HeapEventList:
+    """Binary heap (the original event list)."""
+
+    name = "heap"
+
+    def __init__(self):
+        self.heap = []
+        # C-level callables, no Python frame per push/pop
+        self.push = partial(heapq.heappush, self.heap)
+        self.pop = partial(heapq.heappop, self.heap)
+
+    def __len__(self):
+        return len(self.heap)
+
+
+class CalendarQueue:
+    """
+    Self-resizing calendar queue (see module docstring).
+
+    Event times must never go backwards past the last popped event (true
+    for a simulation: nothing gets scheduled in the past).
+    """
+
+    name = "calendar"
+
+    def __init__(self, nbuckets=2, width=1.0):
+        self.size = 0
+        self.resizes = 0
+        self._setup(nbuckets, width, 0.0)
+
+    def _setup(self, nbuckets, width, start):
+        self.nbuckets = nbuckets
+        self.mask = nbuckets - 1
+        self.width = width
+        self.inv_width = 1.0 / width
+        self.buckets = [[] for _ in range(nbuckets)]
+        self.day = int(start * self.inv_width)     # absolute index of the current day
+        self.grow_at = 2 * nbuckets
+        self.shrink_at = nbuckets // 2 - 2 if nbuckets > 2 else -1
+
+    def push(self, ev):
+        b = self.buckets[int(ev[0] * self.inv_width) & self.mask]
+        if not b or ev >= b[-1]:
+            b.append(ev)          # usual case: later than everything in there
+        else:
+            insort(b, ev)
+        self.size += 1
+        if self.size > self.grow_at:
+            self._resize(2 * self.nbuckets)
+
+    def pop(self):
+        if self.size == 0:
+            raise IndexError("pop from an empty calendar queue")
+
+        buckets = self.buckets
+        mask = self.mask
+        inv_width = self.inv_width
+        day = self.day
+        # walk at most one "year" of days looking for an event due today
+        for _ in range(self.nbuckets):
+            b = buckets[day & mask]
+            if b and int(b[0][0] * inv_width) <= day:
+                break
+            day += 1
+        else:
+            # nothing in the next year -> jump straight to the earliest event
+            b = min((b for b in buckets if b), key=lambda b: b[0])
+            day = int(b[0][0] * inv_width)
+
+        self.day = day
+        ev = b.pop(0)             # buckets hold ~1-2 events, so this is cheap
+        self.size -= 1
+        if self.size < self.shrink_at:
+            self._resize(self.nbuckets // 2)
+        return ev
+
+    def _resize(self, nbuckets):
+        """Rebuilds with nbuckets buckets and a fresh width estimate."""
+        events = [ev for b in self.buckets for ev in b]
+        width = self._estimate_width(events)
+        start = self.day * self.width
+        self._setup(nbuckets, width, start)
+        self.resizes += 1
+        buckets = self.buckets
+        mask = self.mask
+        inv_width = self.inv_width
+        for ev in events:
+            buckets[int(ev[0] * inv_width) & mask].append(ev)
+        for b in buckets:
+            if len(b) > 1:
+                b.sort()          # a handful each, keeps the rebuild ~O(n)
+
+    def _estimate_width(self, events):
+        """
+        Brown's rule: 3x the average gap between the next few events, after
+        throwing out gaps way above average (a lone far-future event would
+        otherwise blow the width up).
+        """
+        nxt = heapq.nsmallest(25, events)
+        gaps = [b[0] - a[0] for a, b in zip(nxt, nxt[1:])]
+        if not gaps:
+            return self.width
+        avg = sum(gaps) / len(gaps)
+        small = [g for g in gaps if g <= 2.0 * avg]
+        if small:
+            avg = sum(small) / len(small)
+        return 3.0 * avg if avg > 0.0 else self.width
+
+    def __len__(self):
+        return self.size
+
+
+def make_event_list(name):
+    """Empty event list for the backend name ("heap" or "calendar")."""
+    if name == "heap":
+        return HeapEventList()
+    if name == "calendar":
+        return CalendarQueue()
+    raise ValueError(f"unknown event list {name!r}, pick one of {', '.join(EVENT_LISTS)}")
@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""
+Fast (vectorized) engines for the HW5 multi-CPU simulator.
+
+The event loop in hw5.py handles every arrival/departure one at a time. For
+plain FCFS queues we don't actually need that:
+
+  Scenario 1: once the random CPU for each job is drawn, every per-CPU queue
+  is just an independent single-server FCFS queue, so finish times follow
+  the Lindley recursion f_n = max(a_n, f_{n-1}) + s_n. Unrolled it becomes a
+  cumulative max, which numpy can do for a whole block of jobs at once.
+
+  Scenario 2: one FCFS queue feeding c CPUs is the Kiefer-Wolfowitz
+  recursion: keep each server's "free at" time, and the next job in line
+  starts at max(arrival, earliest free time) on that server. That's a single
+  heapreplace per job instead of heap events + shuffling every CPU.
+
+These engines return the exact same stats dict as hw5.simulate(), so the
+sweep/plot scripts don't care which one produced a row. They pull from the
+same variates.py streams as the event engine, so a given seed simulates the
+same jobs: turnarounds agree up to float rounding (scenario 2 may put a job
+on a different idle CPU, which changes per-CPU utilization but not waits).
+
+numpy is optional for the rest of the project; only these engines need it.
+"""
+
+import heapq
+
+from histogram import LogHistogram
+from simstats import BatchMeans, MSERWarmup, default_stats
+from distributions import parse_spec
+from variates import simulation_streams
+
+try:
+    import numpy as np
+except ImportError:  # the event engine still works without numpy
+    np = None
+
+
+# jobs generated per block (caps memory no matter how long the run is)
+MAX_BLOCK = 1 << 20
+
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("engine='numpy' needs numpy installed (pip3 install --user numpy)")
+
+
+# precision mode checks the CI once per block, so keep blocks small there
+PRECISION_BLOCK = 1 << 16
+
+
+def _block_size(target_completions, rel_precision=None):
+    """Roughly one block for short runs, MAX_BLOCK sized chunks for long ones."""
+    size = min(MAX_BLOCK, max(4096, target_completions + target_completions // 4))
+    if rel_precision is not None:
+        size = min(size, PRECISION_BLOCK)
+    return int(size)
+
+
+class _BlockStats:
+    """
+    Turns blocks of (arrival, start, finish, service, cpu) arrays into the
+    usual simulate() metrics.
+
+    A job is "resolved" once its finish time is <= the last arrival generated
+    so far: nothing generated later can finish before it. The run ends at the
+    target_completions-th finish time T (or earlier, once the batch-means CI
+    is tight enough in rel_precision mode), and just like the event engine:
+      - a CPU's busy time counts a job's whole service as soon as it starts
+      - queue-length area counts each job's wait, cut off at T
+    Unresolved jobs (still in the system) get carried into the next block.
+
+    With warmup="mser" the resolved departures also go through MSER-5; once
+    it decides, everything is reset and measured from that departure's time
+    t0 on (busy time and waits get clipped at t0), same as the event engine.
+    """
+
+    def __init__(self, num_cpus, target_completions, per_cpu_queues,
+                 rel_precision=None, confidence=0.95, warmup=None, policy="global",
+                 dists=("exp", "exp")):
+        self.num_cpus = num_cpus
+        self.policy = policy
+        self.dists = dists       # (interarrival, service) spec strings for the stats
+        self.target = target_completions
+        self.rel_precision = rel_precision
+        self.confidence = confidence
+        self.per_cpu_queues = per_cpu_queues
+        self.arrivals = 0
+        self.pending = None
+        self.end_time = None
+        self.peak_resident = 0   # most job records held at once (pending + block)
+
+        self.mser = MSERWarmup.for_run(target_completions) if warmup == "mser" else None
+        self.mser_truncation = 0
+        self.warmup_jobs = 0
+        self._reset(0.0)
+
+    def _reset(self, t0):
+        """(Re)start every accumulator, measuring from time t0."""
+        self.t0 = t0
+        self.completed = 0
+        self.sum_turnaround = 0.0
+        self.hist = LogHistogram()
+        self.batch_means = BatchMeans()
+        self.rq_area = 0.0
+        # queue area per CPU, only for scenario 1 (None like the event engine)
+        self.rq_area_cpu = np.zeros(self.num_cpus) if self.per_cpu_queues else None
+        self.busy = np.zeros(self.num_cpus)
+
+    def add_block(self, arr, start, fin, svc, cpu, horizon):
+        """
+        Feed one block of jobs in. horizon = last arrival time generated.
+
+        Returns True once the run is over (stats are final).
+        """
+        if self.pending is not None:
+            p_arr, p_start, p_fin, p_svc, p_cpu = self.pending
+            arr = np.concatenate((p_arr, arr))
+            start = np.concatenate((p_start, start))
+            fin = np.concatenate((p_fin, fin))
+            svc = np.concatenate((p_svc, svc))
+            cpu = np.concatenate((p_cpu, cpu))
+        self.peak_resident = max(self.peak_resident, len(arr))
+
+        done = fin <= horizon
+
+        if self.mser is not None:
+            self._watch_warmup(arr[done], fin[done])
+            if self.t0 > 0.0:
+                # jobs that left during warm-up: count the events, drop the jobs
+                keep = fin > self.t0
+                self.arrivals += int(np.count_nonzero(~keep))
+                arr, start, fin, svc, cpu = arr[keep], start[keep], fin[keep], svc[keep], cpu[keep]
+                done = done[keep]
+
+        jobs = (arr, start, fin, svc, cpu)
+        n_done = int(np.count_nonzero(done))
+
+        if self.completed + n_done >= self.target:
+            # the k earliest finishers are the last completions we count
+            k = self.target - self.completed
+            done = np.zeros(len(fin), dtype=bool)
+            done[np.argpartition(fin, k - 1)[:k]] = True
+            self._complete(done, *jobs)
+            self._close(float(fin[done].max()), ~done, *jobs)
+            return True
+
+        self._complete(done, *jobs)
+
+        # precision mode: stop at the last resolved departure (not mid warm-up)
+        if (self.rel_precision is not None and self.mser is None and n_done > 0 and
+                self.batch_means.precise_enough(self.rel_precision, self.confidence)):
+            self._close(float(fin[done].max()), ~done, *jobs)
+            return True
+
+        left = ~done
+        self.pending = (arr[left], start[left], fin[left], svc[left], cpu[left])
+        return False
+
+    def _watch_warmup(self, arr, fin):
+        """Feeds departures (in order) to MSER until it decides."""
+        order = np.argsort(fin, kind='stable')
+        turnaround = (fin - arr)[order]
+        add = self.mser.add
+        for i, x in enumerate(turnaround.tolist()):
+            if add(x):
+                self.mser_truncation = self.mser.truncation
+                self.mser = None
+                if self.mser_truncation:
+                    self.warmup_jobs = self.completed + i + 1
+                    self._reset(float(fin[order[i]]))
+                return
+
+    def _complete(self, mask, arr, start, fin, svc, cpu):
+        """Jobs that departed before the end - everything about them counts."""
+        t0 = self.t0
+        a = arr[mask]
+        f = fin[mask]
+        n = len(f)
+        self.completed += n
+        self.arrivals += n
+
+        turnaround = f - a
+        self.sum_turnaround += float(np.sum(turnaround))
+        self.hist.record_many(turnaround)
+        # batch means want departure order, same as the event engine
+        self.batch_means.add_many(turnaround[np.argsort(f, kind='stable')])
+
+        waited = np.maximum(start[mask] - np.maximum(a, t0), 0.0)
+        self.rq_area += float(np.sum(waited))
+        if self.rq_area_cpu is not None:
+            self.rq_area_cpu += np.bincount(cpu[mask], weights=waited, minlength=self.num_cpus)
+        busy = f - np.maximum(start[mask], t0)
+        self.busy += np.bincount(cpu[mask], weights=busy, minlength=self.num_cpus)
+
+    def _close(self, end, mask, arr, start, fin, svc, cpu):
+        """Jobs still in the system at the end time (or arriving after it)."""
+        t0 = self.t0
+        arr, start, fin, cpu = arr[mask], start[mask], fin[mask], cpu[mask]
+        self.arrivals += int(np.count_nonzero(arr <= end))
+
+        # whole service is booked at start (minus anything before t0)
+        started = start <= end
+        busy = fin[started] - np.maximum(start[started], t0)
+        self.busy += np.bincount(cpu[started], weights=busy, minlength=self.num_cpus)
+
+        # waiting time between t0 and the end (0 if it arrived after)
+        waited = np.maximum(np.minimum(start, end) - np.maximum(arr, t0), 0.0)
+        self.rq_area += float(np.sum(waited))
+        if self.rq_area_cpu is not None:
+            self.rq_area_cpu += np.bincount(cpu, weights=waited, minlength=self.num_cpus)
+
+        self.pending = None
+        self.end_time = end
+        if self.mser is not None:
+            self.mser_truncation = None   # ran out of jobs before MSER settled
+
+    def result(self):
+        """Same dict layout as hw5.simulate()."""
+        t = self.end_time - self.t0
+        completed = self.completed
+        stats = default_stats(self.num_cpus)
+        stats.update({
+            "completed": completed,
+            "time": t,
+            "avg_turnaround": self.sum_turnaround / completed if completed > 0 else float('nan'),
+            "throughput": completed / t if t > 0 else 0.0,
+            "cpu_utils": [float(b) / t if t > 0 else 0.0 for b in self.busy],
+            "avg_ready_q": self.rq_area / t if t > 0 else 0.0,
+            "avg_ready_q_per_cpu": (None if self.rq_area_cpu is None else
+                                    [float(a) / t if t > 0 else 0.0 for a in self.rq_area_cpu]),
+            # what the event engine would have popped: arrivals + departures
+            "events": self.arrivals + self.warmup_jobs + completed,
+            "policy": self.policy,
+            "interarrival_dist": self.dists[0],
+            "service_dist": self.dists[1],
+            "peak_resident_jobs": self.peak_resident,
+            "turnaround_hist": self.hist.to_string(),
+            "warmup_time": self.t0,
+            "warmup_jobs": self.warmup_jobs,
+            "mser_truncation": self.mser_truncation,
+        })
+        stats.update(self.hist.percentiles())
+        stats.update(self.batch_means.summary(self.confidence))
+        return stats
+
+
+def _lindley_per_cpu(arr, svc, cpu, last_free):
+    """
+    (start, finish) times for one block of jobs routed to per-CPU FCFS queues.
+
+    For each CPU (jobs in arrival order, sc = running sum of service):
+        f_n = sc_n + max(last_free, max_{k<=n}(a_k - sc_{k-1}))
+    which is the Lindley recursion written as a cumulative max. Starts are
+    max(a_n, f_{n-1}) rather than f_n - s_n, so a job that starts when the
+    one before it leaves starts at exactly that departure time (f_n - s_n
+    can be an ulp off, and the end-of-run bookkeeping compares the two).
+    last_free[c] is updated in place so the next block continues from it.
+    """
+    order = np.argsort(cpu, kind='stable')   # group by CPU, keep arrival order
+    a = arr[order]
+    s = svc[order]
+    fin = np.empty_like(a)
+    start = np.empty_like(a)
+
+    counts = np.bincount(cpu, minlength=len(last_free))
+    bounds = np.concatenate(([0], np.cumsum(counts)))
+
+    for c in np.flatnonzero(counts):
+        lo, hi = bounds[c], bounds[c + 1]
+        sc = np.cumsum(s[lo:hi])
+        d = a[lo:hi] - (sc - s[lo:hi])
+        np.maximum.accumulate(d, out=d)
+        np.maximum(d, last_free[c], out=d)
+        fin[lo:hi] = sc + d
+        start[lo] = max(a[lo], last_free[c])
+        np.maximum(a[lo + 1:hi], fin[lo:hi - 1], out=start[lo + 1:hi])
+        last_free[c] = fin[hi - 1]
+
+    out_start = np.empty_like(start)
+    out_start[order] = start
+    out_fin = np.empty_like(fin)
+    out_fin[order] = fin
+    return out_start, out_fin
+
+
+def _arrival_times(t0, inter):
+    """
+    Arrival times t0 + running sum of the interarrivals, added up in the same
+    order as the event loop does (t0 + x1, then + x2, ...) so both engines
+    get bit-identical arrival times from the same stream.
+    """
+    return np.cumsum(np.concatenate(([t0], inter)))[1:]
+
+
+def _pick_indexes(u, n):
+    """Uniforms -> ints in [0, n), same rule as VariateStream.index()."""
+    return np.minimum((u * n).astype(np.intp), n - 1)
+
+
+def simulate_per_cpu_numpy(lmbda, avg_service, num_cpus, target_completions=10_000, seed=1,
+                           rel_precision=None, confidence=0.95, warmup=None,
+                           antithetic=False, policy="random", interarrival="exp",
+                           service="exp"):
+    """
+    Scenario 1 (per-CPU queues, random routing) via vectorized Lindley.
+
+    Same params/return as hw5.simulate(..., scenario=1). Lindley needs the
+    routing to be known up front, so only the policies that don't look at
+    the queues work here: "random" and "rr".
+    """
+    _require_numpy()
+    if policy not in ("random", "rr"):
+        raise ValueError(f"engine='numpy' only supports the random and rr policies, "
+                         f"not {policy!r} (use the event engine)")
+    interarrival, service = parse_spec(interarrival), parse_spec(service)
+    streams = simulation_streams(seed, lmbda, avg_service, antithetic, interarrival, service)
+    block = _block_size(target_completions, rel_precision)
+
+    stats = _BlockStats(num_cpus, target_completions, per_cpu_queues=True,
+                        rel_precision=rel_precision, confidence=confidence,
+                        warmup=warmup, policy=policy,
+                        dists=(interarrival.describe(), service.describe()))
+    last_free = np.zeros(num_cpus)
+    t0 = 0.0
+    routed = 0
+
+    while True:
+        arr = _arrival_times(t0, streams["arrivals"].take(block))
+        svc = streams["service"].take(block)
+        if policy == "rr":
+            cpu = (np.arange(routed, routed + block) % num_cpus).astype(np.intp)
+        else:
+            cpu = _pick_indexes(streams["routing"].take(block), num_cpus)
+        routed += block
+
+        start, fin = _lindley_per_cpu(arr, svc, cpu, last_free)
+        t0 = float(arr[-1])
+
+        if stats.add_block(arr, start, fin, svc, cpu, horizon=t0):
+            return stats.result()
+
+
+def _kiefer_wolfowitz(arr, svc, free):
+    """
+    Start times + CPU ids for one block of jobs in a global FCFS queue.
+
+    free is a heap of (free_at, cpu) - the workload vector, kept sorted by
+    the heap. Each job takes whichever server frees up first. If several are
+    already idle, it gets the one that has been idle the longest (any idle
+    pick gives the same waiting times). Updated in place across blocks.
+    """
+    heapreplace = heapq.heapreplace
+    starts = []
+    cpus = []
+    add_start = starts.append
+    add_cpu = cpus.append
+
+    for a, s in zip(arr.tolist(), svc.tolist()):
+        f, c = free[0]
+        st = a if a > f else f
+        heapreplace(free, (st + s, c))
+        add_start(st)
+        add_cpu(c)
+
+    return np.array(starts), np.array(cpus, dtype=np.intp)
+
+
+def simulate_global_kw(lmbda, avg_service, num_cpus, target_completions=10_000, seed=1,
+                       rel_precision=None, confidence=0.95, warmup=None,
+                       antithetic=False, interarrival="exp", service="exp"):
+    """
+    Scenario 2 (one shared FCFS queue) via the Kiefer-Wolfowitz recursion.
+
+    Same params/return as hw5.simulate(..., scenario=2). No event list at all,
+    queue-length area and busy time come straight from start/finish times.
+    """
+    _require_numpy()
+    interarrival, service = parse_spec(interarrival), parse_spec(service)
+    streams = simulation_streams(seed, lmbda, avg_service, antithetic, interarrival, service)
+    block = _block_size(target_completions, rel_precision)
+
+    stats = _BlockStats(num_cpus, target_completions, per_cpu_queues=False,
+                        rel_precision=rel_precision, confidence=confidence,
+                        warmup=warmup, dists=(interarrival.describe(), service.describe()))
+    free = [(0.0, c) for c in range(num_cpus)]   # already a valid heap
+    t0 = 0.0
+
+    while True:
+        arr = _arrival_times(t0, streams["arrivals"].take(block))
+        svc = streams["service"].take(block)
+
+        start, cpu = _kiefer_wolfowitz(arr, svc, free)
+        fin = start + svc
+        t0 = float(arr[-1])
+
+        if stats.add_block(arr, start, fin, svc, cpu, horizon=t0):
+            return stats.result()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Log-bucketed (HDR-style) histogram for turnaround times.
+
+simulate() only used to keep sum_turnaround, which gives the mean and
+nothing about the tail. This keeps a fixed-size count array instead:
+
+  - every power of two [2^e, 2^(e+1)) is split into SUB_BUCKETS linear
+    buckets, so any value lands in a bucket at most 1/SUB_BUCKETS wide
+    relative to the value (< 0.8% with 128 sub-buckets)
+  - memory is constant (~10k counters) no matter how many jobs you record
+  - recording is one frexp + one list increment
+  - two histograms with the same layout merge by adding counts, so
+    replications (or CPUs) can be combined after the fact
+
+Values <= 0 go to a separate zero bucket; anything outside
+[2^MIN_EXP, 2^MAX_EXP) gets clamped into the first/last bucket.
+"""
+
+import math
+
+try:
+    import numpy as np
+except ImportError:  # record_many() just loops without numpy
+    np = None
+
+
+SUB_BUCKETS = 128
+MIN_EXP = -40        # 2^-40 s ~ 1e-12 s
+MAX_EXP = 40         # 2^40 s ~ 35,000 years, plenty
+NUM_BUCKETS = (MAX_EXP - MIN_EXP) * SUB_BUCKETS
+
+# percentiles reported by simulate(): key suffix -> quantile
+PERCENTILES = {"p50": 0.50, "p95": 0.95, "p99": 0.99, "p999": 0.999}
+
+
+def bucket_bounds(i):
+    """[low, high) value range covered by bucket i."""
+    e, sub = divmod(i, SUB_BUCKETS)
+    scale = math.ldexp(1.0, e + MIN_EXP - 1)      # 2^(exp-1), frexp mantissa is in [0.5, 1)
+    low = (1.0 + sub / SUB_BUCKETS) * scale
+    high = (1.0 + (sub + 1) / SUB_BUCKETS) * scale
+    return low, high
+
+
+class LogHistogram:
+    """
+    Fixed-memory histogram with log-spaced buckets (see module docstring).
+
+    Usage:
+        h = LogHistogram()
+        h.record(0.031)
+        h.quantile(0.99)
+        h.merge(other)
+        LogHistogram.from_string(h.to_string())
+    """
+
+    def __init__(self):
+        self.counts = [0] * NUM_BUCKETS
+        self.zero_count = 0
+        self.total = 0
+
+    def record(self, x):
+        """Adds one value. Called once per departure, so keep it cheap."""
+        self.total += 1
+        if x > 0.0:
+            m, e = math.frexp(x)
+            i = (e - MIN_EXP) * SUB_BUCKETS + int((m - 0.5) * (2 * SUB_BUCKETS))
+            if i < 0:
+                i = 0
+            elif i >= NUM_BUCKETS:
+                i = NUM_BUCKETS - 1
+            self.counts[i] += 1
+        else:
+            self.zero_count += 1
+
+    def record_many(self, values):
+        """Adds a whole array of values at once (vectorized if numpy is around)."""
+        if np is None:
+            for x in values:
+                self.record(x)
+            return
+
+        values = np.asarray(values, dtype=float)
+        self.total += len(values)
+        pos = values[values > 0.0]
+        self.zero_count += len(values) - len(pos)
+        if len(pos) == 0:
+            return
+
+        m, e = np.frexp(pos)
+        idx = (e.astype(np.int64) - MIN_EXP) * SUB_BUCKETS + ((m - 0.5) * (2 * SUB_BUCKETS)).astype(np.int64)
+        np.clip(idx, 0, NUM_BUCKETS - 1, out=idx)
+        add = np.bincount(idx, minlength=NUM_BUCKETS)
+        for i in np.flatnonzero(add):
+            self.counts[i] += int(add[i])
+
+    def merge(self, other):
+        """Adds another histogram's counts into this one. Returns self."""
+        counts = self.counts
+        for i, c in enumerate(other.counts):
+            if c:
+                counts[i] += c
+        self.zero_count += other.zero_count
+        self.total += other.total
+        return self
+
+    def quantile(self, q):
+        """
+        Value at quantile q (0..1), reported as the middle of its bucket.
+
+        Returns nan for an empty histogram.
+        """
+        if self.total == 0:
+            return float('nan')
+
+        rank = max(1, math.ceil(q * self.total))   # 1-based rank we're after
+        seen = self.zero_count
+        if seen >= rank:
+            return 0.0
+
+        for i, c in enumerate(self.counts):
+            if c:
+                seen += c
+                if seen >= rank:
+                    low, high = bucket_bounds(i)
+                    return 0.5 * (low + high)
+
+        return bucket_bounds(NUM_BUCKETS - 1)[1]   # only hit via float rounding
+
+    def percentiles(self, prefix="turnaround_"):
+        """Dict like {"turnaround_p50": ..., "turnaround_p99": ...}."""
+        return {prefix + name: self.quantile(q) for name, q in PERCENTILES.items()}
+
+    def to_string(self):
+        """
+        Compact text form for stats dicts / CSV cells.
+
+        Format: "z<zero_count>;<bucket>:<count>,<bucket>:<count>,..." with only
+        the non-empty buckets listed.
+        """
+        pairs = ",".join(f"{i}:{c}" for i, c in enumerate(self.counts) if c)
+        return f"z{self.zero_count};{pairs}"
+
+    @classmethod
+    def from_string(cls, text):
+        """Inverse of to_string()."""
+        h = cls()
+        zero_part, _, pairs = text.partition(";")
+        h.zero_count = int(zero_part[1:])
+        h.total = h.zero_count
+        if pairs:
+            for item in pairs.split(","):
+                i, c = item.split(":")
+                h.counts[int(i)] = int(c)
+                h.total += int(c)
+        return h
+
+
+def merge_strings(texts):
+    """Merges serialized histograms (e.g. one CSV column across replications)."""
+    merged = LogHistogram()
+    for text in texts:
+        merged.merge(LogHistogram.from_string(text))
+    return merged
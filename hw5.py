@@ -10,20 +10,73 @@ I made two different “setups” basically:
 
 Arrival + service times are both exponential (Poisson arrivals). It keeps going
 until 10,000 jobs finish. Probably could tune this but whatever.
+(Other shapes - lognormal, pareto, hyperexp, det, empirical - via
+interarrival= / service=, see distributions.py.)
+
+For big runs there's also engine="numpy" (see fast_engines.py), which skips
+the event loop: Lindley recursion for scenario 1, Kiefer-Wolfowitz for 2.
+And engine="analytic" (analytic.py) skips simulating altogether and uses the
+M/M/1 / M/M/c formulas, for the cases that have them.
 """
 
 import sys
+import argparse
 import math
-import random
 import heapq
-from collections import deque
+import os
+import time
+
+from histogram import LogHistogram
+from simstats import BatchMeans, MSERWarmup, default_stats
+from variates import simulation_streams
+from dispatch import make_dispatcher, make_victim_picker
+from disciplines import DISCIPLINES, PREEMPTIVE, TIME_SLICED, make_queue, needs_mutable_jobs
+from eventlist import EVENT_LISTS, KIND_SHIFT, make_event_list, make_key
+from timeseries import TimeSeriesSampler, write_csv
+from checkpoint import load_checkpoint, read_params, save_checkpoint
+from distributions import Exponential, parse_spec
 
 # event type “constants” (helps keep track)
 ARR = 0   # job shows up
 DEP = 1   # job finishing / departing
+SLICE = 2 # round robin: running job used up its quantum
+
+# "event" = the discrete-event loop below, "numpy" = fast_engines.py
+ENGINES = ("event", "numpy", "analytic")
+
+# simulate() locals that make up the whole simulator state between two events
+# (what a checkpoint saves, see checkpoint.py). names that don't exist in a
+# given run (q_area in scenario 2, ...) are just saved as None
+CHECKPOINT_STATE = (
+    "streams", "dispatcher", "stealer", "events_pending", "seq",
+    "cpu_busy", "cpu_busy_time", "running_job", "cpu_free_at", "cpu_gen",
+    "idle_cpus", "idle_pos", "ready_queues", "global_ready_queue", "running_heap",
+    "steals", "steal_attempts", "next_pid", "jobs_in_system", "peak_jobs_in_system",
+    "current_time", "completed", "sum_turnaround", "turnaround_hist", "batch_means",
+    "rq_len", "rq_area", "last_ev_time", "q_area", "q_last_change", "events",
+    "preemptions", "class_sum", "class_count", "mser", "mser_truncation",
+    "warmup_time", "warmup_jobs", "sampler", "next_sample",
+)
 
+# simulate() args stored in a checkpoint. a resume has to match all of these
+# (the stopping rule / checkpoint interval in CHECKPOINT_SETTINGS can change)
+CHECKPOINT_PARAMS = (
+    "lmbda", "avg_service", "scenario", "num_cpus", "seed", "engine", "rel_precision",
+    "confidence", "warmup", "antithetic", "policy", "steal", "migration_cost",
+    "discipline", "quantum", "priority_classes", "event_list", "sample_interval",
+    "interarrival", "service",
+)
+CHECKPOINT_SETTINGS = ("target_completions", "checkpoint_every", "checkpoint_secs")
 
-def simulate(lmbda, avg_service, scenario, num_cpus, target_completions=10_000, seed=1):
+
+def simulate(lmbda, avg_service, scenario, num_cpus, target_completions=10_000, seed=1,
+             engine="event", rel_precision=None, confidence=0.95, warmup=None,
+             antithetic=False, policy="random", steal=None, migration_cost=0.0,
+             discipline="fcfs", quantum=None, priority_classes=2, event_list="heap",
+             trace=None, record_jobs=None, sample_interval=None, checkpoint=None,
+             checkpoint_every=None, checkpoint_secs=None, resume=False,
+             instrument=False, profile=None, malloc_profile=None,
+             interarrival="exp", service="exp"):
     """
     Runs the multi-CPU discrete-event sim.
 
@@ -32,8 +85,85 @@ def simulate(lmbda, avg_service, scenario, num_cpus, target_completions=10_000,
         avg_service: avg time a job takes (seconds)
         scenario: 1 = per-CPU queues, 2 = shared global queue
         num_cpus: number of CPUs in the whole system
-        target_completions: stop after this many jobs finish
-        seed: random seed so it doesnt flake out
+        target_completions: stop after this many jobs finish (just a safety
+                            cap when rel_precision is set)
+        seed: random seed so it doesnt flake out. arrivals, service times
+              and routing each get their own stream (variates.py), so the
+              same seed gives the same jobs in both scenarios and engines
+        engine: "event" (default), "numpy" (needs numpy; same jobs, same
+                turnarounds up to float rounding) or "analytic" (exact
+                steady-state answer, no simulation: M/M/1 per CPU for
+                scenario 1 w/ random dispatch, M/M/c for scenario 2, FCFS
+                only - see analytic.py. seed / target_completions /
+                precision / warmup don't matter there)
+        rel_precision: if set (e.g. 0.01), stop as soon as the batch-means CI
+                       on avg turnaround is within +-rel_precision of the mean
+        confidence: confidence level for that CI (default 95%)
+        warmup: None (count everything from t=0) or "mser" to detect the
+                initial transient online with MSER-5 and throw it away
+        antithetic: use the mirrored (u -> 1-u) streams of this seed, i.e.
+                    the antithetic partner of the normal run (compare.py)
+        policy: scenario 1 only (ValueError otherwise) - which queue an
+                arriving job joins: "random" (default), "rr", "jsq", "pod2"
+                (any pod<d>), "least-work". see dispatch.py. the numpy
+                engine only does random and rr.
+        steal: scenario 1 only (ValueError otherwise) - None (default) or
+               work stealing: an idle CPU takes the oldest waiting job from
+               a victim queue picked by "random", "longest" or "pow2"
+               (event engine only)
+        migration_cost: extra CPU time (sec) a stolen job costs the thief
+        discipline: order of the ready queue(s) - "fcfs" (default), "sjf",
+                    "priority", "srpt" (preemptive) or "rr" (round robin,
+                    needs quantum). see disciplines.py. event engine only
+                    for anything but fcfs.
+        quantum: time slice (sec) for discipline="rr"
+        priority_classes: how many classes jobs get (uniformly at random,
+                          0 = most important) for discipline="priority"
+        event_list: pending-event structure, "heap" (default) or "calendar"
+                    (calendar queue). see eventlist.py - same results either
+                    way, only speed differs
+        trace: replay a job trace instead of drawing jobs (traces.py): path
+               to a CSV or binary trace, or an open traces reader. arrival
+               and service times come from the trace (lmbda / avg_service
+               are ignored), cpu_hint pins a job to a CPU in scenario 1.
+               it's streamed, never loaded whole. the run ends at
+               target_completions or when every traced job is done.
+               event engine only
+        record_jobs: write one record per finished job (pid, arrival,
+                     start, finish, cpu, queue length at arrival) to this
+                     file, .npy or raw binary (recorder.py). a path or a
+                     recorder.JobRecorder. event engine only
+        sample_interval: if set (sec of simulated time), also record a time
+                         series of queue length, busy CPUs and windowed
+                         utilization on that grid (timeseries.py). event
+                         engine only
+        checkpoint: file to checkpoint the whole simulator state to
+                    (checkpoint.py), every checkpoint_every completed jobs
+                    or every checkpoint_secs seconds of wall time (one of
+                    them). written atomically, so a killed run always
+                    leaves the last complete checkpoint
+        resume: if the checkpoint file exists, continue from it instead of
+                starting over - exactly like the run was never stopped.
+                the other params have to be the same as when it was
+                written (resume() below reads them from the file for you).
+                event engine only, no trace / record_jobs
+        instrument: count + time the main loop per event kind and the hot
+                    helpers, track peak event list / queue sizes
+                    (instrument.py). returned as stats["instrumentation"].
+                    makes the run several times slower, costs nothing when off.
+                    event engine only
+        profile: also run the main loop under cProfile and dump the stats
+                 to this file (python3 -m pstats FILE). on its own it only
+                 adds the per-kind counts/timings, not the helper wrappers
+        malloc_profile: also trace allocations with tracemalloc and write
+                        the top allocation sites to this file (same deal)
+        interarrival / service: distribution of the interarrival / service
+                                times, a spec like "lognormal:cv=2",
+                                "pareto:alpha=1.8", "hyperexp:cv=3", "det"
+                                or "empirical:FILE" (distributions.py),
+                                scaled to mean 1/lmbda / avg_service.
+                                default "exp" (Poisson arrivals, exponential
+                                service - same numbers as always)
 
     Returns:
         A dict with stuff like:
@@ -43,20 +173,191 @@ def simulate(lmbda, avg_service, scenario, num_cpus, target_completions=10_000,
         - throughput: jobs/sec
         - cpu_utils: per-CPU utilization (roughly)
         - avg_ready_q: time-weighted avg size of queue(s)
+        - avg_ready_q_per_cpu: same thing per CPU queue (scenario 1, else None)
+        - policy: dispatch policy used ("global" for scenario 2)
+        - steal: steal mode ("none" without stealing), steals: jobs stolen,
+          steal_attempts: times an idle CPU went looking (incl. misses),
+          migration_cost: the cost per steal that was used
+        - discipline / quantum: queue discipline used (quantum None unless rr)
+        - preemptions: jobs kicked off a CPU (srpt) or cut off by the
+          quantum (rr)
+        - avg_turnaround_by_class: avg turnaround per priority class
+          (discipline="priority", else None)
+        - trace: trace path (None without one), trace_records: jobs read
+          from it, trace_parse_sec / trace_parse_rate: time spent parsing
+          the trace and records parsed per sec
+        - jobs_recorded: records written with record_jobs (else 0)
+        - timeseries: {column: array} of the samples (timeseries.COLUMNS,
+          timeseries.write_csv to save it), None without sample_interval
+        - checkpoints: checkpoints written, resumed_at: completed jobs when
+          this run picked up a checkpoint (None if it started fresh)
+        - interarrival_dist / service_dist: the distributions used, as
+          canonical spec strings
+        - instrumentation: per-kind event counts/timings, helper calls/timings,
+          peaks and events/sec (instrument.Instrumentation.summary), None
+          unless instrument / profile / malloc_profile is on
+        - events: how many events got processed
+        - peak_resident_jobs: most job records held in memory at once
+        - turnaround_p50/p95/p99/p999: turnaround percentiles (within ~0.4%)
+        - turnaround_hist: the histogram behind them, as a string
+          (histogram.LogHistogram.from_string / merge_strings to combine runs)
+        - turnaround_ci_low/high, turnaround_ci_rel_hw: batch-means CI on
+          avg turnaround, ci_batches / ci_batch_size: batches it used
+        - warmup_time / warmup_jobs: sim time and departures thrown away as
+          warm-up, mser_truncation: the warm-up length (jobs) MSER picked
+          (None if it never settled). all 0 without warmup="mser".
+          "time" and everything else only cover the period after warmup_time.
     """
-    random.seed(seed)
-    mu = 1.0 / avg_service  # service rate (jobs/sec); careful for div by zero lol
+    if engine not in ENGINES:
+        raise ValueError(f"unknown engine {engine!r}, pick one of {ENGINES}")
+    if warmup not in (None, "mser"):
+        raise ValueError(f"unknown warmup mode {warmup!r}, use None or 'mser'")
+    if discipline not in DISCIPLINES:
+        raise ValueError(f"unknown discipline {discipline!r}, pick one of {', '.join(DISCIPLINES)}")
+    if discipline in TIME_SLICED and not (quantum and quantum > 0):
+        raise ValueError("discipline='rr' needs a quantum > 0")
+    if event_list not in EVENT_LISTS:
+        raise ValueError(f"unknown event list {event_list!r}, pick one of {', '.join(EVENT_LISTS)}")
+    if scenario == 2 and (policy != "random" or steal is not None):
+        raise ValueError("policy and steal are scenario 1 only (scenario 2 has one shared "
+                         "queue, there's nothing to dispatch or steal from)")
+    interarrival = parse_spec(interarrival)
+    service = parse_spec(service)
+    if trace is not None and not (isinstance(interarrival, Exponential)
+                                  and isinstance(service, Exponential)):
+        raise ValueError("a trace brings its own arrival and service times, "
+                         "interarrival / service distributions don't apply")
+    if checkpoint is not None:
+        if engine != "event":
+            raise ValueError("checkpointing needs the event engine")
+        if trace is not None or record_jobs is not None:
+            raise ValueError("checkpointing doesn't work with trace replay or job recording")
+        if checkpoint_every is not None and checkpoint_secs is not None:
+            raise ValueError("pick one of checkpoint_every (jobs) or checkpoint_secs (wall time)")
+        # simulate() args as they came in, for the checkpoint file
+        params = {name: value for name, value in locals().items()
+                  if name in CHECKPOINT_PARAMS or name in CHECKPOINT_SETTINGS}
+    elif checkpoint_every is not None or checkpoint_secs is not None or resume:
+        raise ValueError("checkpoint_every / checkpoint_secs / resume need a checkpoint file")
+
+    if engine != "event":
+        if trace is not None:
+            raise ValueError("trace replay needs the event engine")
+        if record_jobs is not None:
+            raise ValueError("job recording needs the event engine")
+        if sample_interval is not None:
+            raise ValueError("time series sampling needs the event engine")
+        if instrument or profile is not None or malloc_profile is not None:
+            raise ValueError("instrumentation needs the event engine")
+
+    if engine == "analytic":
+        from analytic import solve
+        return solve(lmbda, avg_service, scenario, num_cpus, policy=policy, steal=steal,
+                     discipline=discipline, interarrival=interarrival, service=service)
+
+    if engine == "numpy":
+        import fast_engines
+        if steal is not None and scenario == 1:
+            raise ValueError("work stealing needs the event engine")
+        if discipline != "fcfs":
+            raise ValueError(f"engine='numpy' is FCFS only, use the event engine for {discipline!r}")
+        if scenario == 1:
+            return fast_engines.simulate_per_cpu_numpy(
+                lmbda, avg_service, num_cpus, target_completions=target_completions,
+                seed=seed, rel_precision=rel_precision, confidence=confidence,
+                warmup=warmup, antithetic=antithetic, policy=policy,
+                interarrival=interarrival, service=service)
+        return fast_engines.simulate_global_kw(
+            lmbda, avg_service, num_cpus, target_completions=target_completions,
+            seed=seed, rel_precision=rel_precision, confidence=confidence,
+            warmup=warmup, antithetic=antithetic, interarrival=interarrival,
+            service=service)
+
+    # trace replay (traces.py): jobs come from the trace, streamed chunk by
+    # chunk. the rate / service streams below just don't get used
+    reader = None
+    own_reader = False
+    if trace is not None:
+        from traces import open_trace
+        if isinstance(trace, str):
+            reader = open_trace(trace)
+            own_reader = True
+        else:
+            reader = trace
+        next_record = reader.next_record
+        lmbda = avg_service = 1.0
+
+    # per-job records (recorder.py). off = None, and every hook is behind
+    # a plain `is not None` check, so it costs nothing when it's off
+    recorder = None
+    own_recorder = False
+    if record_jobs is not None:
+        from recorder import JobRecorder
+        if isinstance(record_jobs, str):
+            recorder = JobRecorder(record_jobs)
+            own_recorder = True
+        else:
+            recorder = record_jobs
+        rec_arrived = recorder.arrived
+        rec_started = recorder.started
+        rec_finished = recorder.finished
+
+    # time series on a fixed grid (timeseries.py). sampled from the rq_area
+    # bookkeeping whenever an event passes the next grid point; next_sample
+    # stays inf when it's off, so that check never fires
+    sampler = None
+    next_sample = math.inf
+    if sample_interval is not None:
+        sampler = TimeSeriesSampler(sample_interval, num_cpus)
+        next_sample = sampler.next_t
+
+    # hot-path instrumentation (instrument.py). off = None; the loop only
+    # checks `instrumenting` once per event, the timing wrappers for the
+    # helpers get swapped in right before the loop and only when it's on
+    inst = None
+    instrumenting = instrument or profile is not None or malloc_profile is not None
+    if instrumenting:
+        from instrument import Instrumentation
+        inst = Instrumentation(profile, malloc_profile)
+        inst.start_captures()
+
+    # one block-refilled stream per purpose (see variates.py)
+    streams = simulation_streams(seed, lmbda, avg_service, antithetic, interarrival, service)
+    next_interarrival = streams["arrivals"].draw
+    next_service = streams["service"].draw
+    pick_idle = streams["tiebreak"].index
+
+    # queue discipline (disciplines.py). srpt/rr jobs can be interrupted, so
+    # they carry a remaining-time field and need a mutable record
+    preemptive = discipline in PREEMPTIVE
+    time_sliced = discipline in TIME_SLICED
+    mutable_jobs = needs_mutable_jobs(discipline)
+    use_classes = discipline == "priority" and priority_classes > 1
+    if use_classes:
+        pick_class = streams["priority"].index
+
+    # scenario 1 routing (dispatch.py). policies that watch queue lengths /
+    # work get told about every job added to or leaving a CPU
+    if scenario == 1:
+        dispatcher = make_dispatcher(policy, num_cpus, streams["routing"])
+        route = dispatcher.choose
+        track_load = dispatcher.tracks_load
 
     # ============================================================================
     # EVENT QUEUE SETUP
     # ============================================================================
-    # Priority queue of events: (t, kind, seq#, data)
+    # Priority queue of events (eventlist.py), each a (t, key, data) record:
     # - time = when event happens
-    # - kind = ARR or DEP
-    # - seq = just used to avoid weird ties messing up order
-    # - data = misc (cpu id, pid, etc)
-    event_q = []
+    # - key = kind (ARR, DEP or SLICE) and seq packed in one int, so ties
+    #   still go by kind and then seq, just with one field less
+    # - data = misc (cpu id + the job record + the CPU's generation number
+    #   for departures / slice ends)
+    events_pending = make_event_list(event_list)
+    push_event = events_pending.push
+    pop_event = events_pending.pop
     seq = 0  # tie breaker since heapq doesn't like equal keys sometimes
+    DEP_KEY = make_key(DEP, 0)
+    SLICE_KEY = make_key(SLICE, 0)
 
     # ============================================================================
     # CPU STATE TRACKING
@@ -64,25 +365,54 @@ def simulate(lmbda, avg_service, scenario, num_cpus, target_completions=10_000,
     # keep track of what each CPU is doing
     cpu_busy = [False] * num_cpus       # cpu is busy or not
     cpu_busy_time = [0.0] * num_cpus    # total amount of actual service time
-    running_pid = [None] * num_cpus     # storing which pid is running rn
+    running_job = [None] * num_cpus     # job record running rn (see below)
+    cpu_free_at = [0.0] * num_cpus      # when the running job will finish
+    # bumped every time a CPU starts (or loses) a job. a DEP event whose gen
+    # doesn't match anymore belongs to a preempted job -> ignored when popped
+    cpu_gen = [0] * num_cpus
+
+    # idle CPUs kept in a list + each CPU's slot in that list (-1 = busy), so
+    # add / remove / pick-a-random-one are all O(1) no matter how many CPUs.
+    # removal swaps the last entry into the hole.
+    idle_cpus = list(range(num_cpus))
+    idle_pos = list(range(num_cpus))
 
     # ============================================================================
     # READY QUEUES (depends on scenario)
     # ============================================================================
     if scenario == 1:
-        # each CPU gets its own queue (FCFS)
-        ready_queues = [deque() for _ in range(num_cpus)]
+        # each CPU gets its own queue (FCFS unless discipline says otherwise)
+        ready_queues = [make_queue(discipline) for _ in range(num_cpus)]
     else:
-        # One giant FCFS queue shared by all
-        global_ready_queue = deque()
+        # One giant queue shared by all
+        global_ready_queue = make_queue(discipline)
+        # srpt: busy CPUs by when they finish (max-heap via -free_at, lazy:
+        # entries whose gen is out of date get skipped), so an arrival can
+        # find the job with the most work left in O(log n)
+        running_heap = []
+
+    # work stealing (scenario 1): idle CPUs take the oldest job out of
+    # another CPU's queue. the victim picker is in dispatch.py
+    stealer = None
+    track_queues = False
+    steals = 0
+    steal_attempts = 0
+    if scenario == 1 and steal is not None:
+        stealer = make_victim_picker(steal, ready_queues, streams["steal"])
+        track_queues = stealer.tracks_queues
+        pick_thief = streams["steal"].index
 
     # ============================================================================
     # PROCESS BOOKKEEPING
     # ============================================================================
+    # each job is a small tuple (pid, arrival_time, service_time, class) that
+    # rides along in the ready queue and then in its DEP event. nothing is
+    # kept per pid on the side, so once a job departs it's gone -> memory is
+    # O(jobs in system) instead of O(jobs ever), even for billion-job runs.
+    # (srpt / rr use a list [pid, arrival, service, class, remaining] instead)
     next_pid = 0                 # giving processes ids
-    arrival = {}                 # pid -> arrival time
-    service = {}                 # pid -> service time
-    assigned_cpu = {}            # used only for scenario 1, prob not needed elsewhere
+    jobs_in_system = 0           # waiting + running right now
+    peak_jobs_in_system = 0      # most job records ever alive at once
 
     # ============================================================================
     # METRICS
@@ -90,36 +420,74 @@ def simulate(lmbda, avg_service, scenario, num_cpus, target_completions=10_000,
     current_time = 0.0
     completed = 0
     sum_turnaround = 0.0
+    # log-bucketed histogram -> p50/p95/p99/p99.9 in constant memory
+    turnaround_hist = LogHistogram()
+    record_turnaround = turnaround_hist.record
+    # batch means over departures -> CI on avg turnaround, and the stopping
+    # rule when rel_precision is set
+    batch_means = BatchMeans()
+    add_batch_value = batch_means.add
 
     # tracking average queue length (kinda annoying honestly)
+    # rq_len is kept up to date by enqueue/dequeue so each event is O(1)
+    rq_len = 0
     rq_area = 0.0
     last_ev_time = 0.0
 
+    # scenario 1 also keeps an area per CPU queue. these only get updated when
+    # that queue changes (len * time since it last changed), not every event
+    if scenario == 1:
+        q_area = [0.0] * num_cpus
+        q_last_change = [0.0] * num_cpus
+    events = 0  # total events popped (benchmarks use this for events/sec)
+    preemptions = 0
+
+    # per priority class turnaround (discipline="priority")
+    if use_classes:
+        class_sum = [0.0] * priority_classes
+        class_count = [0] * priority_classes
+
+    # warm-up deletion (warmup="mser"): MSER-5 watches the departures, and
+    # once it decides the transient is over, every accumulator gets reset to
+    # "as if we started measuring right now". that throws away a bit more
+    # than the truncation point MSER found (it can only be sure after the
+    # fact), which costs some data but never lets biased data back in.
+    mser = MSERWarmup.for_run(target_completions) if warmup == "mser" else None
+    mser_truncation = 0
+    warmup_time = 0.0
+    warmup_jobs = 0
+
+    # checkpointing (checkpoint.py). checked at departures; next_checkpoint
+    # stays inf when it's off. with checkpoint_secs the clock gets looked at
+    # every 1000 departures
+    checkpoints = 0
+    next_checkpoint = math.inf
+    if checkpoint is not None:
+        checkpoint_step = checkpoint_every if checkpoint_every is not None else 1000
+        next_checkpoint = checkpoint_step
+        last_checkpoint_wall = time.perf_counter()
+
     # ============================================================================
     # HELPERS
     # ============================================================================
 
-    def get_total_rq_len():
-        """
-        Returns total # of jobs in the ready queue(s).
-        scenario 1: sum all per-CPU queues
-        scenario 2: just check the global one
-        """
-        if scenario == 1:
-            return sum(len(q) for q in ready_queues)
-        else:
-            return len(global_ready_queue)
-
-    def enqueue_process(pid, cpu_id=None):
+    def enqueue_process(job, cpu_id=None):
         """
         Puts a process into whatever queue it belongs in.
         scenario 1 -> use specific CPU’s queue
         scenario 2 -> dump it in global queue
         """
+        nonlocal rq_len
         if scenario == 1:
-            ready_queues[cpu_id].append(pid)
+            q = ready_queues[cpu_id]
+            q_area[cpu_id] += len(q) * (current_time - q_last_change[cpu_id])
+            q_last_change[cpu_id] = current_time
+            q.append(job)
+            if track_queues:
+                stealer.queue_grew(cpu_id)
         else:
-            global_ready_queue.append(pid)
+            global_ready_queue.append(job)
+        rq_len += 1
 
     def dequeue_process(cpu_id):
         """
@@ -127,14 +495,22 @@ def simulate(lmbda, avg_service, scenario, num_cpus, target_completions=10_000,
         scenario 1 -> pull from that CPU's queue
         scenario 2 -> take from global queue always
 
-        Returns None if there's nothing waiting there.
+        Returns the job record, or None if there's nothing waiting there.
         """
+        nonlocal rq_len
         if scenario == 1:
-            if len(ready_queues[cpu_id]) > 0:
-                return ready_queues[cpu_id].popleft()
+            q = ready_queues[cpu_id]
+            if len(q) > 0:
+                q_area[cpu_id] += len(q) * (current_time - q_last_change[cpu_id])
+                q_last_change[cpu_id] = current_time
+                rq_len -= 1
+                if track_queues:
+                    stealer.queue_shrank(cpu_id)
+                return q.popleft()
             return None
         else:
             if len(global_ready_queue) > 0:
+                rq_len -= 1
                 return global_ready_queue.popleft()
             return None
 
@@ -142,12 +518,51 @@ def simulate(lmbda, avg_service, scenario, num_cpus, target_completions=10_000,
         """
         Schedules the next incoming job.  
         Interarrival is exponential w/ rate lambda.
+        (trace replay: the next trace record instead, carried as the event data)
         """
         nonlocal seq
-        inter = random.expovariate(lmbda)
-        heapq.heappush(event_q, (now + inter, ARR, seq, None))
+        if reader is not None:
+            rec = next_record()
+            if rec is None:
+                return      # trace is over, the loop just drains what's left
+            t = rec[0] - t_offset
+            if t < now:
+                raise ValueError(f"trace {reader.path}: arrival times go backwards "
+                                 f"at record {reader.records}")
+            check_record(rec)
+            push_event((t, seq, rec))
+        else:
+            inter = next_interarrival()
+            push_event((now + inter, seq, None))     # ARR key is just seq (ARR = 0)
         seq += 1
 
+    def check_record(rec):
+        """
+        Rejects a trace record the loop can't run: a NaN / inf arrival or a
+        negative / NaN / inf service time (the chained compares are False for NaN).
+        Params: rec = (arrival, service, cpu_hint), reader.records is its number
+        """
+        if not -math.inf < rec[0] < math.inf:
+            raise ValueError(f"trace {reader.path}: bad arrival time {rec[0]!r} "
+                             f"at record {reader.records}")
+        if not 0.0 <= rec[1] < math.inf:
+            raise ValueError(f"trace {reader.path}: bad service time {rec[1]!r} "
+                             f"at record {reader.records}")
+
+    def mark_busy(cpu_id):
+        """Takes a CPU out of the idle pool (swap the last idle one into its slot)."""
+        i = idle_pos[cpu_id]
+        last = idle_cpus.pop()
+        if last != cpu_id:
+            idle_cpus[i] = last
+            idle_pos[last] = i
+        idle_pos[cpu_id] = -1
+
+    def mark_idle(cpu_id):
+        """Puts a CPU back in the idle pool."""
+        idle_pos[cpu_id] = len(idle_cpus)
+        idle_cpus.append(cpu_id)
+
     def start_cpu_if_idle(cpu_id):
         """
         If CPU isn't doing anything, try to give it a job.
@@ -156,54 +571,227 @@ def simulate(lmbda, avg_service, scenario, num_cpus, target_completions=10_000,
 
         Schedules a departure event once job starts.
         """
-        nonlocal seq
-
         if cpu_busy[cpu_id]:
             return  # already working on something
 
-        pid = dequeue_process(cpu_id)
-        if pid is None:
+        job = dequeue_process(cpu_id)
+        if job is None:
             return
+        start_job(cpu_id, job)
+
+    def start_job(cpu_id, job, extra=0.0):
+        """
+        Actually starts service of job on (idle) cpu_id. extra = CPU time on
+        top of the job's own service (migration cost for stolen jobs).
+
+        srpt/rr jobs run for their remaining time, rr cut off at one quantum
+        (a SLICE event instead of DEP).
+        """
+        nonlocal seq
 
-        # actually start service
-        running_pid[cpu_id] = pid
+        running_job[cpu_id] = job
         cpu_busy[cpu_id] = True
-        st = service[pid]
+        mark_busy(cpu_id)
+        if recorder is not None:
+            rec_started(job[0], current_time)
+        gen = cpu_gen[cpu_id] + 1
+        cpu_gen[cpu_id] = gen
+
+        kind_key = DEP_KEY
+        if mutable_jobs:
+            st = job[4]
+            if time_sliced and st > quantum:
+                st = quantum
+                kind_key = SLICE_KEY
+        else:
+            st = job[2]
+        st += extra
         cpu_busy_time[cpu_id] += st  # keep track for utilization math later
+        done_at = current_time + st
+        cpu_free_at[cpu_id] = done_at
 
-        # schedule departure
-        heapq.heappush(event_q, (current_time + st, DEP, seq, (cpu_id, pid)))
+        # schedule departure (job record travels with the event)
+        push_event((done_at, kind_key | seq, (cpu_id, job, gen)))
         seq += 1
 
-    def try_start_all_cpus():
+        if preemptive and scenario == 2:
+            heapq.heappush(running_heap, (-done_at, cpu_id, gen))
+
+    def preempt(cpu_id):
         """
-        Tries to start work on any idle CPUs.
-        In scenario 2, randomizes cpu order so CPU0 doesn't hog everthing.
+        srpt: takes the running job off cpu_id and puts it back in the ready
+        queue with whatever it has left. Its DEP event goes stale (gen bump)
+        and the unused part of its booked busy time gets handed back.
         """
-        if scenario == 1:
-            for cid in range(num_cpus):
-                start_cpu_if_idle(cid)
+        nonlocal preemptions
+        job = running_job[cpu_id]
+        left = cpu_free_at[cpu_id] - current_time
+        cpu_busy_time[cpu_id] -= left
+        cpu_free_at[cpu_id] = current_time
+        job[4] = left if left < job[4] else job[4]   # (left can include migration cost)
+        cpu_gen[cpu_id] += 1
+        running_job[cpu_id] = None
+        cpu_busy[cpu_id] = False
+        mark_idle(cpu_id)
+        enqueue_process(job, cpu_id if scenario == 1 else None)
+        preemptions += 1
+
+    def busiest_running_cpu():
+        """
+        srpt, scenario 2: the busy CPU whose job finishes last (most work
+        left). Skips stale heap entries; rebuilds the heap when too many
+        pile up (departed jobs' entries sink to the bottom and never surface).
+        """
+        nonlocal running_heap
+        if len(running_heap) > 2 * num_cpus + 64:
+            running_heap = [(-cpu_free_at[c], c, cpu_gen[c]) for c in range(num_cpus) if cpu_busy[c]]
+            heapq.heapify(running_heap)
+        while running_heap:
+            _, c, gen = running_heap[0]
+            if cpu_busy[c] and cpu_gen[c] == gen:
+                return c
+            heapq.heappop(running_heap)
+        return None
+
+    def try_steal(thief):
+        """
+        Work stealing: idle CPU `thief` picks a victim queue and, if the probe
+        found one with jobs waiting, runs its oldest job (+ migration_cost).
+        Failed probes still count as attempts.
+        """
+        nonlocal steals, steal_attempts
+        steal_attempts += 1
+        victim = stealer.pick(thief)
+        if victim is None:
+            return
+        job = dequeue_process(victim)
+        steals += 1
+        if track_load:
+            # the job now belongs to the thief as far as the dispatcher knows
+            dispatcher.job_removed(victim, job, current_time)
+            dispatcher.job_added(thief, job, current_time)
+        start_job(thief, job, migration_cost)
+
+    def wake_idle_cpu():
+        """
+        Scenario 2: hand the front of the global queue to a random idle CPU.
+
+        Picking uniformly from the idle pool is the same fair tie-breaking we
+        used to get by shuffling every CPU, just O(1) instead of O(num_cpus).
+        (When the queue isn't empty every CPU is busy, so a departure always
+        leaves exactly one idle CPU to wake - no random draw needed there.)
+        """
+        n_idle = len(idle_cpus)
+        if n_idle == 0 or not global_ready_queue:
+            return
+        if n_idle == 1:
+            start_cpu_if_idle(idle_cpus[0])
         else:
-            cpu_order = list(range(num_cpus))
-            random.shuffle(cpu_order)
-            for cid in cpu_order:
-                start_cpu_if_idle(cid)
+            start_cpu_if_idle(idle_cpus[pick_idle(n_idle)])
 
     # ============================================================================
-    # FIRST ARRIVAL (init)
+    # FIRST ARRIVAL (init) / RESUME
     # ============================================================================
-    first = random.expovariate(lmbda)
-    heapq.heappush(event_q, (first, ARR, seq, None))
-    seq += 1
+    resumed_at = None
+    if resume and os.path.exists(checkpoint):
+        saved_params, state = load_checkpoint(checkpoint)
+        changed = [name for name in CHECKPOINT_PARAMS if saved_params[name] != params[name]]
+        if changed:
+            raise ValueError(f"checkpoint {checkpoint} was made with different "
+                             f"{', '.join(changed)}")
+        (streams, dispatcher, stealer, events_pending, seq,
+         cpu_busy, cpu_busy_time, running_job, cpu_free_at, cpu_gen,
+         idle_cpus, idle_pos, ready_queues, global_ready_queue, running_heap,
+         steals, steal_attempts, next_pid, jobs_in_system, peak_jobs_in_system,
+         current_time, completed, sum_turnaround, turnaround_hist, batch_means,
+         rq_len, rq_area, last_ev_time, q_area, q_last_change, events,
+         preemptions, class_sum, class_count, mser, mser_truncation,
+         warmup_time, warmup_jobs, sampler, next_sample) = [state[name] for name in CHECKPOINT_STATE]
+        # the shortcuts still point at the objects from before, grab them again
+        next_interarrival = streams["arrivals"].draw
+        next_service = streams["service"].draw
+        pick_idle = streams["tiebreak"].index
+        if use_classes:
+            pick_class = streams["priority"].index
+        if scenario == 1:
+            route = dispatcher.choose
+        if stealer is not None:
+            pick_thief = streams["steal"].index
+        push_event = events_pending.push
+        pop_event = events_pending.pop
+        record_turnaround = turnaround_hist.record
+        add_batch_value = batch_means.add
+        next_checkpoint = completed + checkpoint_step
+        resumed_at = completed
+    elif reader is not None:
+        # the clock starts at the trace's first arrival (traces can use any
+        # time origin, e.g. unix timestamps)
+        rec = next_record()
+        if rec is None:
+            raise ValueError(f"trace {reader.path} has no jobs in it")
+        check_record(rec)
+        t_offset = rec[0]
+        push_event((0.0, seq, rec))
+        seq += 1
+    else:
+        first = next_interarrival()
+        push_event((first, seq, None))
+        seq += 1
+
+    if instrument:
+        # every shortcut / nested helper the loop calls gets a counting +
+        # timing wrapper. the nested helpers call each other through the
+        # closure, so rebinding the names here is enough
+        wrap = inst.wrap
+        push_event = inst.wrap_push(push_event, events_pending)
+        pop_event = wrap("pop_event", pop_event)
+        next_interarrival = wrap("next_interarrival", next_interarrival)
+        next_service = wrap("next_service", next_service)
+        pick_idle = wrap("pick_idle", pick_idle)
+        if scenario == 1:
+            route = wrap("route", route)
+        enqueue_process = inst.wrap_enqueue(
+            enqueue_process,
+            lambda cpu_id: (len(ready_queues[cpu_id]) if scenario == 1 else rq_len, rq_len))
+        dequeue_process = wrap("dequeue_process", dequeue_process)
+        schedule_next_arrival = wrap("schedule_next_arrival", schedule_next_arrival)
+        start_cpu_if_idle = wrap("start_cpu_if_idle", start_cpu_if_idle)
+        start_job = wrap("start_job", start_job)
+        wake_idle_cpu = wrap("wake_idle_cpu", wake_idle_cpu)
+        if preemptive:
+            preempt = wrap("preempt", preempt)
+        if stealer is not None:
+            try_steal = wrap("try_steal", try_steal)
+        record_turnaround = wrap("record_turnaround", record_turnaround)
+        add_batch_value = wrap("add_batch_value", add_batch_value)
+    if inst is not None:
+        inst_tick = inst.tick
+        inst.loop_started()
 
     # ============================================================================
     # MAIN SIM LOOP
     # ============================================================================
-    while completed < target_completions and event_q:
-        ev_time, kind, _, data = heapq.heappop(event_q)
+    # (never runs dry: there's always a next arrival pending. except when a
+    # replayed trace runs out - then it stops once the last job is done)
+    while completed < target_completions:
+        try:
+            ev_time, key, data = pop_event()
+        except IndexError:
+            break
+        kind = key >> KIND_SHIFT
+        if instrumenting:
+            inst_tick(kind)
+        if preemptive and kind == DEP and data[2] != cpu_gen[data[0]]:
+            continue  # departure of a job that got preempted, nothing to do
+        events += 1
+
+        # time series grid point(s) passed since the last event
+        if ev_time >= next_sample:
+            next_sample = sampler.take(ev_time, rq_len, rq_area, last_ev_time,
+                                       cpu_busy_time, cpu_free_at)
 
         # update area under queue-length curve
-        rq_area += get_total_rq_len() * (ev_time - last_ev_time)
+        rq_area += rq_len * (ev_time - last_ev_time)
         last_ev_time = ev_time
         current_time = ev_time
 
@@ -212,54 +800,267 @@ def simulate(lmbda, avg_service, scenario, num_cpus, target_completions=10_000,
             pid = next_pid
             next_pid += 1
 
-            arrival[pid] = ev_time
-            st = random.expovariate(mu)
-            service[pid] = st
+            if data is None:
+                st = next_service()
+            else:
+                st = data[1]          # trace record (arrival, service, cpu_hint)
+            cls = pick_class(priority_classes) if use_classes else 0
+            if mutable_jobs:
+                job = [pid, ev_time, st, cls, st]
+            else:
+                job = (pid, ev_time, st, cls)
+
+            jobs_in_system += 1
+            if jobs_in_system > peak_jobs_in_system:
+                peak_jobs_in_system = jobs_in_system
 
-            # put job in the right queue
+            # put job in the right queue, then only the CPU(s) that could
+            # take it need a look
             if scenario == 1:
-                cpu_id = random.randint(0, num_cpus - 1)
-                assigned_cpu[pid] = cpu_id
-                enqueue_process(pid, cpu_id)
+                if data is not None and data[2] >= 0:
+                    cpu_id = data[2] % num_cpus     # trace pinned it to a CPU
+                else:
+                    cpu_id = route(ev_time)
+                if recorder is not None:
+                    rec_arrived(pid, len(ready_queues[cpu_id]))
+                if track_load:
+                    dispatcher.job_added(cpu_id, job, ev_time)
+                enqueue_process(job, cpu_id)
+                schedule_next_arrival(ev_time)
+                # srpt: new job is shorter than what's left of the running one
+                if preemptive and cpu_busy[cpu_id] and st < cpu_free_at[cpu_id] - ev_time:
+                    preempt(cpu_id)
+                start_cpu_if_idle(cpu_id)
+                # job had to wait behind a busy CPU while others sit idle ->
+                # a random idle CPU goes looking for work
+                if stealer is not None and idle_cpus and cpu_busy[cpu_id]:
+                    try_steal(idle_cpus[pick_thief(len(idle_cpus))])
             else:
-                enqueue_process(pid)
+                if recorder is not None:
+                    rec_arrived(pid, len(global_ready_queue))
+                enqueue_process(job)
+                schedule_next_arrival(ev_time)
+                if preemptive and not idle_cpus:
+                    victim = busiest_running_cpu()
+                    if victim is not None and st < cpu_free_at[victim] - ev_time:
+                        preempt(victim)
+                wake_idle_cpu()
 
-            schedule_next_arrival(ev_time)
-            try_start_all_cpus()
+        # round robin: quantum is up, job goes to the back of its queue and
+        # the CPU takes whatever is next (could be the same job again)
+        elif kind == SLICE:
+            cpu_id, job, _ = data
+            job[4] -= quantum
+            preemptions += 1
+            cpu_busy[cpu_id] = False
+            running_job[cpu_id] = None
+            mark_idle(cpu_id)
+            if scenario == 1:
+                enqueue_process(job, cpu_id)
+                start_cpu_if_idle(cpu_id)
+            else:
+                enqueue_process(job)
+                wake_idle_cpu()
 
         # departure event
         else:
-            cpu_id, pid = data
+            cpu_id, job, _ = data
 
             completed += 1
-            sum_turnaround += (ev_time - arrival[pid])
+            turnaround = ev_time - job[1]
+            sum_turnaround += turnaround
+            record_turnaround(turnaround)
+            if use_classes:
+                class_sum[job[3]] += turnaround
+                class_count[job[3]] += 1
+            if recorder is not None:
+                rec_finished(job[0], job[1], ev_time, cpu_id)
+            jobs_in_system -= 1
 
             cpu_busy[cpu_id] = False
-            running_pid[cpu_id] = None
+            running_job[cpu_id] = None
+            mark_idle(cpu_id)
+
+            # the freed CPU is the only thing that changed
+            if scenario == 1:
+                if track_load:
+                    dispatcher.job_done(cpu_id, job, ev_time)
+                start_cpu_if_idle(cpu_id)
+                # own queue was empty -> try to steal before going idle
+                if stealer is not None and not cpu_busy[cpu_id]:
+                    try_steal(cpu_id)
+            else:
+                wake_idle_cpu()
+
+            batch_full = add_batch_value(turnaround)
 
-            try_start_all_cpus()
+            if mser is not None:
+                # still in warm-up detection (no early stopping until it's decided)
+                if mser.add(turnaround):
+                    mser_truncation = mser.truncation
+                    mser = None
+                    if mser_truncation:
+                        if sampler is not None:
+                            area_before = rq_area
+                            busy_before = sum(cpu_busy_time)
+                        # start measuring from scratch at this instant
+                        warmup_time = ev_time
+                        warmup_jobs = completed
+                        completed = 0
+                        sum_turnaround = 0.0
+                        turnaround_hist = LogHistogram()
+                        record_turnaround = turnaround_hist.record
+                        batch_means = BatchMeans()
+                        add_batch_value = batch_means.add
+                        if instrument:
+                            record_turnaround = inst.wrap("record_turnaround", record_turnaround)
+                            add_batch_value = inst.wrap("add_batch_value", add_batch_value)
+                        rq_area = 0.0
+                        steals = 0
+                        steal_attempts = 0
+                        preemptions = 0
+                        if use_classes:
+                            class_sum = [0.0] * priority_classes
+                            class_count = [0] * priority_classes
+                        if checkpoint is not None:
+                            next_checkpoint = checkpoint_step
+                        if scenario == 1:
+                            for i in range(num_cpus):
+                                q_area[i] = 0.0
+                                q_last_change[i] = ev_time
+                        # busy time is booked when a job starts, so running
+                        # jobs only get the part of their service still ahead
+                        for i in range(num_cpus):
+                            cpu_busy_time[i] = cpu_free_at[i] - ev_time if cpu_busy[i] else 0.0
+                        if sampler is not None:
+                            # the time series runs straight through warm-up
+                            sampler.rebase(area_before, busy_before - sum(cpu_busy_time))
+
+            # precision mode: only worth checking when a batch just filled
+            elif batch_full and rel_precision is not None:
+                if batch_means.precise_enough(rel_precision, confidence):
+                    break
+
+            if completed >= next_checkpoint:
+                next_checkpoint = completed + checkpoint_step
+                if (checkpoint_secs is None
+                        or time.perf_counter() - last_checkpoint_wall >= checkpoint_secs):
+                    loc = locals()
+                    save_checkpoint(checkpoint, params,
+                                    {name: loc.get(name) for name in CHECKPOINT_STATE})
+                    checkpoints += 1
+                    last_checkpoint_wall = time.perf_counter()
 
     # ============================================================================
     # FINAL METRICS
     # ============================================================================
+    if inst is not None:
+        inst.loop_done()
+    if mser is not None:
+        mser_truncation = None   # ran out of jobs before MSER settled
+    if own_reader:
+        reader.close()
+    if own_recorder:
+        recorder.close()
+
+    # everything is measured from the end of warm-up (0 if there wasn't one)
+    measured_time = current_time - warmup_time
+
     avg_turnaround = sum_turnaround / completed if completed > 0 else float('nan')
-    throughput = completed / current_time if current_time > 0 else 0.0
+    throughput = completed / measured_time if measured_time > 0 else 0.0
 
     cpu_utils = [
-        cpu_busy_time[i] / current_time if current_time > 0 else 0.0
+        cpu_busy_time[i] / measured_time if measured_time > 0 else 0.0
         for i in range(num_cpus)
     ]
 
-    avg_rq_len = rq_area / current_time if current_time > 0 else 0.0
+    avg_rq_len = rq_area / measured_time if measured_time > 0 else 0.0
+
+    # per-CPU queue lengths only mean something with per-CPU queues
+    if scenario == 1:
+        avg_rq_per_cpu = []
+        for i in range(num_cpus):
+            area = q_area[i] + len(ready_queues[i]) * (current_time - q_last_change[i])
+            avg_rq_per_cpu.append(area / measured_time if measured_time > 0 else 0.0)
+    else:
+        avg_rq_per_cpu = None
 
-    return {
+    stats = default_stats(num_cpus)
+    stats.update({
         "completed": completed,
-        "time": current_time,
+        "time": measured_time,
         "avg_turnaround": avg_turnaround,
         "throughput": throughput,
         "cpu_utils": cpu_utils,
         "avg_ready_q": avg_rq_len,
-    }
+        "avg_ready_q_per_cpu": avg_rq_per_cpu,
+        "policy": dispatcher.name if scenario == 1 else "global",
+        "steal": stealer.name if stealer is not None else "none",
+        "steals": steals,
+        "steal_attempts": steal_attempts,
+        "migration_cost": migration_cost if stealer is not None else 0.0,
+        "discipline": discipline,
+        "quantum": quantum if time_sliced else None,
+        "preemptions": preemptions,
+        "event_list": event_list,
+        "trace": reader.path if reader is not None else None,
+        "trace_records": reader.records if reader is not None else 0,
+        "trace_parse_sec": reader.parse_sec if reader is not None else 0.0,
+        "trace_parse_rate": (reader.records / reader.parse_sec
+                             if reader is not None and reader.parse_sec > 0 else 0.0),
+        "timeseries": sampler.columns() if sampler is not None else None,
+        "checkpoints": checkpoints,
+        "resumed_at": resumed_at,
+        "jobs_recorded": (recorder.count + recorder.n) if recorder is not None else 0,
+        "instrumentation": inst.summary(events) if inst is not None else None,
+        "interarrival_dist": interarrival.describe(),
+        "service_dist": service.describe(),
+        "avg_turnaround_by_class": ([s / c if c else float('nan')
+                                     for s, c in zip(class_sum, class_count)]
+                                    if use_classes else None),
+        "events": events,
+        "peak_resident_jobs": peak_jobs_in_system,
+        "turnaround_hist": turnaround_hist.to_string(),
+        "warmup_time": warmup_time,
+        "warmup_jobs": warmup_jobs,
+        "mser_truncation": mser_truncation,
+    })
+    stats.update(turnaround_hist.percentiles())
+    stats.update(batch_means.summary(confidence))
+    return stats
+
+
+def resume(checkpoint, **overrides):
+    """
+    Continues a run from its checkpoint file with the same params it was
+    started with (read from the file), checkpointing to the same file as
+    it goes. overrides can change target_completions / checkpoint_every /
+    checkpoint_secs, nothing else.
+
+    Returns the same stats dict the uninterrupted run would have returned.
+    """
+    params = read_params(checkpoint)
+    for name in overrides:
+        if name not in CHECKPOINT_SETTINGS:
+            raise ValueError(f"can't change {name} when resuming")
+    params.update(overrides)
+    return simulate(checkpoint=checkpoint, resume=True, **params)
+
+
+def print_analytic(stats, scenario, num_cpus, lmbda, avg_service):
+    """CLI output for --engine analytic (no run, so no CI / sim time / hist)."""
+    model = "M/M/1 per CPU (random dispatch)" if scenario == 1 else f"M/M/{num_cpus}"
+    print(f"Scenario: \t\t\t{scenario} (analytic, {model})")
+    print(f"Number of CPUs: \t\t{num_cpus}")
+    print(f"Arrival rate (lambda): \t\t{lmbda:.2f} processes/sec")
+    print(f"Avg service time: \t\t{avg_service:.4f} sec")
+    print(f"Avg turnaround: \t\t{stats['avg_turnaround']:.6f} sec")
+    print(f"Turnaround p50/p95/p99/p99.9: \t{stats['turnaround_p50']:.6f} "
+          f"{stats['turnaround_p95']:.6f} {stats['turnaround_p99']:.6f} "
+          f"{stats['turnaround_p999']:.6f} sec")
+    print(f"Throughput:     \t\t{stats['throughput']:.6f} jobs/sec")
+    print(f"CPU utilization: \t\t{stats['cpu_utils'][0]:.6f} (every CPU)")
+    print(f"Avg ready queue length: \t{stats['avg_ready_q']:.6f}")
 
 
 def main():
@@ -267,24 +1068,97 @@ def main():
     Handles CLI args + runs the sim.
 
     Usage: python3 hw5.py <lambda> <avg_service> <scenario> <num_cpus>
+                          [--engine numpy|analytic] [--precision 0.01 [--max-jobs N]]
+                          [--validate]
 
     scenario = 1 (per-CPU queues)
              = 2 (shared queue)
     """
-    if len(sys.argv) != 5:
-        print("Usage: python3 hw5.py <arrival_rate_lambda> <avg_service_time> <scenario: 1 or 2> <num_cpus>")
-        print("\nArgs:")
-        print("  arrival_rate_lambda : lol basically how fast jobs show up")
-        print("  avg_service_time    : avg service time, ex. 0.02 secs")
-        print("  scenario            : 1 or 2 only")
-        print("  num_cpus            : how many cpus u want")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(
+        description="Multi-CPU discrete-event scheduling simulator (CS3360 HW5)")
+    parser.add_argument("lmbda", metavar="arrival_rate_lambda",
+                        help="lol basically how fast jobs show up")
+    parser.add_argument("avg_service", metavar="avg_service_time",
+                        help="avg service time, ex. 0.02 secs")
+    parser.add_argument("scenario", help="1 or 2 only")
+    parser.add_argument("num_cpus", help="how many cpus u want")
+    parser.add_argument("--engine", choices=ENGINES, default="event",
+                        help="event = discrete-event loop (default), numpy = vectorized fast "
+                             "engine, analytic = exact M/M/1 / M/M/c formulas (no simulation)")
+    parser.add_argument("--validate", action="store_true",
+                        help="also solve the point analytically and flag it if the exact mean "
+                             "turnaround is outside the run's CI")
+    parser.add_argument("--hist", action="store_true",
+                        help="also print the serialized turnaround histogram")
+    parser.add_argument("--precision", type=float, default=None,
+                        help="stop once the turnaround CI half-width is within this "
+                             "fraction of the mean (e.g. 0.01 = 1%%)")
+    parser.add_argument("--confidence", type=float, default=0.95,
+                        help="confidence level for the CI (default 0.95)")
+    parser.add_argument("--warmup", choices=("mser",), default=None,
+                        help="detect + drop the initial transient with MSER-5")
+    parser.add_argument("--policy", default="random",
+                        help="scenario 1 dispatch: random (default), rr, jsq, pod2 "
+                             "(or pod<d>), least-work")
+    parser.add_argument("--steal", choices=("random", "longest", "pow2"), default=None,
+                        help="scenario 1 work stealing: how an idle CPU picks a victim queue")
+    parser.add_argument("--migration-cost", type=float, default=0.0,
+                        help="extra CPU time (sec) a stolen job costs (default 0)")
+    parser.add_argument("--discipline", choices=DISCIPLINES, default="fcfs",
+                        help="ready queue order: fcfs (default), sjf, priority, srpt "
+                             "(preemptive), rr (needs --quantum)")
+    parser.add_argument("--quantum", type=float, default=None,
+                        help="round robin time slice in sec (e.g. 0.005)")
+    parser.add_argument("--classes", type=int, default=2,
+                        help="number of priority classes for --discipline priority (default 2)")
+    parser.add_argument("--event-list", choices=EVENT_LISTS, default="heap",
+                        help="pending-event structure: heap (default) or calendar queue")
+    parser.add_argument("--trace", default=None,
+                        help="replay this job trace (CSV or binary, see traces.py) "
+                             "instead of random jobs; lambda + avg_service are ignored")
+    parser.add_argument("--record-jobs", default=None, metavar="PATH",
+                        help="write per-job records (pid, arrival, start, finish, cpu, "
+                             "queue length at arrival) to PATH (.npy or raw binary)")
+    parser.add_argument("--sample-interval", type=float, default=None, metavar="DT",
+                        help="sample queue length / busy CPUs / utilization every DT sec "
+                             "of simulated time")
+    parser.add_argument("--timeseries-out", default="timeseries.csv", metavar="PATH",
+                        help="CSV file for --sample-interval (default timeseries.csv)")
+    parser.add_argument("--checkpoint", default=None, metavar="PATH",
+                        help="checkpoint the simulator state to PATH (needs "
+                             "--checkpoint-every or --checkpoint-secs)")
+    parser.add_argument("--checkpoint-every", type=int, default=None, metavar="JOBS",
+                        help="checkpoint every JOBS completed jobs")
+    parser.add_argument("--checkpoint-secs", type=float, default=None, metavar="SECS",
+                        help="checkpoint every SECS seconds of wall time")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue from --checkpoint if it exists (same arguments as "
+                             "the run that wrote it)")
+    parser.add_argument("--interarrival", default="exp", metavar="SPEC",
+                        help="interarrival time distribution, scaled to mean 1/lambda: exp "
+                             "(default), det, lognormal:cv=C, pareto:alpha=A, hyperexp:cv=C, "
+                             "empirical:FILE (see distributions.py)")
+    parser.add_argument("--service", default="exp", metavar="SPEC",
+                        help="service time distribution, scaled to mean avg_service "
+                             "(same choices as --interarrival)")
+    parser.add_argument("--instrument", action="store_true",
+                        help="count + time the main loop per event kind and its hot helpers, "
+                             "print where the time went (slows the run down)")
+    parser.add_argument("--profile", default=None, metavar="PATH",
+                        help="run the main loop under cProfile, stats to PATH "
+                             "(python3 -m pstats PATH)")
+    parser.add_argument("--malloc-profile", default=None, metavar="PATH",
+                        help="trace allocations with tracemalloc, top sites to PATH")
+    parser.add_argument("--max-jobs", type=int, default=None,
+                        help="completions to run (default 10,000; with --precision "
+                             "it's a safety cap, default 10,000,000)")
+    args = parser.parse_args()
 
     try:
-        lmbda = float(sys.argv[1])
-        avg_service = float(sys.argv[2])
-        scenario = int(sys.argv[3])
-        num_cpus = int(sys.argv[4])
+        lmbda = float(args.lmbda)
+        avg_service = float(args.avg_service)
+        scenario = int(args.scenario)
+        num_cpus = int(args.num_cpus)
     except ValueError:
         print("Error: wrong argument types. Lambda + avg_service gotta be floats,")
         print("       scenario + num_cpus must be ints.")
@@ -298,7 +1172,58 @@ def main():
         print("Error: num_cpus needs to be at least 1, cant do zero lol")
         sys.exit(1)
 
-    stats = simulate(lmbda, avg_service, scenario, num_cpus, target_completions=10_000, seed=1)
+    if args.max_jobs is not None:
+        max_jobs = args.max_jobs
+    elif args.precision is not None:
+        max_jobs = 10_000_000
+    elif args.trace is not None:
+        max_jobs = sys.maxsize       # the whole trace
+    else:
+        max_jobs = 10_000
+
+    # --validate: solve it first, no point simulating if there's no formula
+    exact = None
+    if args.validate:
+        from analytic import compare, solve
+        if args.engine == "analytic" or args.trace is not None:
+            print("Error: --validate checks a simulated run (Poisson arrivals) against the "
+                  "formulas, use --engine event or numpy without --trace")
+            sys.exit(1)
+        try:
+            exact = solve(lmbda, avg_service, scenario, num_cpus, policy=args.policy,
+                          steal=args.steal, discipline=args.discipline,
+                          interarrival=args.interarrival, service=args.service)
+        except (OSError, ValueError) as e:
+            print(f"Error: can't validate this run analytically ({e})")
+            sys.exit(1)
+
+    try:
+        wall_start = time.perf_counter()
+        stats = simulate(lmbda, avg_service, scenario, num_cpus, target_completions=max_jobs, seed=1,
+                         engine=args.engine, rel_precision=args.precision,
+                         confidence=args.confidence, warmup=args.warmup,
+                         policy=args.policy, steal=args.steal,
+                         migration_cost=args.migration_cost, discipline=args.discipline,
+                         quantum=args.quantum, priority_classes=args.classes,
+                         event_list=args.event_list, trace=args.trace,
+                         record_jobs=args.record_jobs, sample_interval=args.sample_interval,
+                         checkpoint=args.checkpoint, checkpoint_every=args.checkpoint_every,
+                         checkpoint_secs=args.checkpoint_secs, resume=args.resume,
+                         instrument=args.instrument, profile=args.profile,
+                         malloc_profile=args.malloc_profile,
+                         interarrival=args.interarrival, service=args.service)
+        wall = time.perf_counter() - wall_start
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    if args.engine == "analytic":
+        print_analytic(stats, scenario, num_cpus, lmbda, avg_service)
+        return
+
+    check = None
+    if exact is not None:
+        check = compare(exact, stats)
 
     scenario_label = f"Scenario {scenario}: "
     if scenario == 1:
@@ -308,12 +1233,57 @@ def main():
 
     print(f"Scenario: \t\t\t{scenario_label}")
     print(f"Number of CPUs: \t\t{num_cpus}")
-    print(f"Arrival rate (lambda): \t\t{lmbda:.2f} processes/sec")
-    print(f"Avg service time: \t\t{avg_service:.4f} sec")
+    if args.discipline != "fcfs":
+        label = args.discipline + (f" (quantum {args.quantum} sec)" if args.quantum else "")
+        print(f"Discipline: \t\t\t{label}, {stats['preemptions']} preemptions")
+    if scenario == 1:
+        print(f"Dispatch policy: \t\t{stats['policy']}")
+        if args.steal:
+            print(f"Work stealing: \t\t\t{stats['steal']} ({stats['steals']} steals / "
+                  f"{stats['steal_attempts']} attempts, migration cost "
+                  f"{stats['migration_cost']:.6f} sec)")
+    if args.trace is not None:
+        # parsing vs simulating, so it's obvious which one is the bottleneck
+        sim_sec = wall - stats['trace_parse_sec']
+        print(f"Trace: \t\t\t\t{stats['trace']} ({stats['trace_records']} jobs read)")
+        print(f"Trace parse rate: \t\t{stats['trace_parse_rate']:,.0f} records/sec "
+              f"({stats['trace_parse_sec']:.3f} sec)")
+        print(f"Simulation rate: \t\t"
+              f"{stats['events'] / sim_sec if sim_sec > 0 else 0.0:,.0f} events/sec "
+              f"({sim_sec:.3f} sec)")
+    else:
+        print(f"Arrival rate (lambda): \t\t{lmbda:.2f} processes/sec")
+        print(f"Avg service time: \t\t{avg_service:.4f} sec")
+        print(f"Interarrival / service dist: \t{stats['interarrival_dist']} / "
+              f"{stats['service_dist']}")
     print(f"Completed: \t\t\t{stats['completed']}")
+    if args.checkpoint:
+        resumed = stats['resumed_at']
+        print(f"Checkpoints: \t\t\t{stats['checkpoints']} written to {args.checkpoint}"
+              + (f" (resumed at {resumed} jobs)" if resumed is not None else ""))
+    if args.warmup:
+        trunc = stats['mser_truncation']
+        print(f"Warm-up dropped: \t\t{stats['warmup_jobs']} jobs / {stats['warmup_time']:.6f} sec "
+              f"(MSER truncation: {'not found' if trunc is None else trunc})")
     print(f"Sim time:  \t\t\t{stats['time']:.6f} sec")
     print(f"Avg turnaround: \t\t{stats['avg_turnaround']:.6f} sec")
+    print(f"Turnaround p50/p95/p99/p99.9: \t{stats['turnaround_p50']:.6f} "
+          f"{stats['turnaround_p95']:.6f} {stats['turnaround_p99']:.6f} "
+          f"{stats['turnaround_p999']:.6f} sec")
+    print(f"Turnaround {args.confidence:.0%} CI: \t\t{stats['turnaround_ci_low']:.6f} "
+          f"{stats['turnaround_ci_high']:.6f} sec ({stats['ci_batches']} batches "
+          f"of {stats['ci_batch_size']})")
+    if stats['avg_turnaround_by_class'] is not None:
+        by_class = " ".join(f"{t:.6f}" for t in stats['avg_turnaround_by_class'])
+        print(f"Avg turnaround by class: \t{by_class} sec")
     print(f"Throughput:     \t\t{stats['throughput']:.6f} jobs/sec")
+    print(f"Peak jobs in memory: \t\t{stats['peak_resident_jobs']}")
+    if args.record_jobs:
+        print(f"Job records written: \t\t{stats['jobs_recorded']} ({args.record_jobs})")
+    if stats['timeseries'] is not None:
+        write_csv(stats['timeseries'], args.timeseries_out)
+        print(f"Time series: \t\t\t{len(stats['timeseries']['time'])} samples every "
+              f"{args.sample_interval} sec ({args.timeseries_out})")
 
     print(f"\nPer-CPU Utilization:")
     for i, util in enumerate(stats['cpu_utils']):
@@ -324,6 +1294,27 @@ def main():
 
     print(f"\nAvg ready queue length: \t{stats['avg_ready_q']:.6f}")
 
+    if args.hist:
+        print(f"\nTurnaround histogram: {stats['turnaround_hist']}")
+
+    if stats['avg_ready_q_per_cpu'] is not None:
+        print(f"\nReady queue length by CPU:")
+        for i, q_len in enumerate(stats['avg_ready_q_per_cpu']):
+            print(f"  Queue {i}: \t\t\t{q_len:.6f}")
+
+    if check is not None:
+        verdict = {True: "DISAGREES (exact value outside the CI)", False: "agrees",
+                   None: "not enough batches for a CI"}[check['disagree']]
+        print(f"\nAnalytic check: \t\texact {check['exact']:.6f} sec, simulated "
+              f"{check['simulated']:.6f} sec ({check['rel_error']:+.2%}) -> {verdict}")
+        print(f"  Utilization / queue error: \t{check['util_error']:+.2%} / "
+              f"{check['queue_error']:+.2%}")
+
+    if stats['instrumentation'] is not None:
+        from instrument import format_report
+        print(f"\nInstrumentation:")
+        print(format_report(stats['instrumentation']))
+
 
 if __name__ == "__main__":
     main()
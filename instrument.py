@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Opt-in instrumentation for hw5.simulate(instrument=True).
+
+When a sweep is slow, this says where the time goes:
+
+  - events popped per kind (arrival / departure / slice) and the wall time
+    spent on each kind (measured pop to pop, so a kind's time includes its
+    handler plus popping the next event)
+  - calls + inclusive wall time for the hot helpers (event list push/pop,
+    the random streams, dispatch, enqueue/dequeue, start_job, ...).
+    simulate() swaps its local shortcuts / nested helpers for timing
+    wrappers, so nothing is wrapped - and nothing costs anything - when
+    instrumentation is off
+  - high-water marks: pending events, total ready queue length, longest
+    single ready queue
+  - wall-clock events/sec of the main loop
+
+The wrappers roughly triple the cost of a cheap helper call (perf_counter
+twice + the extra call), so instrumented runs are several times slower;
+compare the shares, not the absolute numbers, with a normal run.
+
+Optional captures, written to files:
+  profile_file  cProfile stats of the main loop (python3 -m pstats FILE,
+                or snakeviz)
+  malloc_file   tracemalloc top allocation sites (by line) at the end of
+                the run, as text
+Asking for just a capture only turns on the cheap per-kind counters, not
+the helper wrappers (they'd swamp the cProfile output); with instrument=True
+as well you get both.
+"""
+
+import cProfile
+import time
+import tracemalloc
+
+
+KIND_NAMES = ("arrival", "departure", "slice")   # ARR, DEP, SLICE in hw5.py
+MALLOC_TOP = 30
+
+
+class Instrumentation:
+    """Counters + timers for one simulate() run (see module docstring)."""
+
+    def __init__(self, profile_file=None, malloc_file=None):
+        self.kind_count = [0] * len(KIND_NAMES)
+        self.kind_sec = [0.0] * len(KIND_NAMES)
+        self.calls = {}
+        self.seconds = {}
+        self.event_list_peak = 0
+        self.ready_q_peak = 0
+        self.queue_peak = 0
+        self.profile_file = profile_file
+        self.malloc_file = malloc_file
+        self.profiler = None
+        self.started_tracemalloc = False
+        self.loop_start = None
+        self.loop_sec = 0.0
+        self.mark = None
+        self.last_kind = None
+
+    def wrap(self, name, fn):
+        """
+        fn with a call counter + inclusive timer under `name`. wrapping a
+        new fn under the same name (e.g. after the MSER reset swaps the
+        histogram) keeps adding to the same counters.
+        """
+        self.calls.setdefault(name, 0)
+        self.seconds.setdefault(name, 0.0)
+        calls = self.calls
+        seconds = self.seconds
+        clock = time.perf_counter
+
+        def timed(*args):
+            t0 = clock()
+            result = fn(*args)
+            seconds[name] += clock() - t0
+            calls[name] += 1
+            return result
+        return timed
+
+    def wrap_push(self, push, event_list):
+        """Event list push that also tracks the pending-event high-water mark."""
+        timed = self.wrap("push_event", push)
+
+        def push_and_count(ev):
+            timed(ev)
+            n = len(event_list)
+            if n > self.event_list_peak:
+                self.event_list_peak = n
+        return push_and_count
+
+    def wrap_enqueue(self, enqueue, queue_lengths):
+        """
+        Timed enqueue_process that also tracks the ready queue peaks (queues
+        only ever grow in there, so that's the one place to look).
+        queue_lengths(cpu_id) = (length of the queue the job went into,
+        jobs waiting in all queues).
+        """
+        timed = self.wrap("enqueue_process", enqueue)
+
+        def enqueue_and_measure(job, cpu_id=None):
+            timed(job, cpu_id)
+            n, total = queue_lengths(cpu_id)
+            if n > self.queue_peak:
+                self.queue_peak = n
+            if total > self.ready_q_peak:
+                self.ready_q_peak = total
+        return enqueue_and_measure
+
+    def start_captures(self):
+        """tracemalloc from here (covers the setup too)."""
+        if self.malloc_file and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracemalloc = True
+
+    def loop_started(self):
+        """Right before the main loop: starts the clock (and cProfile)."""
+        if self.profile_file:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        self.loop_start = self.mark = time.perf_counter()
+
+    def tick(self, kind):
+        """Called after every pop: books the time since the previous pop."""
+        now = time.perf_counter()
+        if self.last_kind is not None:
+            self.kind_sec[self.last_kind] += now - self.mark
+        self.mark = now
+        self.last_kind = kind
+        self.kind_count[kind] += 1
+
+    def loop_done(self):
+        """Right after the main loop: stops the clock and writes the captures."""
+        now = time.perf_counter()
+        if self.last_kind is not None:
+            self.kind_sec[self.last_kind] += now - self.mark
+        self.loop_sec = now - self.loop_start
+        if self.profiler is not None:
+            self.profiler.disable()
+            self.profiler.dump_stats(self.profile_file)
+        if self.malloc_file and tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            with open(self.malloc_file, "w") as f:
+                f.write(f"traced memory: current {current} bytes, peak {peak} bytes\n")
+                f.write(f"top {MALLOC_TOP} allocation sites:\n")
+                for stat in snapshot.statistics("lineno")[:MALLOC_TOP]:
+                    f.write(f"{stat}\n")
+            if self.started_tracemalloc:
+                tracemalloc.stop()
+
+    def summary(self, events):
+        """The stats["instrumentation"] dict. events = events simulate() counted."""
+        wrapped = bool(self.calls)
+        return {
+            "events_by_kind": dict(zip(KIND_NAMES, self.kind_count)),
+            "seconds_by_kind": dict(zip(KIND_NAMES, self.kind_sec)),
+            "calls": dict(self.calls),
+            "seconds": dict(self.seconds),
+            "ns_per_call": {name: self.seconds[name] / n * 1e9
+                            for name, n in self.calls.items() if n},
+            # peaks are watched by the wrappers, None without them
+            "event_list_peak": self.event_list_peak if wrapped else None,
+            "ready_q_peak": self.ready_q_peak if wrapped else None,
+            "queue_peak": self.queue_peak if wrapped else None,
+            "loop_sec": self.loop_sec,
+            "events_per_sec": events / self.loop_sec if self.loop_sec > 0 else 0.0,
+            "profile_file": self.profile_file,
+            "malloc_file": self.malloc_file,
+        }
+
+
+def format_report(inst):
+    """Human-readable version of a stats["instrumentation"] dict (hw5.py --instrument)."""
+    lines = [f"Main loop: {inst['loop_sec']:.3f} sec, {inst['events_per_sec']:,.0f} events/sec"]
+    total = inst["loop_sec"] or 1.0
+    for kind, n in inst["events_by_kind"].items():
+        if n:
+            sec = inst["seconds_by_kind"][kind]
+            lines.append(f"  {kind:<22}{n:>10} events {sec:>9.3f} sec ({sec / total:>5.1%})"
+                         f" {sec / n * 1e9:>7.0f} ns/event")
+    if inst["calls"]:
+        lines.append("Helpers (inclusive, incl. timer overhead):")
+    for name in sorted(inst["seconds"], key=inst["seconds"].get, reverse=True):
+        n = inst["calls"][name]
+        if n:
+            sec = inst["seconds"][name]
+            lines.append(f"  {name:<22}{n:>10} calls {sec:>9.3f} sec ({sec / total:>5.1%})"
+                         f" {inst['ns_per_call'][name]:>7.0f} ns/call")
+    if inst["calls"]:
+        lines.append(f"Peaks: {inst['event_list_peak']} pending events, ready queue total "
+                     f"{inst['ready_q_peak']}, longest single queue {inst['queue_peak']}")
+    for key, label in (("profile_file", "cProfile stats"), ("malloc_file", "tracemalloc report")):
+        if inst[key]:
+            lines.append(f"{label}: {inst[key]}")
+    return "\n".join(lines)
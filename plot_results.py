@@ -9,6 +9,11 @@ Generates the following plots:
 4. Average Ready Queue Length vs Lambda
 
 Each plot shows both scenarios for comparison.
+
+With --timeseries FILE it plots a time series from
+`hw5.py --sample-interval DT` instead (queue length, busy CPUs and
+windowed utilization over simulated time):
+  python3 plot_results.py --timeseries timeseries.csv
 """
 
 import matplotlib
@@ -17,6 +22,8 @@ import matplotlib.pyplot as plt
 import csv
 import sys
 
+from timeseries import read_csv as read_timeseries
+
 
 def read_csv_data(csv_file):
     """
@@ -33,6 +40,12 @@ def read_csv_data(csv_file):
     with open(csv_file, 'r') as f:
         reader = csv.DictReader(f)
         for row in reader:
+            # only the original random routing for scenario 1 (sweeps with
+            # --policies / --steal / --disciplines have extra rows)
+            if row.get('policy', 'random') not in ('random', 'global'):
+                continue
+            if row.get('steal', 'none') != 'none' or row.get('discipline', 'fcfs') != 'fcfs':
+                continue
             scenario = int(row['scenario'])
             data_dict = scenario1 if scenario == 1 else scenario2
 
@@ -192,6 +205,55 @@ def create_individual_plots(scenario1, scenario2, output_dir="."):
         plt.close()
 
 
+def create_timeseries_plot(ts_file="timeseries.csv", output_dir="."):
+    """
+    Time series panel: ready queue length (instant + window avg) and busy
+    CPUs on top, windowed utilization below, both against simulated time.
+    """
+    try:
+        ts = read_timeseries(ts_file)
+    except FileNotFoundError:
+        print(f"[ERROR] Could not find {ts_file}")
+        print("  Run 'python3 hw5.py ... --sample-interval 0.5' first.")
+        sys.exit(1)
+    print(f"[OK] Loaded {len(ts['time'])} samples from {ts_file}")
+
+    fig, (ax_q, ax_u) = plt.subplots(2, 1, figsize=(12, 8), sharex=True)
+    fig.suptitle('Queue Length and Utilization over Time', fontsize=16, fontweight='bold')
+
+    # ====================================================================
+    # TOP: queue length + busy CPUs
+    # ====================================================================
+    ax_q.plot(ts['time'], ts['ready_q'], linewidth=0.6, alpha=0.5,
+              label='Ready queue (instant)', color='#1f77b4')
+    ax_q.plot(ts['time'], ts['avg_ready_q'], linewidth=1.5,
+              label='Ready queue (window avg)', color='#ff7f0e')
+    ax_q.set_ylabel('Jobs waiting', fontsize=11)
+    ax_q.grid(True, alpha=0.3)
+    ax_busy = ax_q.twinx()
+    ax_busy.step(ts['time'], ts['busy_cpus'], where='post', linewidth=0.8,
+                 label='Busy CPUs', color='#2ca02c')
+    ax_busy.set_ylabel('Busy CPUs', fontsize=11)
+    lines = ax_q.get_legend_handles_labels()
+    busy_lines = ax_busy.get_legend_handles_labels()
+    ax_q.legend(lines[0] + busy_lines[0], lines[1] + busy_lines[1], loc='upper left')
+
+    # ====================================================================
+    # BOTTOM: utilization per window
+    # ====================================================================
+    ax_u.plot(ts['time'], ts['utilization'], linewidth=1.2, color='#d62728')
+    ax_u.set_xlabel('Simulated time (sec)', fontsize=11)
+    ax_u.set_ylabel('CPU utilization (window)', fontsize=11)
+    ax_u.set_ylim(bottom=0, top=1.05)
+    ax_u.grid(True, alpha=0.3)
+
+    plt.tight_layout()
+    output_file = f"{output_dir}/hw5_timeseries.png"
+    plt.savefig(output_file, dpi=200, bbox_inches='tight')
+    plt.close()
+    print(f"[OK] Saved time series plot to {output_file}")
+
+
 def print_summary_stats(csv_file="results.csv"):
     """
     Print summary statistics for the report.
@@ -231,6 +293,10 @@ def main():
     """
     Main function to create all plots and print statistics.
     """
+    if len(sys.argv) == 3 and sys.argv[1] == "--timeseries":
+        create_timeseries_plot(sys.argv[2])
+        return
+
     print("Creating plots for HW5 results...\n")
 
     # Create the plots
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Per-job record export for hw5.simulate(record_jobs=...).
+
+The stats dict only has aggregates, so anything new (wait time by CPU,
+turnaround vs queue length seen at arrival, ...) used to mean editing hw5.py
+and rerunning. With a recorder on, simulate() writes one fixed-width record
+per finished job and that can be analyzed offline as often as you like:
+
+    pid        int64    job id (arrival order)
+    arrival    float64  arrival time
+    start      float64  first time it got a CPU (srpt/rr jobs can be
+                        interrupted later, this is still the first start)
+    finish     float64  departure time
+    cpu        int32    CPU it finished on
+    queue_len  int32    jobs already waiting in the queue it joined
+                        (its CPU's queue in scenario 1, the global one in 2)
+
+Records are packed into a CHUNK-record buffer and written out when it
+fills, so memory stays bounded no matter how long the run is. Two file
+formats, picked by the file name:
+
+  *.npy      a regular numpy .npy file (structured array, JOB_DTYPE).
+             the header is written by hand, so recording doesn't need numpy
+  anything   16 byte header: MAGIC + uint64 record count, then 40 byte
+  else       little-endian "<qdddii" records
+
+load_jobs() gives the structured array back (memory-mapped, needs numpy),
+iter_jobs() reads records as tuples without numpy.
+
+CLI:
+  python3 recorder.py summary jobs.npy
+"""
+
+import argparse
+import ast
+import struct
+import sys
+
+try:
+    import numpy as np
+except ImportError:  # only load_jobs() needs it
+    np = None
+
+
+MAGIC = b"HW5JOB1\0"
+HEADER = struct.Struct("<8sQ")       # magic + record count
+RECORD = struct.Struct("<qdddii")    # pid, arrival, start, finish, cpu, queue_len
+CHUNK = 65536                        # records buffered before a write
+
+JOB_DTYPE = [("pid", "<i8"), ("arrival", "<f8"), ("start", "<f8"),
+             ("finish", "<f8"), ("cpu", "<i4"), ("queue_len", "<i4")]
+
+# .npy v1.0: magic + version + uint16 header length + header dict, padded so
+# the data starts at NPY_DATA_OFFSET. fixed size so close() can rewrite the
+# shape in place once the record count is known
+NPY_MAGIC = b"\x93NUMPY\x01\x00"
+NPY_DATA_OFFSET = 256
+
+
+def _npy_header(count):
+    header = (f"{{'descr': {JOB_DTYPE!r}, 'fortran_order': False, "
+              f"'shape': ({count},), }}")
+    pad = NPY_DATA_OFFSET - len(NPY_MAGIC) - 2 - len(header) - 1
+    header = header + " " * pad + "\n"
+    return NPY_MAGIC + struct.pack("<H", len(header)) + header.encode("latin1")
+
+
+class JobRecorder:
+    """
+    Collects per-job records during a run and writes them in chunks.
+
+    simulate() calls arrived() when a job shows up, started() every time a
+    job gets a CPU and finished() when it departs. Jobs in flight are kept in
+    a dict (pid -> [queue_len, start]), so that's O(jobs in system) too.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.npy = path.endswith(".npy")
+        self.f = open(path, "wb")
+        self.f.write(_npy_header(0) if self.npy else HEADER.pack(MAGIC, 0))
+        self.count = 0
+        self.buf = bytearray(CHUNK * RECORD.size)
+        self.n = 0
+        self.in_flight = {}
+
+    def arrived(self, pid, queue_len):
+        self.in_flight[pid] = [queue_len, -1.0]
+
+    def started(self, pid, now):
+        info = self.in_flight[pid]
+        if info[1] < 0.0:
+            info[1] = now
+
+    def finished(self, pid, arrival, now, cpu):
+        queue_len, start = self.in_flight.pop(pid)
+        RECORD.pack_into(self.buf, self.n * RECORD.size,
+                         pid, arrival, start, now, cpu, queue_len)
+        self.n += 1
+        if self.n == CHUNK:
+            self.flush()
+
+    def flush(self):
+        self.f.write(memoryview(self.buf)[:self.n * RECORD.size])
+        self.count += self.n
+        self.n = 0
+
+    def close(self):
+        """Writes what's left and fills in the record count."""
+        if self.f.closed:
+            return
+        self.flush()
+        self.f.seek(0)
+        self.f.write(_npy_header(self.count) if self.npy else HEADER.pack(MAGIC, self.count))
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _data_offset(path):
+    """(byte offset of the first record, record count) for a job file."""
+    with open(path, "rb") as f:
+        head = f.read(NPY_DATA_OFFSET)
+    if head.startswith(NPY_MAGIC[:6]):
+        hlen = struct.unpack_from("<H", head, 8)[0]
+        header = ast.literal_eval(head[10:10 + hlen].decode("latin1"))
+        return 10 + hlen, header["shape"][0]
+    magic, count = HEADER.unpack_from(head, 0)
+    if magic != MAGIC:
+        raise ValueError(f"{path}: not a job record file")
+    return HEADER.size, count
+
+
+def load_jobs(path):
+    """
+    The records as a numpy structured array (JOB_DTYPE), memory-mapped so a
+    huge file doesn't get read in all at once. e.g.
+        jobs = load_jobs("jobs.npy")
+        wait = jobs["start"] - jobs["arrival"]
+    """
+    if np is None:
+        raise RuntimeError("load_jobs needs numpy (iter_jobs works without)")
+    offset, count = _data_offset(path)
+    if count == 0:
+        return np.zeros(0, dtype=JOB_DTYPE)
+    return np.memmap(path, dtype=JOB_DTYPE, mode="r", offset=offset, shape=(count,))
+
+
+def iter_jobs(path):
+    """Yields (pid, arrival, start, finish, cpu, queue_len) tuples, no numpy needed."""
+    offset, count = _data_offset(path)
+    with open(path, "rb") as f:
+        f.seek(offset)
+        left = count
+        while left:
+            n = min(left, CHUNK)
+            data = f.read(n * RECORD.size)
+            yield from RECORD.iter_unpack(data)
+            left -= n
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HW5 per-job record files")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("summary", help="job count, avg wait / turnaround, jobs per CPU")
+    p.add_argument("path")
+    args = parser.parse_args()
+
+    try:
+        n = 0
+        sum_wait = sum_turnaround = 0.0
+        per_cpu = {}
+        for pid, arrival, start, finish, cpu, queue_len in iter_jobs(args.path):
+            n += 1
+            sum_wait += start - arrival
+            sum_turnaround += finish - arrival
+            per_cpu[cpu] = per_cpu.get(cpu, 0) + 1
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    print(f"Jobs: \t\t\t{n}")
+    if n:
+        print(f"Avg wait: \t\t{sum_wait / n:.6f} sec")
+        print(f"Avg turnaround: \t{sum_turnaround / n:.6f} sec")
+        print("Jobs by CPU:")
+        for cpu in sorted(per_cpu):
+            print(f"  CPU {cpu}: \t\t{per_cpu[cpu]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Persistent result cache for run_experiments.py.
+
+Every sweep used to rerun every grid point and overwrite results.csv, even
+if only one lambda changed. Now each finished point is stored in a SQLite
+file under a content hash of everything that determines its result:
+
+    sha256(simulate() args incl. seed + engine, code version, variates.BACKEND)
+
+"code version" is a hash of the simulator's source files (SOURCE_FILES), so
+editing any of them automatically misses the old entries - no stale numbers
+after a bug fix. variates.BACKEND is in there too since numpy vs stdlib
+random give different streams.
+
+A sweep looks every point up first and only simulates the misses. Points
+are stored (and committed) one at a time as they finish, so a sweep that
+crashes or gets killed picks up where it left off next time.
+
+The file is kept under a size limit by throwing out the least recently
+used entries. CLI:
+  python3 result_cache.py info            # entries, size, current code version
+  python3 result_cache.py prune           # drop entries from older code versions
+  python3 result_cache.py clear           # drop everything
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+
+import variates
+
+
+DEFAULT_PATH = ".hw5_cache.sqlite"
+DEFAULT_MAX_MB = 256
+
+# whatever can change a result (or the row built from it)
+SOURCE_FILES = ("hw5.py", "fast_engines.py", "variates.py", "dispatch.py", "disciplines.py",
+                "eventlist.py", "histogram.py", "simstats.py", "run_experiments.py",
+                "analytic.py", "distributions.py")
+
+_code_versions = {}
+
+
+def code_version(files=SOURCE_FILES):
+    """Short hash of the source files in `files` (computed once per process per list)."""
+    version = _code_versions.get(files)
+    if version is None:
+        here = os.path.dirname(os.path.abspath(__file__))
+        h = hashlib.sha256()
+        for name in files:
+            h.update(name.encode())
+            with open(os.path.join(here, name), "rb") as f:
+                h.update(f.read())
+        version = _code_versions[files] = h.hexdigest()[:16]
+    return version
+
+
+def task_key(task):
+    """Content hash for one grid point (a dict of simulate() args)."""
+    blob = json.dumps({"task": task, "code": code_version(), "rng": variates.BACKEND},
+                      sort_keys=True)
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    SQLite-backed {task -> CSV row} store with LRU eviction.
+
+    Params:
+        path: the cache file (created if missing)
+        max_bytes: rows are evicted, least recently used first, once their
+                   total size goes over this
+    """
+
+    def __init__(self, path=DEFAULT_PATH, max_bytes=DEFAULT_MAX_MB * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.db = sqlite3.connect(path)
+        self.db.execute("""CREATE TABLE IF NOT EXISTS results (
+                               key TEXT PRIMARY KEY,
+                               code_version TEXT NOT NULL,
+                               params TEXT NOT NULL,
+                               row TEXT NOT NULL,
+                               size INTEGER NOT NULL,
+                               last_used REAL NOT NULL)""")
+        self.db.execute("CREATE INDEX IF NOT EXISTS results_lru ON results (last_used)")
+        self.db.commit()
+        self.total_bytes = self.db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, task):
+        """The cached row for task, or None."""
+        key = task_key(task)
+        found = self.db.execute("SELECT row FROM results WHERE key = ?", (key,)).fetchone()
+        if found is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.db.execute("UPDATE results SET last_used = ? WHERE key = ?", (time.time(), key))
+        self.db.commit()
+        return json.loads(found[0])
+
+    def put(self, task, row):
+        """Stores a finished point (committed right away) and evicts if over the limit."""
+        key = task_key(task)
+        params = json.dumps(task, sort_keys=True)
+        data = json.dumps(row)
+        size = len(key) + len(params) + len(data)
+        old = self.db.execute("SELECT size FROM results WHERE key = ?", (key,)).fetchone()
+        self.db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+                        (key, code_version(), params, data, size, time.time()))
+        self.total_bytes += size - (old[0] if old else 0)
+        if self.total_bytes > self.max_bytes:
+            self.evict(self.max_bytes)
+        self.db.commit()
+
+    def evict(self, max_bytes):
+        """Drops least recently used rows until the total is <= max_bytes."""
+        rows = self.db.execute("SELECT key, size FROM results ORDER BY last_used").fetchall()
+        dropped = []
+        for key, size in rows:
+            if self.total_bytes <= max_bytes:
+                break
+            dropped.append((key,))
+            self.total_bytes -= size
+        self.db.executemany("DELETE FROM results WHERE key = ?", dropped)
+        self.db.commit()
+        return len(dropped)
+
+    def prune(self):
+        """Drops entries made by other code versions (they can never hit again)."""
+        n = self.db.execute("DELETE FROM results WHERE code_version != ?",
+                            (code_version(),)).rowcount
+        self.db.commit()
+        self.total_bytes = self.db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        return n
+
+    def clear(self):
+        """Drops everything."""
+        n = self.db.execute("DELETE FROM results").rowcount
+        self.db.commit()
+        self.db.execute("VACUUM")
+        self.total_bytes = 0
+        return n
+
+    def info(self):
+        """(entries, entries from the current code version, bytes of row data)."""
+        entries = self.db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        current = self.db.execute("SELECT COUNT(*) FROM results WHERE code_version = ?",
+                                  (code_version(),)).fetchone()[0]
+        return entries, current, self.total_bytes
+
+    def close(self):
+        self.db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HW5 sweep result cache")
+    parser.add_argument("command", choices=("info", "prune", "clear"))
+    parser.add_argument("--cache", default=DEFAULT_PATH, help=f"cache file (default {DEFAULT_PATH})")
+    args = parser.parse_args()
+
+    try:
+        cache = ResultCache(args.cache)
+    except sqlite3.Error as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    if args.command == "info":
+        entries, current, size = cache.info()
+        print(f"Cache: \t\t\t{args.cache}")
+        print(f"Code version: \t\t{code_version()}")
+        print(f"Entries: \t\t{entries} ({current} from this code version)")
+        print(f"Size: \t\t\t{size / 1024:.1f} KB of results")
+    elif args.command == "prune":
+        print(f"Dropped {cache.prune()} stale entries")
+    else:
+        print(f"Dropped {cache.clear()} entries")
+    cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,142 +2,583 @@
 """
 Helper script to run all experiments for HW5 and save results to CSV.
 
-This script runs the simulator for:
+By default this runs the simulator for:
 - Lambda values: 50 to 150 in steps of 10 (11 values)
 - Average service time: 0.02 seconds (fixed)
 - Both scenarios (1 and 2)
 - 4 CPUs (fixed)
 
+Every grid point calls hw5.simulate() directly (no subprocess, no parsing
+printed output), spread over a process pool. Rows are written to the CSV as
+soon as each point finishes, so a big sweep can be watched / used while it
+is still running. See --help for the grid, worker and chunking options.
+
+Finished points also go into a result cache (result_cache.py, SQLite), so
+rerunning a sweep only simulates the points that changed or never finished.
+--no-cache turns it off.
+
+--adaptive treats the lambda grid as a coarse start and keeps splitting the
+intervals where the turnaround curve bends or is noisy (AdaptiveRefiner),
+until the sweep has simulated --budget-events events in total.
+
 Results are saved to results.csv for easy plotting.
 """
 
-import subprocess
+import argparse
 import csv
+import itertools
+import multiprocessing
+import os
 import sys
+import time
+
+import hw5
+from analytic import compare, solve
+from distributions import parse_spec
+from result_cache import DEFAULT_MAX_MB, DEFAULT_PATH, ResultCache
+
+
+# stats keys copied straight into the CSV (a few get renamed, see stats_to_row)
+STAT_COLUMNS = [
+    "completed", "avg_turnaround", "throughput", "avg_ready_q", "policy",
+    "steal", "steals", "steal_attempts", "migration_cost",
+    "discipline", "quantum", "preemptions",
+    "turnaround_p50", "turnaround_p95", "turnaround_p99", "turnaround_p999",
+    "turnaround_hist", "turnaround_ci_low", "turnaround_ci_high", "turnaround_ci_rel_hw",
+    "ci_batches", "ci_batch_size", "warmup_time", "warmup_jobs", "mser_truncation",
+    "events", "peak_resident_jobs", "interarrival_dist", "service_dist",
+]
+
+PARAM_COLUMNS = ["lambda", "avg_service", "scenario", "num_cpus", "engine", "seed"]
+
+# --validate: exact answer next to the simulated one (empty if there's no formula)
+VALIDATE_COLUMNS = ["analytic_avg_turnaround", "analytic_rel_error", "analytic_disagree"]
+
+
+def parse_values(text, cast=float):
+    """
+    Parses a grid axis: either "start:stop:step" (stop included, like the
+    old range(50, 151, 10)) or a comma separated list "50,75,100".
+    """
+    if ":" in text:
+        start, stop, step = (cast(x) for x in text.split(":"))
+        values = []
+        i = 0
+        while True:
+            v = start + i * step
+            if v > stop + 1e-9 * abs(step):
+                break
+            values.append(cast(v) if cast is int else round(v, 10))
+            i += 1
+        return values
+    return [cast(x) for x in text.split(",") if x]
+
+
+def parse_steal_modes(text):
+    """"none,longest" -> [None, "longest"] (None = no work stealing)."""
+    return [None if m == "none" else m for m in text.split(",") if m]
+
+
+def csv_fieldnames(max_cpus):
+    """All CSV columns for a sweep whose biggest point has max_cpus CPUs."""
+    names = set(PARAM_COLUMNS) | set(STAT_COLUMNS) | set(VALIDATE_COLUMNS) | {
+        "sim_time", "avg_cpu_util", "avg_turnaround_by_class"}
+    for i in range(max_cpus):
+        names.add(f"cpu{i}_util")
+        names.add(f"cpu{i}_ready_q")
+    # Sort keys for consistent column order
+    return sorted(names)
+
+
+def stats_to_row(task, stats):
+    """Flattens one simulate() result (+ its parameters) into a CSV row."""
+    row = {
+        "lambda": task["lmbda"],
+        "avg_service": task["avg_service"],
+        "scenario": task["scenario"],
+        "num_cpus": task["num_cpus"],
+        "engine": task["engine"],
+        "seed": task["seed"],
+        "sim_time": stats["time"],
+    }
+    for key in STAT_COLUMNS:
+        row[key] = stats[key]
+
+    # priority classes: "class0;class1;..." in one cell
+    if stats["avg_turnaround_by_class"] is not None:
+        row["avg_turnaround_by_class"] = ";".join(str(t) for t in stats["avg_turnaround_by_class"])
+
+    utils = stats["cpu_utils"]
+    row["avg_cpu_util"] = sum(utils) / len(utils)
+    for i, util in enumerate(utils):
+        row[f"cpu{i}_util"] = util
 
+    if stats["avg_ready_q_per_cpu"] is not None:
+        for i, q_len in enumerate(stats["avg_ready_q_per_cpu"]):
+            row[f"cpu{i}_ready_q"] = q_len
 
-def run_simulation(lmbda, avg_service, scenario, num_cpus):
+    return row
+
+
+def run_simulation(task):
     """
-    Run a single simulation and parse the output.
+    Run a single simulation for one grid point (a dict of simulate() args).
+
+    Runs inside a worker process, so errors come back as a value instead of
+    killing the whole sweep.
 
-    Returns a dictionary with all metrics.
+    Returns (task, row, error) - row is None if it failed.
     """
-    cmd = ["python3", "hw5.py", str(lmbda), str(avg_service), str(scenario), str(num_cpus)]
+    try:
+        stats = hw5.simulate(task["lmbda"], task["avg_service"], task["scenario"],
+                             task["num_cpus"], target_completions=task["max_jobs"],
+                             seed=task["seed"], engine=task["engine"],
+                             rel_precision=task["precision"], warmup=task["warmup"],
+                             policy=task["policy"], steal=task["steal"],
+                             migration_cost=task["migration_cost"],
+                             discipline=task["discipline"], quantum=task["quantum"],
+                             priority_classes=task["classes"],
+                             interarrival=task["interarrival"], service=task["service"])
+        row = stats_to_row(task, stats)
+        if task["validate"] and task["engine"] != "analytic":
+            add_analytic_check(task, stats, row)
+        return task, row, None
+    except Exception as e:
+        return task, None, f"{type(e).__name__}: {e}"
+
 
+def add_analytic_check(task, stats, row):
+    """
+    --validate: puts the exact mean turnaround (analytic.py) and whether the
+    run's CI misses it into the row. Points without a closed form (or past
+    saturation) just get empty columns.
+    """
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        output = result.stdout
-
-        # Parse the output to extract metrics
-        metrics = {
-            "lambda": lmbda,
-            "avg_service": avg_service,
-            "scenario": scenario,
-            "num_cpus": num_cpus,
-        }
-
-        # Parse line by line
-        for line in output.split('\n'):
-            if "Completed:" in line:
-                metrics["completed"] = int(line.split()[-1])
-            elif "Sim time:" in line:
-                metrics["sim_time"] = float(line.split()[-2])
-            elif "Avg turnaround:" in line:
-                metrics["avg_turnaround"] = float(line.split()[-2])
-            elif "Throughput:" in line:
-                metrics["throughput"] = float(line.split()[-2])
-            elif "Average:" in line and "CPU" not in line:
-                # This is the average CPU utilization line
-                metrics["avg_cpu_util"] = float(line.split()[-1])
-            elif "Avg ready queue length:" in line:
-                metrics["avg_ready_q"] = float(line.split()[-1])
-
-        # Also parse individual CPU utilizations
-        cpu_utils = []
-        in_cpu_section = False
-        for line in output.split('\n'):
-            if "Per-CPU Utilization:" in line:
-                in_cpu_section = True
+        exact = solve(task["lmbda"], task["avg_service"], task["scenario"], task["num_cpus"],
+                      policy=task["policy"], steal=task["steal"],
+                      discipline=task["discipline"], interarrival=task["interarrival"],
+                      service=task["service"])
+    except ValueError:
+        return
+    check = compare(exact, stats)
+    row["analytic_avg_turnaround"] = check["exact"]
+    row["analytic_rel_error"] = check["rel_error"]
+    row["analytic_disagree"] = check["disagree"]
+
+
+def build_tasks(args):
+    """
+    Every (scenario, num_cpus, lambda) combination as simulate() args.
+    Every discipline runs in both scenarios. Scenario 1 also gets one run
+    per dispatch policy x steal mode; scenario 2 has one global queue, so
+    those don't apply to it.
+    """
+    if args.max_jobs is not None:
+        max_jobs = args.max_jobs
+    elif args.precision is not None:
+        max_jobs = 10_000_000
+    else:
+        max_jobs = 10_000
+
+    # canonical spec strings (an empirical file's includes its checksum, so
+    # editing the file misses the cache)
+    interarrival = parse_spec(args.interarrival).describe()
+    service = parse_spec(args.service).describe()
+
+    tasks = []
+    for scenario in args.scenarios:
+        if scenario == 1:
+            variants = [(p, s) for p in args.policies for s in args.steal]
+        else:
+            variants = [("random", None)]
+        for (policy, steal), discipline in itertools.product(variants, args.disciplines):
+            for num_cpus in args.cpus:
+                for lmbda in args.lambdas:
+                    tasks.append({
+                        "lmbda": lmbda, "avg_service": args.avg_service,
+                        "scenario": scenario, "num_cpus": num_cpus,
+                        "engine": args.engine, "seed": args.seed,
+                        "max_jobs": max_jobs, "precision": args.precision,
+                        "warmup": args.warmup, "policy": policy, "steal": steal,
+                        "migration_cost": args.migration_cost,
+                        "discipline": discipline, "quantum": args.quantum,
+                        "classes": args.classes, "validate": args.validate,
+                        "interarrival": interarrival, "service": service,
+                    })
+    return tasks
+
+
+def curve_key(task):
+    """Everything about a task except lambda - one curve of an adaptive sweep."""
+    return tuple(sorted((k, v) for k, v in task.items() if k != "lmbda"))
+
+
+class AdaptiveRefiner:
+    """
+    Adaptive lambda grid (--adaptive): after the coarse grid has run, keeps
+    bisecting the lambda intervals where the turnaround curve is least
+    known, across all curves (scenario x CPU count x policy / steal /
+    discipline), until the sweep has used its compute budget.
+
+    An interval's score is a rough estimate of how wrong the curve can be
+    in there, relative to the turnaround itself:
+
+        (|f''| * h^2 / 8  +  avg CI half-width of its ends) / avg turnaround
+
+    where f'' is the larger second divided difference at its two ends, so
+    h^2/8 * |f''| is the error of drawing a straight line across it. That's
+    big at the saturation knee (curvature) and where runs are noisy (CI),
+    and tiny on the flat part.
+
+    Points don't cost the same: with --precision a run goes until its CI is
+    tight enough, so a point near the knee can simulate hundreds of times
+    more events than one on the flat part. So the budget is simulated
+    events (stats["events"], summed over every finished point, cached ones
+    and the coarse grid included) and a new point's expected cost is the
+    more expensive of its two neighbours. Every round bisects the intervals
+    scoring above tol (at most per_round of them, never closer than min_gap
+    apart) that still fit in the budget, best gain per expected event
+    first. The gain is only the straight-line part of the score - that's
+    what a bisection shrinks (4x); the CIs of the ends stay what they are,
+    and with --precision they're about the same everywhere. Analytic points
+    cost nothing, so only tol / min_gap stop those.
+
+    Params:
+        budget: total simulated events for the whole sweep
+        tol: intervals scoring below this are good enough
+        min_gap: smallest lambda spacing it will create
+        per_round: bisections per round (more = better use of a big worker
+                   pool, fewer = smarter choices)
+    """
+
+    def __init__(self, budget, tol=0.01, min_gap=0.5, per_round=4):
+        self.budget = budget
+        self.tol = tol
+        self.min_gap = min_gap
+        self.per_round = per_round
+        self.spent = 0
+        self.curves = {}     # curve key -> {lmbda: row or None (failed)}
+        self.templates = {}  # curve key -> a task to copy for new points
+
+    def __call__(self, finished):
+        for task, row in finished:
+            key = curve_key(task)
+            self.curves.setdefault(key, {})[task["lmbda"]] = row
+            self.templates[key] = task
+            if row is not None:
+                self.spent += row["events"]
+
+        candidates = []
+        for key, points in self.curves.items():
+            for gain, score, cost, lmbda in self.pick(points):
+                candidates.append(((gain / cost, score / cost), cost, key, lmbda))
+        candidates.sort(key=lambda c: c[0], reverse=True)
+
+        left = self.budget - self.spent
+        new_tasks = []
+        for _, cost, key, lmbda in candidates:
+            if len(new_tasks) == self.per_round:
+                break
+            if cost > left:
+                continue        # a cheaper interval may still fit
+            left -= cost
+            new_tasks.append(dict(self.templates[key], lmbda=lmbda))
+        return new_tasks
+
+    def pick(self, points):
+        """
+        This curve's intervals scoring above tol, as (gain, score, expected
+        events, midpoint); gain = the straight-line part of the score.
+        """
+        known = sorted((lam, row) for lam, row in points.items() if row is not None)
+        if len(known) < 2:
+            return []
+        lams = [lam for lam, _ in known]
+        f = [row["avg_turnaround"] for _, row in known]
+        hw = [(row["turnaround_ci_high"] - row["turnaround_ci_low"]) / 2.0 for _, row in known]
+        hw = [h if h == h else 0.0 for h in hw]     # nan (too few batches) -> no info
+        cost = [max(row["events"], 1) for _, row in known]
+        n = len(lams)
+
+        # second divided differences at the interior points
+        d2 = [0.0] * n
+        for j in range(1, n - 1):
+            h0 = lams[j] - lams[j - 1]
+            h1 = lams[j + 1] - lams[j]
+            d2[j] = 2.0 * ((f[j + 1] - f[j]) / h1 - (f[j] - f[j - 1]) / h0) / (h0 + h1)
+        if n > 2:
+            d2[0], d2[-1] = d2[1], d2[-2]
+
+        scored = []
+        for i in range(n - 1):
+            h = lams[i + 1] - lams[i]
+            mid = round((lams[i] + lams[i + 1]) / 2.0, 6)
+            if h / 2.0 < self.min_gap or mid in points:
+                continue
+            line = max(abs(d2[i]), abs(d2[i + 1])) * h * h / 8.0
+            noise = (hw[i] + hw[i + 1]) / 2.0
+            scale = (abs(f[i]) + abs(f[i + 1])) / 2.0
+            if scale <= 0:
                 continue
-            if in_cpu_section and "CPU " in line and ":" in line:
-                if "Average:" in line:
-                    break  # End of CPU section
-                util = float(line.split()[-1])
-                cpu_utils.append(util)
+            score = (line + noise) / scale
+            if score > self.tol:
+                scored.append((line / scale, score, max(cost[i], cost[i + 1]), mid))
+        return scored
+
+    def summary(self):
+        """One line per curve: points, events and the lambda spacing it ended up with."""
+        lines = [f"  {self.spent:,} of {self.budget:,} budgeted events simulated"]
+        for key, points in self.curves.items():
+            task = self.templates[key]
+            lams = sorted(points)
+            gaps = [b - a for a, b in zip(lams, lams[1:])] or [0.0]
+            events = sum(row["events"] for row in points.values() if row is not None)
+            label = task_label(dict(task, lmbda=f"{lams[0]}..{lams[-1]}"))
+            lines.append(f"  {label}: {len(lams)} points, {events:,} events, "
+                         f"spacing {min(gaps):g} - {max(gaps):g}")
+        return lines
+
+
+def task_label(task):
+    """Short description of a grid point for the progress lines."""
+    label = f"λ={task['lmbda']}, scenario={task['scenario']}, cpus={task['num_cpus']}"
+    if task["scenario"] == 1 and task["policy"] != "random":
+        label += f", policy={task['policy']}"
+    if task["steal"] is not None:
+        label += f", steal={task['steal']}"
+    if task["discipline"] != "fcfs":
+        label += f", {task['discipline']}"
+    if task["interarrival"] != "exp" or task["service"] != "exp":
+        label += f", {task['interarrival']}/{task['service']}"
+    return label
+
+
+def format_eta(seconds):
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    return f"{seconds // 60}m{seconds % 60:02d}s"
+
+
+def run_sweep(tasks, output_file, workers=1, chunksize=1, cache=None, refine=None):
+    """
+    Runs every task and streams rows into output_file as they finish.
+
+    workers=1 runs everything in this process (handy for debugging).
+    cache: a result_cache.ResultCache - points already in it are written
+    straight from the cache, everything else gets simulated and stored.
+    refine: optional callable (adaptive sweeps, see AdaptiveRefiner). Gets
+    the [(task, row)] of each finished round (row None = failed) and returns
+    the tasks for the next round; the sweep ends when it returns none.
+
+    Returns the number of rows written.
+    """
+    fieldnames = csv_fieldnames(max(t["num_cpus"] for t in tasks))
+    total = len(tasks)
+    written = 0
+    failed = 0
+    disagree = 0
+    pool = None
+    if workers > 1:
+        pool = multiprocessing.Pool(workers)
+
+    with open(output_file, 'w', newline='') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer.writeheader()
+        csvfile.flush()
+
+        try:
+            while tasks:
+                finished = []
+
+                # cache hits go out first, only the misses get simulated
+                todo = []
+                for task in tasks:
+                    row = cache.get(task) if cache is not None else None
+                    if row is None:
+                        todo.append(task)
+                        continue
+                    writer.writerow(row)
+                    written += 1
+                    finished.append((task, row))
+                    if row.get("analytic_disagree"):
+                        disagree += 1
+                    print(f"[{written + failed}/{total}] {task_label(task)} ✓ cached "
+                          f"(turnaround={row['avg_turnaround']:.6f}s)")
+                csvfile.flush()
+                done_before = written + failed
+                t_start = time.perf_counter()
+
+                if not todo:
+                    results = iter(())
+                elif pool is None:
+                    results = map(run_simulation, todo)
+                else:
+                    results = pool.imap_unordered(run_simulation, todo, chunksize)
+
+                for done, (task, row, error) in enumerate(results, start=1):
+                    elapsed = time.perf_counter() - t_start
+                    eta = elapsed / done * (len(todo) - done)
+                    progress = f"[{done_before + done}/{total}] {task_label(task)}"
+                    finished.append((task, row))
+
+                    if row is None:
+                        failed += 1
+                        print(f"{progress} ✗ Failed ({error})")
+                        continue
 
-        # Add individual CPU utilizations
-        for i, util in enumerate(cpu_utils):
-            metrics[f"cpu{i}_util"] = util
+                    writer.writerow(row)
+                    csvfile.flush()
+                    if cache is not None:
+                        cache.put(task, row)     # committed now -> survives a crash
+                    written += 1
+                    print(f"{progress} ✓ (turnaround={row['avg_turnaround']:.6f}s, "
+                          f"throughput={row['throughput']:.2f} jobs/s) "
+                          f"elapsed {format_eta(elapsed)}, ETA {format_eta(eta)}")
+                    if row.get("analytic_disagree"):
+                        disagree += 1
+                        print(f"    ⚠ disagrees with the analytic value "
+                              f"{row['analytic_avg_turnaround']:.6f}s "
+                              f"({row['analytic_rel_error']:+.2%}, outside the CI)")
 
-        return metrics
+                tasks = refine(finished) if refine is not None else []
+                if tasks:
+                    total += len(tasks)
+                    print(f"\nRefining: {len(tasks)} more point(s)\n")
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
 
-    except subprocess.CalledProcessError as e:
-        print(f"Error running simulation: {e}")
-        print(f"Stderr: {e.stderr}")
-        return None
+    if failed:
+        print(f"\n{failed} run(s) failed")
+    if disagree:
+        print(f"\n{disagree} point(s) disagree with the analytic result (expect ~5% by "
+              f"chance at 95% confidence; more than that means something's off)")
+    return written
 
 
 def main():
     """
     Run all experiments and save to CSV.
+
+    --precision 0.01 runs each point only until its turnaround CI is within
+    +-1% (with --max-jobs as the cap) instead of a fixed 10,000 jobs.
     """
+    parser = argparse.ArgumentParser(description="Run the HW5 lambda sweep")
+    parser.add_argument("--lambdas", type=parse_values, default=parse_values("50:150:10"),
+                        help='arrival rates, "start:stop:step" or "a,b,c" (default 50:150:10)')
+    parser.add_argument("--scenarios", type=lambda t: parse_values(t, int), default=[1, 2],
+                        help="scenarios to run (default 1,2)")
+    parser.add_argument("--cpus", type=lambda t: parse_values(t, int), default=[4],
+                        help="CPU counts to run (default 4)")
+    parser.add_argument("--policies", type=lambda t: t.split(","), default=["random"],
+                        help="scenario 1 dispatch policies, e.g. random,jsq,pod2,least-work "
+                             "(default random; see dispatch.py)")
+    parser.add_argument("--steal", type=parse_steal_modes, default=[None],
+                        help="scenario 1 work stealing modes to run, e.g. none,random,longest,pow2 "
+                             "(default none)")
+    parser.add_argument("--migration-cost", type=float, default=0.0,
+                        help="extra CPU time (sec) per stolen job (default 0)")
+    parser.add_argument("--disciplines", type=lambda t: t.split(","), default=["fcfs"],
+                        help="ready queue disciplines to run, e.g. fcfs,sjf,srpt,rr "
+                             "(default fcfs; see disciplines.py)")
+    parser.add_argument("--quantum", type=float, default=None,
+                        help="round robin time slice in sec (needed for rr)")
+    parser.add_argument("--classes", type=int, default=2,
+                        help="priority classes for the priority discipline (default 2)")
+    parser.add_argument("--avg-service", type=float, default=0.02,
+                        help="average service time in seconds (default 0.02)")
+    parser.add_argument("--interarrival", default="exp", metavar="SPEC",
+                        help="interarrival distribution for every point, e.g. exp (default), "
+                             "det, lognormal:cv=2, pareto:alpha=2.5, hyperexp:cv=3, "
+                             "empirical:FILE (see distributions.py)")
+    parser.add_argument("--service", default="exp", metavar="SPEC",
+                        help="service time distribution (same choices as --interarrival)")
+    parser.add_argument("--engine", choices=hw5.ENGINES, default="event",
+                        help="event (default), numpy, or analytic = exact M/M/1 / M/M/c "
+                             "formulas for the points that have them (see analytic.py)")
+    parser.add_argument("--validate", action="store_true",
+                        help="also solve each point analytically (where possible) and flag "
+                             "runs whose CI misses the exact mean turnaround")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--precision", type=float, default=None,
+                        help="relative CI half-width to stop each run at (e.g. 0.01)")
+    parser.add_argument("--max-jobs", type=int, default=None,
+                        help="completions per run (a cap when --precision is set)")
+    parser.add_argument("--warmup", choices=("mser",), default=None,
+                        help="drop the initial transient (MSER-5) from every run")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="treat --lambdas as a coarse grid and keep bisecting the "
+                             "intervals with the most curvature / noise (per curve)")
+    parser.add_argument("--budget-events", type=int, default=2_000_000,
+                        help="--adaptive: total simulated events for the whole sweep, "
+                             "coarse grid included (default 2,000,000)")
+    parser.add_argument("--adaptive-tol", type=float, default=0.01,
+                        help="--adaptive: stop splitting intervals whose estimated error is "
+                             "below this fraction of the turnaround (default 0.01)")
+    parser.add_argument("--min-gap", type=float, default=0.5,
+                        help="--adaptive: smallest lambda spacing to refine down to "
+                             "(default 0.5)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="worker processes (default: all cores, 1 = no pool)")
+    parser.add_argument("--chunksize", type=int, default=1,
+                        help="grid points handed to a worker at a time (bigger = less "
+                             "overhead for lots of tiny runs)")
+    parser.add_argument("--output", default="results.csv", help="CSV file to write")
+    parser.add_argument("--cache", default=DEFAULT_PATH,
+                        help=f"result cache file (default {DEFAULT_PATH})")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="simulate every point, don't read or write the cache")
+    parser.add_argument("--cache-max-mb", type=float, default=DEFAULT_MAX_MB,
+                        help=f"evict least recently used results past this size "
+                             f"(default {DEFAULT_MAX_MB} MB)")
+    args = parser.parse_args()
+
+    try:
+        tasks = build_tasks(args)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    cache = None
+    if not args.no_cache:
+        cache = ResultCache(args.cache, max_bytes=int(args.cache_max_mb * 1024 * 1024))
+
     print("Running all experiments for HW5...")
-    print("This will take a few minutes...\n")
-
-    # Experiment parameters (as specified in assignment)
-    lambda_values = list(range(50, 151, 10))  # 50, 60, 70, ..., 150
-    avg_service = 0.02  # Fixed at 0.02 seconds
-    scenarios = [1, 2]  # Both scenarios
-    num_cpus = 4  # Fixed at 4 CPUs
-
-    results = []
-
-    # Run all combinations
-    total_runs = len(lambda_values) * len(scenarios)
-    current_run = 0
-
-    for scenario in scenarios:
-        for lmbda in lambda_values:
-            current_run += 1
-            print(f"[{current_run}/{total_runs}] Running: λ={lmbda}, scenario={scenario}...", end=" ")
-
-            metrics = run_simulation(lmbda, avg_service, scenario, num_cpus)
-
-            if metrics:
-                results.append(metrics)
-                print(f"✓ (turnaround={metrics['avg_turnaround']:.6f}s, "
-                      f"throughput={metrics['throughput']:.2f} jobs/s)")
-            else:
-                print("✗ Failed")
-
-    # Save to CSV
-    if results:
-        output_file = "results.csv"
-        print(f"\nSaving results to {output_file}...")
-
-        # Determine all keys (some runs might have different numbers of CPUs)
-        all_keys = set()
-        for r in results:
-            all_keys.update(r.keys())
-
-        # Sort keys for consistent column order
-        fieldnames = sorted(all_keys)
-
-        # Write CSV
-        with open(output_file, 'w', newline='') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(results)
-
-        print(f"✓ Results saved to {output_file}")
-        print(f"\nTotal runs: {len(results)}")
+    if args.adaptive:
+        print(f"{len(tasks)} coarse runs (up to {args.budget_events:,} events in total) on "
+              f"{args.workers} worker(s), streaming to {args.output}\n")
+    else:
+        print(f"{len(tasks)} runs on {args.workers} worker(s), streaming to {args.output}\n")
+
+    refiner = None
+    if args.adaptive:
+        if args.budget_events < 1:
+            parser.error("--budget-events needs to be at least 1")
+        refiner = AdaptiveRefiner(args.budget_events, tol=args.adaptive_tol, min_gap=args.min_gap,
+                                  per_round=max(1, args.workers))
+
+    written = run_sweep(tasks, args.output, workers=args.workers, chunksize=args.chunksize,
+                        cache=cache, refine=refiner)
+    if cache is not None:
+        print(f"\nCache: {cache.hits} hit(s), {cache.misses} simulated ({args.cache})")
+        cache.close()
+
+    if written:
+        print(f"\n✓ Results saved to {args.output}")
+        print(f"\nTotal runs: {written}")
         print("\nYou can now use this CSV file to create plots for your report.")
         print("\nQuick summary:")
-        print(f"  Lambda range: {min(lambda_values)} - {max(lambda_values)} processes/sec")
-        print(f"  Scenarios: {scenarios}")
-        print(f"  CPUs: {num_cpus}")
-        print(f"  Service time: {avg_service} sec")
-
+        print(f"  Lambda range: {min(args.lambdas)} - {max(args.lambdas)} processes/sec")
+        print(f"  Scenarios: {args.scenarios}")
+        print(f"  Scenario 1 policies: {', '.join(args.policies)}")
+        print(f"  CPUs: {args.cpus}")
+        print(f"  Service time: {args.avg_service} sec")
+        print(f"  Distributions: {tasks[0]['interarrival']} interarrivals, "
+              f"{tasks[0]['service']} service")
+        if refiner is not None:
+            print("\nAdaptive grid:")
+            print("\n".join(refiner.summary()))
     else:
         print("\n✗ No results to save")
         sys.exit(1)
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+Output-analysis helpers for the HW5 simulator (stdlib only).
+
+  - normal_quantile / t_quantile: critical values without scipy
+  - BatchMeans: confidence interval for a steady-state mean from ONE long
+    run, by chopping the (correlated) departures into batches whose means
+    are close to independent
+  - MSERWarmup: online warm-up detection
+  - default_stats: the hw5.simulate() stats dict with nothing measured yet,
+    which every engine fills in
+"""
+
+import math
+
+from histogram import PERCENTILES
+
+
+# Acklam's rational approximation of the inverse normal CDF. the two
+# polynomial pieces are plain arithmetic, so they work on floats and on numpy
+# arrays alike (distributions.py uses them for the vectorized lognormal)
+_ACKLAM_A = (-3.969683028665376e+01, 2.209460984245205e+02, -2.759285104469687e+02,
+             1.383577518672690e+02, -3.066479806614716e+01, 2.506628277459239e+00)
+_ACKLAM_B = (-5.447609879822406e+01, 1.615858368580409e+02, -1.556989798598866e+02,
+             6.680131188771972e+01, -1.328068155288572e+01)
+_ACKLAM_C = (-7.784894002430293e-03, -3.223964580411365e-01, -2.400758277161838e+00,
+             -2.549732539343734e+00, 4.374664141464968e+00, 2.938163982698783e+00)
+_ACKLAM_D = (7.784695709041462e-03, 3.224671290700398e-01, 2.445134137142996e+00,
+             3.754408661907416e+00)
+ACKLAM_LOW = 0.02425     # below this (and above 1 - this) the tail piece takes over
+
+
+def acklam_central(q):
+    """Central piece: the quantile of p = 0.5 + q, for ACKLAM_LOW <= p <= 1 - ACKLAM_LOW."""
+    a, b = _ACKLAM_A, _ACKLAM_B
+    r = q * q
+    return (((((a[0] * r + a[1]) * r + a[2]) * r + a[3]) * r + a[4]) * r + a[5]) * q / \
+           (((((b[0] * r + b[1]) * r + b[2]) * r + b[3]) * r + b[4]) * r + 1.0)
+
+
+def acklam_tail(t):
+    """Lower tail piece: the quantile of p < ACKLAM_LOW, given t = sqrt(-2 ln p)."""
+    c, d = _ACKLAM_C, _ACKLAM_D
+    return (((((c[0] * t + c[1]) * t + c[2]) * t + c[3]) * t + c[4]) * t + c[5]) / \
+           ((((d[0] * t + d[1]) * t + d[2]) * t + d[3]) * t + 1.0)
+
+
+def normal_quantile(p):
+    """
+    Inverse CDF of the standard normal (Acklam's rational approximation,
+    relative error ~1e-9 - way more than we need).
+    """
+    if not 0.0 < p < 1.0:
+        raise ValueError("p must be between 0 and 1")
+    if p < ACKLAM_LOW:
+        return acklam_tail(math.sqrt(-2.0 * math.log(p)))
+    if p > 1.0 - ACKLAM_LOW:
+        return -normal_quantile(1.0 - p)
+    return acklam_central(p - 0.5)
+
+
+def t_quantile(p, df):
+    """
+    Inverse CDF of Student's t with df degrees of freedom.
+
+    Cornish-Fisher expansion around the normal quantile. Good to ~3 digits
+    for df >= 5, which is all we ever ask for (batch counts are 10+).
+    """
+    if df <= 0:
+        raise ValueError("df must be positive")
+    z = normal_quantile(p)
+    z2 = z * z
+    g1 = (z2 + 1.0) * z / 4.0
+    g2 = ((5.0 * z2 + 16.0) * z2 + 3.0) * z / 96.0
+    g3 = (((3.0 * z2 + 19.0) * z2 + 17.0) * z2 - 15.0) * z / 384.0
+    g4 = ((((79.0 * z2 + 776.0) * z2 + 1482.0) * z2 - 1920.0) * z2 - 945.0) * z / 92160.0
+    return z + g1 / df + g2 / df ** 2 + g3 / df ** 3 + g4 / df ** 4
+
+
+def mean_ci(values, confidence=0.95):
+    """
+    (mean, half_width) of a t confidence interval for independent samples.
+
+    half_width is nan with fewer than 2 values.
+    """
+    n = len(values)
+    if n == 0:
+        return float('nan'), float('nan')
+    mean = sum(values) / n
+    if n < 2:
+        return mean, float('nan')
+    var = sum((v - mean) ** 2 for v in values) / (n - 1)
+    return mean, t_quantile(0.5 + confidence / 2.0, n - 1) * math.sqrt(var / n)
+
+
+class BatchMeans:
+    """
+    Batch-means CI with a bounded number of batches.
+
+    Values get summed into batches of batch_size. Once there are
+    max_batches full batches, neighbouring pairs are merged (batch_size
+    doubles), so memory stays at max_batches floats and batches keep
+    getting longer (= less correlated) as the run goes on.
+
+    add() returns True whenever a batch just filled up, which is when it's
+    worth re-checking the CI.
+    """
+
+    def __init__(self, max_batches=64, batch_size=8):
+        if max_batches % 2:
+            raise ValueError("max_batches must be even")
+        self.max_batches = max_batches
+        self.batch_size = batch_size
+        self.sums = []          # one sum per full batch
+        self.cur_sum = 0.0
+        self.cur_n = 0
+
+    def add(self, x):
+        self.cur_sum += x
+        self.cur_n += 1
+        if self.cur_n == self.batch_size:
+            self._close_batch()
+            return True
+        return False
+
+    def add_many(self, values):
+        """Same as calling add() on each value in order (values: list/array)."""
+        i = 0
+        n = len(values)
+        while i < n:
+            take = min(self.batch_size - self.cur_n, n - i)
+            chunk = values[i:i + take]
+            # numpy arrays have a fast .sum(), plain lists use sum()
+            self.cur_sum += float(chunk.sum() if hasattr(chunk, "sum") else sum(chunk))
+            self.cur_n += take
+            i += take
+            if self.cur_n == self.batch_size:
+                self._close_batch()
+
+    def _close_batch(self):
+        sums = self.sums
+        sums.append(self.cur_sum)
+        self.cur_sum = 0.0
+        self.cur_n = 0
+        if len(sums) == self.max_batches:
+            self.sums = [sums[i] + sums[i + 1] for i in range(0, len(sums), 2)]
+            self.batch_size *= 2
+
+    @property
+    def num_batches(self):
+        return len(self.sums)
+
+    def ci(self, confidence=0.95):
+        """
+        (mean, half_width) using the full batches only.
+
+        Both are nan-safe: mean is nan with no full batch, half_width is nan
+        with fewer than 2.
+        """
+        b = self.batch_size
+        return mean_ci([s / b for s in self.sums], confidence)
+
+    def rel_half_width(self, confidence=0.95):
+        """half_width / |mean| (inf if it can't be computed yet)."""
+        mean, hw = self.ci(confidence)
+        if not (mean == mean and hw == hw) or mean == 0.0:
+            return float('inf')
+        return hw / abs(mean)
+
+    def lag1_autocorr(self):
+        """Lag-1 autocorrelation of the batch means (nan with < 3 batches)."""
+        n = len(self.sums)
+        if n < 3:
+            return float('nan')
+        m = sum(self.sums) / n
+        dev = [x - m for x in self.sums]
+        var = sum(d * d for d in dev)
+        if var == 0.0:
+            return 0.0
+        return sum(dev[i] * dev[i + 1] for i in range(n - 1)) / var
+
+    def precise_enough(self, rel_precision, confidence=0.95, min_batches=30):
+        """
+        Stopping rule for precision-driven runs.
+
+        True once there are at least min_batches batches, the batch means
+        look uncorrelated (lag-1 autocorrelation under the ~95% bound
+        2/sqrt(n)), and the CI half-width is <= rel_precision * mean.
+        The autocorrelation check is what stops us from quitting early near
+        saturation, where short batches are still strongly correlated.
+        """
+        n = len(self.sums)
+        if n < min_batches:
+            return False
+        if self.lag1_autocorr() > 2.0 / math.sqrt(n):
+            return False
+        return self.rel_half_width(confidence) <= rel_precision
+
+    def summary(self, confidence=0.95, prefix="turnaround_"):
+        """The CI entries simulate() puts in its stats dict."""
+        mean, hw = self.ci(confidence)
+        return {
+            prefix + "ci_low": mean - hw,
+            prefix + "ci_high": mean + hw,
+            prefix + "ci_rel_hw": hw / abs(mean) if mean else float('nan'),
+            "ci_batches": self.num_batches,
+            "ci_batch_size": self.batch_size,
+        }
+
+
+def mser_truncation(means):
+    """
+    MSER truncation point for a list of (batch) means.
+
+    For every candidate d, MSER(d) = sum_{i>=d} (x_i - mean_d)^2 / (n - d)^2,
+    i.e. the squared standard error you'd get by throwing away the first d
+    values. Returns the d that minimizes it (suffix sums, so O(n)).
+    """
+    n = len(means)
+    best_d = 0
+    best = float('inf')
+    s1 = 0.0
+    s2 = 0.0
+    # walk from the back so the suffix sums build up as we go
+    stat = [0.0] * n
+    for d in range(n - 1, -1, -1):
+        x = means[d]
+        s1 += x
+        s2 += x * x
+        k = n - d
+        stat[d] = (s2 - s1 * s1 / k) / (k * k)
+    for d in range(n - 1):          # d = n-1 leaves a single value, skip it
+        if stat[d] < best:
+            best = stat[d]
+            best_d = d
+    return best_d
+
+
+class MSERWarmup:
+    """
+    Online MSER-m warm-up detector (m = 5 by default, i.e. MSER-5).
+
+    Feed it departures in order with add(). It runs MSER on the batch means
+    seen so far at min_batches and then every time the number of batches has
+    grown by a factor `growth` - a geometric schedule, so all the O(n)
+    rescans together cost O(n) even when it never settles (which is normal
+    at or above saturation; rescanning every few batches made that case
+    quadratic). The usual MSER rule says the answer is only trustworthy if
+    the truncation point lands in the first half of the data, so until then
+    we keep collecting.
+
+    add() returns True once it has made up its mind; after that
+      truncation = number of jobs MSER says to delete (0 = no warm-up), or
+                   None if it gave up after max_batches without a stable answer
+
+    for_run() gives a detector whose give-up point is tied to the run length.
+    """
+
+    def __init__(self, m=5, min_batches=20, growth=1.5, max_batches=200_000):
+        if growth <= 1:
+            raise ValueError("growth has to be > 1")
+        self.m = m
+        self.min_batches = min_batches
+        self.growth = growth
+        self.max_batches = max(max_batches, min_batches)
+        self.next_check = min_batches
+        self.means = []
+        self.cur_sum = 0.0
+        self.cur_n = 0
+        self.truncation = None
+
+    @classmethod
+    def for_run(cls, target_completions, m=5):
+        """
+        Detector for a run of target_completions jobs: gives up once half of
+        them went into warm-up detection (a truncation can only be accepted
+        in the first half of the data anyway, and the rest of the run is
+        needed for the actual measurement).
+        """
+        return cls(m=m, max_batches=target_completions // (2 * m))
+
+    def add(self, x):
+        self.cur_sum += x
+        self.cur_n += 1
+        if self.cur_n < self.m:
+            return False
+
+        self.means.append(self.cur_sum / self.m)
+        self.cur_sum = 0.0
+        self.cur_n = 0
+
+        n = len(self.means)
+        if n < self.next_check and n < self.max_batches:
+            return False
+        self.next_check = max(n + 1, int(n * self.growth))
+
+        d = mser_truncation(self.means)
+        if d <= n // 2:
+            self.truncation = d * self.m
+            self.means = []         # done with these, free the memory
+            return True
+        if n >= self.max_batches:
+            self.means = []
+            return True
+        return False
+
+
+def default_stats(num_cpus):
+    """
+    Every key of the hw5.simulate() stats dict at its "nothing happened"
+    value (0 / nan / None, no stealing, FCFS, exponential distributions).
+    The event loop, the numpy engines and analytic.solve() start from this
+    and fill in what they measure, so the three can't drift apart.
+    """
+    nan = float('nan')
+    stats = {
+        "completed": 0,
+        "time": 0.0,
+        "avg_turnaround": nan,
+        "throughput": 0.0,
+        "cpu_utils": [0.0] * num_cpus,
+        "avg_ready_q": 0.0,
+        "avg_ready_q_per_cpu": None,
+        "events": 0,
+        "policy": "global",
+        "steal": "none",
+        "steals": 0,
+        "steal_attempts": 0,
+        "migration_cost": 0.0,
+        "discipline": "fcfs",
+        "quantum": None,
+        "preemptions": 0,
+        "avg_turnaround_by_class": None,
+        "event_list": None,
+        "trace": None,
+        "trace_records": 0,
+        "trace_parse_sec": 0.0,
+        "trace_parse_rate": 0.0,
+        "timeseries": None,
+        "checkpoints": 0,
+        "resumed_at": None,
+        "jobs_recorded": 0,
+        "instrumentation": None,
+        "interarrival_dist": "exp",
+        "service_dist": "exp",
+        "peak_resident_jobs": 0,
+        "turnaround_hist": None,
+        "warmup_time": 0.0,
+        "warmup_jobs": 0,
+        "mser_truncation": 0,
+        "turnaround_ci_low": nan,
+        "turnaround_ci_high": nan,
+        "turnaround_ci_rel_hw": nan,
+        "ci_batches": 0,
+        "ci_batch_size": 0,
+    }
+    for name in PERCENTILES:
+        stats["turnaround_" + name] = nan
+    return stats
@@ -0,0 +1,94 @@
+"""
+Regression tests for the adaptive sweep (run_experiments.AdaptiveRefiner):
+it never plans past --budget-events, and with budget to spare it stops once
+every interval is under --adaptive-tol or down to --min-gap.
+"""
+
+import csv
+
+import pytest
+
+from run_experiments import AdaptiveRefiner, run_sweep
+
+
+def task(lmbda, **changes):
+    t = {"lmbda": lmbda, "avg_service": 0.02, "scenario": 2, "num_cpus": 1,
+         "engine": "analytic", "seed": 1, "max_jobs": 10_000, "precision": None,
+         "warmup": None, "policy": "random", "steal": None, "migration_cost": 0.0,
+         "discipline": "fcfs", "quantum": None, "classes": 2, "validate": False,
+         "interarrival": "exp", "service": "exp"}
+    t.update(changes)
+    return t
+
+
+def mm1_row(t):
+    """M/M/1 turnaround, no noise, and (like --precision runs) dearer near the knee."""
+    slack = 1.0 - t["lmbda"] * t["avg_service"]
+    f = t["avg_service"] / slack
+    return {"avg_turnaround": f, "turnaround_ci_low": f, "turnaround_ci_high": f,
+            "events": int(1_000 / slack)}
+
+
+def drive(refiner, lambdas, **changes):
+    """Runs the refine rounds with mm1_row() standing in for simulate()."""
+    tasks = [task(lmbda, **changes) for lmbda in lambdas]
+    rounds = 0
+    while tasks:
+        assert len(tasks) <= refiner.per_round or rounds == 0
+        tasks = refiner([(t, mm1_row(t)) for t in tasks])
+        rounds += 1
+    return sorted(lam for points in refiner.curves.values() for lam in points)
+
+
+def gaps(lams):
+    return [b - a for a, b in zip(lams, lams[1:])]
+
+
+COARSE = list(range(5, 50, 5))
+
+
+def test_stays_within_the_event_budget():
+    coarse = sum(mm1_row(task(lmbda))["events"] for lmbda in COARSE)
+    counts = []
+    for budget in (coarse, coarse + 5_000, 2 * coarse, 10 * coarse):
+        refiner = AdaptiveRefiner(budget, tol=1e-9, min_gap=1e-3)
+        counts.append(len(drive(refiner, COARSE)))
+        assert refiner.spent <= budget
+    # no budget left after the coarse grid = no refining; more budget, more points
+    assert counts[0] == len(COARSE)
+    assert counts == sorted(counts) and counts[-1] > counts[1] > counts[0]
+
+
+def test_stops_at_min_gap():
+    refiner = AdaptiveRefiner(10**12, tol=0.0, min_gap=0.5)
+    lams = drive(refiner, COARSE)
+    # tol 0 splits everything: 5 -> 2.5 -> 1.25 -> 0.625, one more would be < 0.5
+    assert gaps(lams) == pytest.approx([0.625] * (len(lams) - 1))
+
+
+def test_stops_at_tol():
+    tol = 0.01
+    refiner = AdaptiveRefiner(10**12, tol=tol, min_gap=1e-6)
+    lams = drive(refiner, COARSE)
+    # nothing left above tol, and it's tol that stopped it, not min_gap
+    for points in refiner.curves.values():
+        assert refiner.pick(points) == []
+    assert min(gaps(lams)) > 1e-3
+    assert max(gaps(lams)) == 5
+    # a looser tol needs fewer points
+    loose = AdaptiveRefiner(10**12, tol=10 * tol, min_gap=1e-6)
+    assert len(drive(loose, COARSE)) < len(lams)
+
+
+def test_analytic_sweep_refines_and_stops(tmp_path):
+    out = str(tmp_path / "adaptive.csv")
+    refiner = AdaptiveRefiner(2_000_000, tol=0.01, min_gap=0.5)
+    written = run_sweep([task(lmbda, num_cpus=2, scenario=2) for lmbda in range(10, 100, 10)],
+                        out, refine=refiner)
+    with open(out) as f:
+        lams = sorted(float(row["lambda"]) for row in csv.DictReader(f))
+    assert written == len(lams) > 9
+    assert refiner.spent == 0            # analytic points are free
+    assert min(gaps(lams)) >= 0.5
+    for points in refiner.curves.values():
+        assert refiner.pick(points) == []
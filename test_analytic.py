@@ -0,0 +1,79 @@
+"""
+Regression tests for analytic.py (Erlang C / M/M/c formulas) and for the
+stats dict layout all three engines share.
+"""
+
+import math
+
+import pytest
+
+import hw5
+from analytic import erlang_c, mmc, solve, turnaround_quantile, validate
+from simstats import default_stats
+
+
+def erlang_c_direct(c, a):
+    """Textbook formula, fine for small c."""
+    top = a ** c / math.factorial(c) * c / (c - a)
+    return top / (sum(a ** k / math.factorial(k) for k in range(c)) + top)
+
+
+@pytest.mark.parametrize("c, a", [(1, 0.5), (2, 1.0), (4, 3.6), (10, 8.0), (16, 15.5)])
+def test_erlang_c_matches_the_textbook_formula(c, a):
+    assert erlang_c(c, a) == pytest.approx(erlang_c_direct(c, a), rel=1e-12)
+
+
+def test_erlang_c_known_values():
+    assert erlang_c(1, 0.7) == pytest.approx(0.7)      # M/M/1: P(wait) = rho
+    assert erlang_c(2, 1.0) == pytest.approx(1.0 / 3.0)
+    assert erlang_c(10, 8.0) == pytest.approx(0.4092, abs=1e-4)
+    # big c: no overflow, and a light load almost never waits
+    assert 0.0 < erlang_c(1000, 500.0) < 1e-12
+
+
+def test_mm1():
+    m = mmc(40.0, 50.0, 1)
+    assert m["rho"] == pytest.approx(0.8)
+    assert m["turnaround"] == pytest.approx(1.0 / (50.0 - 40.0))
+    assert m["queue_len"] == pytest.approx(0.8 ** 2 / 0.2)
+    # M/M/1 turnaround is Exp(mu - lambda)
+    for q in (0.5, 0.99):
+        expected = -math.log(1.0 - q) / 10.0
+        assert turnaround_quantile(q, 40.0, 50.0, 1, m["prob_wait"]) == pytest.approx(expected, rel=1e-9)
+
+
+def test_littles_law():
+    m = mmc(180.0, 50.0, 4)
+    assert m["in_system"] == pytest.approx(180.0 * m["turnaround"])
+
+
+def test_scenario_1_random_is_independent_mm1s():
+    stats = solve(160.0, 0.02, 1, 4)
+    assert stats["avg_turnaround"] == pytest.approx(1.0 / (50.0 - 40.0))
+    assert stats["cpu_utils"] == pytest.approx([0.8] * 4)
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"policy": "jsq"}, {"steal": "random"}, {"discipline": "sjf"}, {"service": "det"},
+])
+def test_no_closed_form_raises(kwargs):
+    with pytest.raises(ValueError):
+        solve(100.0, 0.02, 1, 4, **kwargs)
+
+
+def test_overload_raises():
+    with pytest.raises(ValueError):
+        solve(200.0, 0.02, 2, 4)
+
+
+def test_simulation_agrees_with_the_formula():
+    check, _ = validate(150.0, 0.02, 2, 4, target_completions=200_000, warmup="mser")
+    assert abs(check["rel_error"]) < 0.03
+
+
+@pytest.mark.parametrize("engine", hw5.ENGINES)
+def test_every_engine_fills_the_same_stats(engine):
+    if engine == "numpy":
+        pytest.importorskip("numpy")
+    stats = hw5.simulate(100, 0.02, 1, 4, target_completions=2_000, engine=engine)
+    assert set(stats) == set(default_stats(4))
@@ -0,0 +1,92 @@
+"""
+Regression tests for checkpoint / resume: a resumed run has to end up
+bit-for-bit where the uninterrupted one does.
+"""
+
+import math
+import os
+import stat
+
+import pytest
+
+import checkpoint
+import hw5
+
+# only these may differ between a resumed and an uninterrupted run
+BOOKKEEPING = ("checkpoints", "resumed_at", "peak_resident_jobs")
+
+CONFIGS = [
+    dict(scenario=1, policy="jsq", steal="longest", migration_cost=0.001),
+    dict(scenario=1, discipline="rr", quantum=0.01),
+    dict(scenario=2, discipline="srpt", warmup="mser"),
+    dict(scenario=2, service="lognormal:cv=2", sample_interval=1.0),
+]
+
+
+def same(a, b):
+    if isinstance(a, float) and math.isnan(a):
+        return isinstance(b, float) and math.isnan(b)
+    return a == b
+
+
+def run(config, **kwargs):
+    config = dict(config)
+    scenario = config.pop("scenario")
+    return hw5.simulate(170, 0.02, scenario, 4, seed=7, **config, **kwargs)
+
+
+@pytest.mark.parametrize("config", CONFIGS)
+def test_resume_is_bit_identical(tmp_path, config):
+    path = str(tmp_path / "run.ckpt")
+    full = run(config, target_completions=30_000)
+    # stop half way (the checkpoint is the state at 15,000 jobs)...
+    run(config, target_completions=15_000, checkpoint=path, checkpoint_every=5_000)
+    # ...and carry on from the file
+    resumed = hw5.resume(path, target_completions=30_000)
+    assert resumed["resumed_at"] == 15_000
+    for key in full:
+        if key in BOOKKEEPING:
+            continue
+        if key == "timeseries" and full[key] is not None:
+            for column in full[key]:
+                assert list(full[key][column]) == list(resumed[key][column]), column
+            continue
+        assert same(full[key], resumed[key]), key
+
+
+def test_resume_refuses_other_params(tmp_path):
+    path = str(tmp_path / "run.ckpt")
+    hw5.simulate(100, 0.02, 1, 4, target_completions=2_000, checkpoint=path, checkpoint_every=1_000)
+    with pytest.raises(ValueError):
+        hw5.simulate(110, 0.02, 1, 4, target_completions=4_000, checkpoint=path, resume=True)
+
+
+def test_resume_refuses_other_code(tmp_path, monkeypatch):
+    path = str(tmp_path / "run.ckpt")
+    hw5.simulate(100, 0.02, 1, 4, target_completions=2_000, checkpoint=path, checkpoint_every=1_000)
+    monkeypatch.setattr(checkpoint, "code_version", lambda files=None: "something else")
+    with pytest.raises(ValueError):
+        hw5.resume(path, target_completions=4_000)
+
+
+def test_checkpoint_hash_covers_the_pickled_modules():
+    for name in ("timeseries.py", "recorder.py", "instrument.py", "checkpoint.py", "hw5.py"):
+        assert name in checkpoint.CHECKPOINT_FILES
+
+
+@pytest.mark.skipif(os.name != "posix", reason="directories only get fsync'd on POSIX")
+def test_save_syncs_the_file_then_the_directory(tmp_path, monkeypatch):
+    path = str(tmp_path / "run.ckpt")
+    synced = []
+    real_fsync = os.fsync
+
+    def fsync(fd):
+        # (directory?, is the checkpoint in place yet?)
+        synced.append((stat.S_ISDIR(os.fstat(fd).st_mode), os.path.exists(path)))
+        real_fsync(fd)
+
+    monkeypatch.setattr(os, "fsync", fsync)
+    checkpoint.save_checkpoint(path, {"lmbda": 1.0}, {"seq": 1})
+    assert synced == [(False, False), (True, True)]
+    assert not os.path.exists(path + ".tmp")
+    assert checkpoint.read_params(path) == {"lmbda": 1.0}
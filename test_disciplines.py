@@ -0,0 +1,58 @@
+"""
+Regression tests for the preemptive / time sliced disciplines (srpt, rr):
+every job finishes exactly once no matter how often it got kicked off a CPU,
+SRPT beats FCFS, and RR with a huge quantum is just FCFS.
+"""
+
+import pytest
+
+import hw5
+from recorder import iter_jobs
+from traces import generate, open_trace
+
+JOBS = 5_000
+
+
+@pytest.fixture(scope="module")
+def trace(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("trace") / "jobs.bin")
+    generate(path, JOBS, 180, 0.02, seed=4)
+    with open_trace(path) as reader:
+        work = sum(service for _, service, _ in reader)
+    return path, work
+
+
+@pytest.mark.parametrize("scenario", [1, 2])
+@pytest.mark.parametrize("discipline, quantum", [("srpt", None), ("rr", 0.005)])
+def test_every_job_finishes_exactly_once(tmp_path, trace, scenario, discipline, quantum):
+    path, work = trace
+    jobs = str(tmp_path / "jobs.bin")
+    # a trace run drains: every job in it has to come out the other end
+    stats = hw5.simulate(0, 0, scenario, 4, trace=path, record_jobs=jobs,
+                         discipline=discipline, quantum=quantum)
+    assert stats["completed"] == JOBS
+    assert stats["preemptions"] > 0
+    assert sorted(pid for pid, *_ in iter_jobs(jobs)) == list(range(JOBS))
+    # pieces of a preempted job add up to its service time, none run twice
+    assert sum(stats["cpu_utils"]) * stats["time"] == pytest.approx(work, rel=1e-9)
+
+
+@pytest.mark.parametrize("scenario", [1, 2])
+@pytest.mark.parametrize("lmbda", [100, 180])
+def test_srpt_beats_fcfs(scenario, lmbda):
+    srpt = hw5.simulate(lmbda, 0.02, scenario, 4, target_completions=20_000, discipline="srpt")
+    fcfs = hw5.simulate(lmbda, 0.02, scenario, 4, target_completions=20_000)
+    assert srpt["preemptions"] > 0
+    assert srpt["avg_turnaround"] <= fcfs["avg_turnaround"]
+
+
+@pytest.mark.parametrize("scenario, policy", [(1, "random"), (1, "jsq"), (2, "random")])
+def test_rr_with_a_huge_quantum_is_fcfs(scenario, policy):
+    # exponential services with mean 0.02 never get near 10 s
+    rr = hw5.simulate(150, 0.02, scenario, 4, target_completions=20_000, policy=policy,
+                      discipline="rr", quantum=10.0)
+    fcfs = hw5.simulate(150, 0.02, scenario, 4, target_completions=20_000, policy=policy)
+    assert rr["preemptions"] == 0
+    for key in fcfs:
+        if key not in ("discipline", "quantum"):
+            assert rr[key] == fcfs[key], key
@@ -0,0 +1,138 @@
+"""
+Regression tests for dispatch.py: the O(1) length buckets behind jsq /
+longest-victim, least-work's heap, and which configurations simulate()
+refuses.
+"""
+
+import random
+
+import pytest
+
+import hw5
+from dispatch import (JSQDispatch, LeastWorkDispatch, LongestVictim, _LengthBuckets,
+                      make_dispatcher)
+from variates import VariateStream
+
+
+def stream(seed=1):
+    return VariateStream(seed, "routing", "uniform")
+
+
+def check_buckets(lengths):
+    """Every CPU sits in the bucket of its count, and min/max point at the ends."""
+    for k, bucket in enumerate(lengths.buckets):
+        for i, cpu in enumerate(bucket):
+            assert lengths.count[cpu] == k
+            assert lengths.pos[cpu] == i
+    assert sum(len(b) for b in lengths.buckets) == len(lengths.count)
+    assert lengths.min_len == min(lengths.count)
+    assert lengths.max_len == max(lengths.count)
+
+
+def test_length_buckets_stay_consistent():
+    rng = random.Random(1)
+    lengths = _LengthBuckets(16)
+    for _ in range(5_000):
+        cpu = rng.randrange(16)
+        if lengths.count[cpu] and rng.random() < 0.5:
+            lengths.decr(cpu)
+        else:
+            lengths.incr(cpu)
+        check_buckets(lengths)
+
+
+def test_jsq_always_picks_a_shortest_queue():
+    rng = random.Random(2)
+    jsq = JSQDispatch(8, stream())
+    jobs = {c: 0 for c in range(8)}
+    for _ in range(2_000):
+        if rng.random() < 0.55:
+            cpu = jsq.choose(0.0)
+            assert jobs[cpu] == min(jobs.values())
+            jsq.job_added(cpu, None, 0.0)
+            jobs[cpu] += 1
+        else:
+            busy = [c for c, n in jobs.items() if n]
+            if busy:
+                cpu = rng.choice(busy)
+                jsq.job_done(cpu, None, 0.0)
+                jobs[cpu] -= 1
+    check_buckets(jsq.lengths)
+
+
+def test_longest_victim_follows_the_queues():
+    queues = [[] for _ in range(4)]
+    victim = LongestVictim(queues, stream())
+    assert victim.pick(0) is None
+    for cpu in (2, 2, 1):
+        victim.queue_grew(cpu)
+    assert victim.pick(0) == 2
+    victim.queue_shrank(2)
+    assert victim.pick(0) in (1, 2)
+
+
+def test_least_work_tracks_work_end():
+    lw = LeastWorkDispatch(3)
+    for i, service in enumerate((5.0, 1.0, 2.0, 4.0, 3.0)):
+        cpu = lw.choose(0.0)
+        assert lw.work_end[cpu] == min(lw.work_end)
+        lw.job_added(cpu, [i, 0.0, service], 0.0)
+    assert lw.work_end == [5.0, 5.0, 5.0]
+
+
+def test_least_work_gives_back_stolen_work():
+    lw = LeastWorkDispatch(2)
+    jobs = [[0, 0.0, 4.0], [1, 0.0, 1.0], [2, 0.0, 3.0]]
+    for job in jobs:
+        lw.job_added(lw.choose(0.0), job, 0.0)
+    assert lw.work_end == [4.0, 4.0]
+    # job 2 sat behind job 1 on CPU 1; CPU 0's thief takes it
+    lw.job_removed(1, jobs[2], 0.0)
+    assert lw.work_end == [4.0, 1.0]
+    assert lw.choose(0.0) == 1
+    lw.job_added(0, jobs[2], 0.0)
+    assert lw.work_end == [7.0, 1.0]
+    assert lw.choose(0.0) == 1
+
+
+def test_least_work_counts_what_a_preempted_job_has_left():
+    lw = LeastWorkDispatch(2)
+    # srpt / rr records: [pid, arrival, service, class, remaining]
+    fresh, sliced = [0, 0.0, 4.0, 0, 4.0], [1, 0.0, 3.0, 0, 0.5]
+    lw.job_added(0, fresh, 0.0)
+    lw.job_added(0, sliced, 0.0)
+    assert lw.work_end == [4.5, 0.0]
+    lw.job_removed(0, sliced, 0.0)
+    lw.job_added(1, sliced, 0.0)
+    assert lw.work_end == [4.0, 0.5]
+    assert lw.choose(0.0) == 1
+
+
+@pytest.mark.parametrize("discipline, quantum", [("srpt", None), ("rr", 0.005)])
+def test_least_work_with_preemption_and_stealing(discipline, quantum):
+    stats = hw5.simulate(180, 0.02, 1, 4, target_completions=20_000, policy="least-work",
+                         steal="longest", discipline=discipline, quantum=quantum)
+    rand = hw5.simulate(180, 0.02, 1, 4, target_completions=20_000, policy="random",
+                        discipline=discipline, quantum=quantum)
+    assert stats["preemptions"] > 0
+    assert stats["avg_turnaround"] < rand["avg_turnaround"]
+
+
+def test_unknown_names():
+    with pytest.raises(ValueError):
+        make_dispatcher("shortest", 4, stream())
+    assert make_dispatcher("pod3", 4, stream()).name == "pod3"
+
+
+@pytest.mark.parametrize("kwargs", [{"policy": "jsq"}, {"steal": "random"}])
+def test_scenario_2_rejects_scenario_1_options(kwargs):
+    with pytest.raises(ValueError):
+        hw5.simulate(50, 0.02, 2, 4, target_completions=100, **kwargs)
+
+
+@pytest.mark.parametrize("policy", ["jsq", "pod2", "least-work"])
+def test_load_aware_policies_beat_random(policy):
+    random_run = hw5.simulate(170, 0.02, 1, 4, target_completions=20_000)
+    smart = hw5.simulate(170, 0.02, 1, 4, target_completions=20_000, policy=policy)
+    assert smart["completed"] == 20_000
+    assert smart["avg_turnaround"] < random_run["avg_turnaround"]
@@ -0,0 +1,82 @@
+"""
+Regression tests for distributions.py: spec strings round-trip, every
+distribution has the mean it's asked for, and the list / numpy transforms
+agree.
+"""
+
+import pytest
+
+import hw5
+from distributions import DISTRIBUTIONS, Empirical, parse_spec
+
+SPECS = ["exp", "det", "lognormal:cv=2", "pareto:alpha=2.5", "hyperexp:cv=3"]
+
+# midpoints of a fine grid: sample means converge fast and deterministically
+GRID = [(i + 0.5) / 200_000 for i in range(200_000)]
+
+
+@pytest.fixture
+def cdf_file(tmp_path):
+    path = tmp_path / "runs@2" / "svc@v1.txt"
+    path.parent.mkdir()
+    path.write_text("# service samples\n0.01\n0.02\n0.02\n0.05\n0.1\n")
+    return str(path)
+
+
+@pytest.mark.parametrize("spec", SPECS)
+def test_spec_round_trip(spec):
+    dist = parse_spec(spec)
+    assert dist.describe() == spec
+    assert parse_spec(dist.describe()) == dist
+
+
+def test_empirical_round_trip_with_at_signs(cdf_file):
+    dist = parse_spec("empirical:" + cdf_file)
+    back = parse_spec(dist.describe())
+    assert back.path == cdf_file
+    assert back == dist
+
+
+@pytest.mark.parametrize("spec", ["pareto:alpha=2.5", "hyperexp:cv=3", "lognormal:cv=0.5", "det"])
+def test_mean_is_right(spec):
+    values = parse_spec(spec).transform(GRID, 0.02)
+    # pareto's heavy tail converges slowest
+    assert sum(values) / len(values) == pytest.approx(0.02, rel=0.02)
+
+
+def test_empirical_mean_is_scaled(cdf_file):
+    values = Empirical(cdf_file).transform(GRID, 0.5)
+    assert sum(values) / len(values) == pytest.approx(0.5, rel=1e-3)
+
+
+@pytest.mark.parametrize("spec", SPECS)
+def test_numpy_and_list_transforms_agree(spec):
+    np = pytest.importorskip("numpy")
+    dist = parse_spec(spec)
+    u = GRID[::1000] + [0.0, 1.0 - 2.0 ** -53]
+    # lognormal goes through two different normal quantiles (~1e-9 each)
+    assert list(dist.transform(np.array(u), 0.02)) == pytest.approx(dist.transform(u, 0.02), rel=1e-7)
+
+
+def test_vectorized_normal_quantile_is_simstats_one():
+    np = pytest.importorskip("numpy")
+    from distributions import _normal_ppf
+    from simstats import normal_quantile
+    u = GRID[::997] + [2.0 ** -53, 0.02424, 0.02425, 0.97576, 1.0 - 1e-16]
+    assert _normal_ppf(np.array(u)).tolist() == [normal_quantile(x) for x in u]
+
+
+@pytest.mark.parametrize("spec", ["gamma", "pareto:alpha=1", "hyperexp:cv=0.5", "lognormal:cv"])
+def test_bad_specs(spec):
+    with pytest.raises(ValueError):
+        parse_spec(spec)
+
+
+def test_md1_matches_pollaczek_khinchine():
+    # M/D/1 at rho 0.5: wait = rho / (2 mu (1 - rho))
+    stats = hw5.simulate(25, 0.02, 2, 1, target_completions=200_000, service="det")
+    assert stats["avg_turnaround"] == pytest.approx(0.02 + 0.5 * 0.02 / (2 * 0.5), rel=0.03)
+
+
+def test_every_distribution_has_a_spec():
+    assert set(DISTRIBUTIONS) == {"exp", "det", "lognormal", "pareto", "hyperexp", "empirical"}
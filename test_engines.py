@@ -0,0 +1,64 @@
+"""
+Regression tests: the numpy engines (fast_engines.py) have to give the same
+numbers as the event loop for the same seed, up to float rounding.
+
+Run with: python3 -m pytest -q
+"""
+
+import pytest
+
+import hw5
+
+np = pytest.importorskip("numpy")
+
+# stats that both engines measure the same way
+COMPARED = ("avg_turnaround", "throughput", "avg_ready_q", "turnaround_p50",
+            "turnaround_p99", "turnaround_ci_low", "turnaround_ci_high")
+
+
+def run_both(lmbda, scenario, **kwargs):
+    event = hw5.simulate(lmbda, 0.02, scenario, 4, target_completions=20_000, **kwargs)
+    fast = hw5.simulate(lmbda, 0.02, scenario, 4, target_completions=20_000,
+                        engine="numpy", **kwargs)
+    return event, fast
+
+
+def assert_same(event, fast):
+    assert event["completed"] == fast["completed"]
+    for key in COMPARED:
+        assert fast[key] == pytest.approx(event[key], rel=1e-12), key
+    if event["avg_ready_q_per_cpu"] is None:
+        # scenario 2: which idle CPU gets a job is up to the engine, only
+        # the total busy time has to agree
+        assert sum(fast["cpu_utils"]) == pytest.approx(sum(event["cpu_utils"]), rel=1e-12)
+    else:
+        assert fast["cpu_utils"] == pytest.approx(event["cpu_utils"], rel=1e-12)
+        assert fast["avg_ready_q_per_cpu"] == pytest.approx(event["avg_ready_q_per_cpu"], rel=1e-12)
+
+
+@pytest.mark.parametrize("scenario", [1, 2])
+@pytest.mark.parametrize("lmbda", [50, 180])
+def test_numpy_matches_event_loop(scenario, lmbda):
+    assert_same(*run_both(lmbda, scenario))
+
+
+def test_round_robin_dispatch_matches():
+    assert_same(*run_both(150, 1, policy="rr"))
+
+
+@pytest.mark.parametrize("scenario", [1, 2])
+def test_non_exponential_distributions_match(scenario):
+    event, fast = run_both(150, scenario, interarrival="hyperexp:cv=2", service="lognormal:cv=1.5")
+    assert event["service_dist"] == fast["service_dist"] == "lognormal:cv=1.5"
+    assert_same(event, fast)
+
+
+def test_mser_warmup_matches():
+    event, fast = run_both(190, 2, warmup="mser")
+    assert event["warmup_jobs"] == fast["warmup_jobs"]
+    assert event["mser_truncation"] == fast["mser_truncation"]
+    assert_same(event, fast)
+
+
+def test_antithetic_matches():
+    assert_same(*run_both(120, 1, antithetic=True))
@@ -0,0 +1,70 @@
+"""
+Regression tests for eventlist.py: the calendar queue pops in exactly heap
+order (through lots of resizes), so simulate() gives the same numbers with
+either event list.
+"""
+
+import heapq
+import random
+
+import pytest
+
+import hw5
+from eventlist import CalendarQueue, make_key
+
+CONFIGS = [
+    (1, {}),
+    (1, {"policy": "jsq", "discipline": "sjf"}),
+    (1, {"discipline": "rr", "quantum": 0.01, "steal": "longest"}),
+    (2, {"discipline": "srpt"}),
+    (2, {"discipline": "priority", "service": "pareto:alpha=2.5"}),
+]
+
+
+@pytest.mark.parametrize("scenario, kwargs", CONFIGS)
+@pytest.mark.parametrize("lmbda", [50, 190])
+def test_calendar_matches_heap(scenario, kwargs, lmbda):
+    heap = hw5.simulate(lmbda, 0.02, scenario, 4, target_completions=10_000, **kwargs)
+    cal = hw5.simulate(lmbda, 0.02, scenario, 4, target_completions=10_000,
+                       event_list="calendar", **kwargs)
+    assert cal["event_list"] == "calendar"
+    for key in heap:
+        if key != "event_list":
+            assert cal[key] == heap[key], key
+
+
+def test_calendar_queue_resize_stress():
+    rng = random.Random(5)
+    cal, heap = CalendarQueue(), []
+    seq = 0
+    now = 0.0
+
+    def push(t):
+        nonlocal seq
+        ev = (t, make_key(seq % 3, seq), None)
+        seq += 1
+        cal.push(ev)
+        heapq.heappush(heap, ev)
+
+    def pop():
+        ev = cal.pop()
+        assert ev == heapq.heappop(heap)
+        assert len(cal) == len(heap)
+        return ev[0]
+
+    # grow to 150k pending (ties, bursts and the odd far-future event in there),
+    # hold there for a while, then drain to empty so it has to shrink back down
+    for i in range(150_000):
+        r = rng.random()
+        push(now if r < 0.05 else now + 1e6 if r < 0.051 else now + rng.expovariate(1.0))
+        if i % 4 == 0:
+            now = pop()
+    for _ in range(100_000):
+        now = pop()
+        push(now + rng.expovariate(0.01))
+    while heap:
+        pop()
+    assert len(cal) == 0
+    assert cal.resizes > 20
+    with pytest.raises(IndexError):
+        cal.pop()
@@ -0,0 +1,85 @@
+"""
+Regression tests for histogram.py: quantiles stay inside one bucket width of
+the exact value, and merging / serializing loses nothing.
+"""
+
+import math
+import random
+
+from histogram import SUB_BUCKETS, LogHistogram, bucket_bounds, merge_strings
+
+
+def sample(n, seed):
+    rng = random.Random(seed)
+    return [rng.lognormvariate(-4.0, 1.5) for _ in range(n)]
+
+
+def exact_quantile(values, q):
+    ordered = sorted(values)
+    return ordered[max(1, math.ceil(q * len(ordered))) - 1]
+
+
+def test_quantiles_within_bucket_width():
+    values = sample(20_000, 1)
+    h = LogHistogram()
+    for x in values:
+        h.record(x)
+    for q in (0.01, 0.5, 0.9, 0.99, 0.999, 1.0):
+        exact = exact_quantile(values, q)
+        assert abs(h.quantile(q) - exact) <= exact / SUB_BUCKETS, q
+
+
+def test_quantile_is_inside_the_bucket_of_the_exact_value():
+    values = sample(5_000, 2)
+    h = LogHistogram()
+    h.record_many(values)
+    for q in (0.5, 0.95, 0.99):
+        exact = exact_quantile(values, q)
+        alone = LogHistogram()
+        alone.record(exact)
+        low, high = bucket_bounds(alone.counts.index(1))
+        assert low <= exact < high
+        assert low <= h.quantile(q) < high
+
+
+def test_record_many_matches_record():
+    values = sample(3_000, 3) + [0.0, -1.0]
+    one = LogHistogram()
+    for x in values:
+        one.record(x)
+    many = LogHistogram()
+    many.record_many(values)
+    assert one.counts == many.counts
+    assert (one.zero_count, one.total) == (many.zero_count, many.total) == (2, len(values))
+
+
+def test_merge_is_the_same_as_recording_everything():
+    a_values, b_values = sample(4_000, 4), sample(6_000, 5) + [0.0]
+    a, b, both = LogHistogram(), LogHistogram(), LogHistogram()
+    a.record_many(a_values)
+    b.record_many(b_values)
+    both.record_many(a_values + b_values)
+    merged = a.merge(b)
+    assert merged.counts == both.counts
+    assert merged.total == both.total == 10_001
+    assert merged.percentiles() == both.percentiles()
+
+
+def test_string_round_trip_and_merge_strings():
+    h = LogHistogram()
+    h.record_many(sample(2_000, 6) + [0.0])
+    back = LogHistogram.from_string(h.to_string())
+    assert back.counts == h.counts
+    assert (back.zero_count, back.total) == (h.zero_count, h.total)
+    merged = merge_strings([h.to_string(), h.to_string()])
+    assert merged.total == 2 * h.total
+    assert merged.quantile(0.5) == h.quantile(0.5)
+
+
+def test_empty_and_zero_values():
+    assert math.isnan(LogHistogram().quantile(0.5))
+    h = LogHistogram()
+    for x in (0.0, 0.0, 0.0, 1.0):
+        h.record(x)
+    assert h.quantile(0.5) == 0.0
+    assert bucket_bounds(h.counts.index(1))[0] <= h.quantile(1.0)
@@ -0,0 +1,49 @@
+"""
+Regression tests for precision-driven runs (rel_precision): a run stops at
+the first batch where the turnaround CI is tight enough (and not before),
+and target_completions stays a hard cap.
+"""
+
+import pytest
+
+import hw5
+from recorder import iter_jobs
+from simstats import BatchMeans
+
+
+@pytest.mark.parametrize("scenario, lmbda", [(1, 100), (2, 180)])
+def test_stops_at_the_first_precise_batch(tmp_path, scenario, lmbda):
+    jobs = str(tmp_path / "jobs.bin")
+    stats = hw5.simulate(lmbda, 0.02, scenario, 4, target_completions=10_000_000,
+                         rel_precision=0.05, record_jobs=jobs)
+    assert stats["completed"] < 10_000_000
+    assert stats["turnaround_ci_rel_hw"] <= 0.05
+    assert stats["ci_batches"] >= 30
+
+    # replay the stopping rule on the recorded turnarounds (completion order):
+    # it can't have been satisfied at any earlier batch
+    batches = BatchMeans()
+    checks = []
+    for _, arrival, _, finish, _, _ in iter_jobs(jobs):
+        if batches.add(finish - arrival):
+            checks.append(batches.precise_enough(0.05))
+    assert len(checks) > 1
+    assert checks[-1] and not any(checks[:-1])
+
+
+@pytest.mark.parametrize("engine", ["event", "numpy"])
+def test_job_cap_wins(engine):
+    if engine == "numpy":
+        pytest.importorskip("numpy")
+    stats = hw5.simulate(150, 0.02, 1, 4, target_completions=5_000, engine=engine,
+                         rel_precision=1e-4)
+    assert stats["completed"] == 5_000
+    assert stats["turnaround_ci_rel_hw"] > 1e-4
+
+
+def test_numpy_engine_stops_when_precise():
+    pytest.importorskip("numpy")
+    stats = hw5.simulate(100, 0.02, 2, 4, target_completions=10_000_000, engine="numpy",
+                         rel_precision=0.05)
+    assert stats["completed"] < 10_000_000
+    assert stats["turnaround_ci_rel_hw"] <= 0.05
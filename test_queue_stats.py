@@ -0,0 +1,38 @@
+"""
+Regression tests for the ready queue bookkeeping: in scenario 1 the per-CPU
+queue averages have to add up to the whole-system one, whatever moves jobs
+between (or back into) the queues.
+"""
+
+import pytest
+
+import hw5
+
+CONFIGS = [
+    {},
+    {"policy": "jsq"},
+    {"policy": "least-work", "steal": "longest", "migration_cost": 0.001},
+    {"steal": "pow2"},
+    {"discipline": "srpt"},
+    {"discipline": "rr", "quantum": 0.005},
+    {"warmup": "mser"},
+]
+
+
+@pytest.mark.parametrize("kwargs", CONFIGS)
+@pytest.mark.parametrize("lmbda", [60, 190])
+def test_per_cpu_queues_add_up(kwargs, lmbda):
+    stats = hw5.simulate(lmbda, 0.02, 1, 4, target_completions=20_000, **kwargs)
+    per_cpu = stats["avg_ready_q_per_cpu"]
+    assert len(per_cpu) == 4
+    assert sum(per_cpu) == pytest.approx(stats["avg_ready_q"], rel=1e-9)
+
+
+def test_numpy_engine_adds_up():
+    pytest.importorskip("numpy")
+    stats = hw5.simulate(190, 0.02, 1, 4, target_completions=20_000, engine="numpy")
+    assert sum(stats["avg_ready_q_per_cpu"]) == pytest.approx(stats["avg_ready_q"], rel=1e-9)
+
+
+def test_scenario_2_has_no_per_cpu_queues():
+    assert hw5.simulate(100, 0.02, 2, 4, target_completions=2_000)["avg_ready_q_per_cpu"] is None
@@ -0,0 +1,45 @@
+"""
+Regression tests for recorder.py: a recorded run reads back (both file
+formats, with and without numpy) with one record per completed job, and the
+records give back the run's own average turnaround.
+"""
+
+import pytest
+
+import hw5
+from recorder import iter_jobs, load_jobs
+
+# more than one CHUNK (65536) of records, so the chunked write / read is covered
+JOBS = 70_000
+
+
+@pytest.fixture(scope="module", params=["jobs.npy", "jobs.bin"])
+def recorded(request, tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("rec") / request.param)
+    stats = hw5.simulate(150, 0.02, 1, 4, target_completions=JOBS, policy="jsq",
+                         discipline="srpt", record_jobs=path)
+    return path, stats
+
+
+def test_iter_jobs_round_trip(recorded):
+    path, stats = recorded
+    jobs = list(iter_jobs(path))
+    assert len(jobs) == stats["completed"] == JOBS
+    assert len({pid for pid, *_ in jobs}) == JOBS
+    turnaround = sum(finish - arrival for _, arrival, _, finish, _, _ in jobs) / len(jobs)
+    assert turnaround == pytest.approx(stats["avg_turnaround"], rel=1e-12)
+    assert all(arrival <= start <= finish for _, arrival, start, finish, _, _ in jobs)
+    assert {cpu for *_, cpu, _ in jobs} == {0, 1, 2, 3}
+
+
+def test_load_jobs_round_trip(recorded):
+    np = pytest.importorskip("numpy")
+    path, stats = recorded
+    jobs = load_jobs(path)
+    assert len(jobs) == stats["completed"]
+    turnaround = float(np.mean(jobs["finish"] - jobs["arrival"]))
+    assert turnaround == pytest.approx(stats["avg_turnaround"], rel=1e-12)
+    assert jobs[:100].tolist() == list(iter_jobs(path))[:100]
+    if path.endswith(".npy"):
+        # the hand-written header is a real .npy file
+        assert np.array_equal(np.load(path), jobs)
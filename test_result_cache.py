@@ -0,0 +1,117 @@
+"""
+Regression tests for result_cache.py: hits come back as stored, LRU eviction
+keeps the size limit, prune / clear, a different code version misses, and a
+repeated sweep is served from the cache.
+"""
+
+import csv
+import itertools
+from types import SimpleNamespace
+
+import pytest
+
+import result_cache
+import run_experiments
+from result_cache import SOURCE_FILES, ResultCache, code_version
+
+
+def task(lmbda, **changes):
+    t = {"lmbda": lmbda, "avg_service": 0.02, "scenario": 1, "num_cpus": 2,
+         "engine": "event", "seed": 1, "max_jobs": 2_000, "precision": None,
+         "warmup": None, "policy": "random", "steal": None, "migration_cost": 0.0,
+         "discipline": "fcfs", "quantum": None, "classes": 2, "validate": False,
+         "interarrival": "exp", "service": "exp"}
+    t.update(changes)
+    return t
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A last_used clock that always moves forward (time.time() can tie)."""
+    ticks = itertools.count(1)
+    monkeypatch.setattr(result_cache, "time", SimpleNamespace(time=lambda: float(next(ticks))))
+
+
+@pytest.fixture
+def cache(tmp_path):
+    c = ResultCache(str(tmp_path / "cache.sqlite"))
+    yield c
+    c.close()
+
+
+def test_hit_gives_back_the_row(cache):
+    row = {"lambda": 50, "avg_turnaround": 0.021, "avg_turnaround_by_class": None}
+    assert cache.get(task(50)) is None
+    cache.put(task(50), row)
+    assert cache.get(task(50)) == row
+    assert cache.get(task(50, seed=2)) is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_hits_survive_reopening(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    first = ResultCache(path)
+    first.put(task(60), {"avg_turnaround": 0.5})
+    first.close()
+    again = ResultCache(path)
+    assert again.get(task(60)) == {"avg_turnaround": 0.5}
+    assert again.info()[2] == first.total_bytes
+    again.close()
+
+
+def test_lru_eviction_keeps_under_the_limit(tmp_path, clock):
+    row = {"pad": "x" * 500}
+    probe = ResultCache(str(tmp_path / "probe.sqlite"))
+    probe.put(task(0), row)
+    size = probe.total_bytes
+    probe.close()
+
+    cache = ResultCache(str(tmp_path / "cache.sqlite"), max_bytes=int(3.5 * size))
+    for lmbda in (10, 20, 30):
+        cache.put(task(lmbda), row)
+    cache.get(task(10))                 # 10 is now the most recently used
+    cache.put(task(40), row)            # over the limit: 20 goes
+    assert cache.total_bytes <= cache.max_bytes
+    assert cache.get(task(20)) is None
+    assert all(cache.get(task(lmbda)) == row for lmbda in (10, 30, 40))
+    cache.put(task(50), row)            # 10 / 30 / 40 were all just read, 10 first
+    assert cache.get(task(10)) is None
+    assert cache.info()[0] == 3
+    cache.close()
+
+
+def test_other_code_version_misses_and_gets_pruned(cache, monkeypatch):
+    cache.put(task(70), {"avg_turnaround": 1.0})
+    # what editing one of SOURCE_FILES looks like to the next process
+    monkeypatch.setitem(result_cache._code_versions, SOURCE_FILES, "0123456789abcdef")
+    assert cache.get(task(70)) is None
+    cache.put(task(80), {"avg_turnaround": 2.0})
+    assert cache.info()[:2] == (2, 1)
+    assert cache.prune() == 1
+    assert cache.info()[:2] == (1, 1)
+    assert cache.get(task(80)) == {"avg_turnaround": 2.0}
+    assert cache.clear() == 1
+    assert cache.info() == (0, 0, 0)
+
+
+def test_code_version_follows_file_contents(tmp_path):
+    a, b = tmp_path / "a.py", tmp_path / "b.py"
+    a.write_text("x = 1\n")
+    b.write_text("x = 2\n")
+    assert code_version((str(a),)) != code_version((str(b),))
+    assert code_version() == code_version(SOURCE_FILES)
+
+
+def test_second_sweep_comes_from_the_cache(tmp_path, cache, monkeypatch):
+    tasks = [task(lmbda) for lmbda in (50, 100)]
+    first, second = str(tmp_path / "first.csv"), str(tmp_path / "second.csv")
+    assert run_experiments.run_sweep(list(tasks), first, cache=cache) == 2
+
+    def no_simulating(t):
+        raise AssertionError(f"simulated a cached point: {t}")
+
+    monkeypatch.setattr(run_experiments, "run_simulation", no_simulating)
+    assert run_experiments.run_sweep(list(tasks), second, cache=cache) == 2
+    assert cache.hits == 2
+    with open(first) as f1, open(second) as f2:
+        assert list(csv.reader(f1)) == list(csv.reader(f2))
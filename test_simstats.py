@@ -0,0 +1,81 @@
+"""
+Regression tests for simstats.py: critical values, MSER truncation and the
+online MSERWarmup detector (including its check schedule staying linear).
+"""
+
+import random
+
+import pytest
+
+import simstats
+from simstats import MSERWarmup, mser_truncation, normal_quantile, t_quantile
+
+
+def test_critical_values():
+    assert normal_quantile(0.975) == pytest.approx(1.959964, abs=1e-6)
+    assert normal_quantile(0.5) == pytest.approx(0.0, abs=1e-12)
+    assert normal_quantile(0.01) == pytest.approx(-2.326348, abs=1e-6)
+    # t tables, 3 digits is what the docstring promises
+    assert t_quantile(0.975, 10) == pytest.approx(2.228, abs=2e-3)
+    assert t_quantile(0.975, 30) == pytest.approx(2.042, abs=2e-3)
+
+
+def test_mser_finds_the_transient():
+    rng = random.Random(1)
+    means = [10.0 - 0.5 * i for i in range(18)] + [1.0 + rng.gauss(0, 0.1) for _ in range(200)]
+    d = mser_truncation(means)
+    assert 15 <= d <= 20
+
+
+def test_mser_keeps_stationary_data():
+    rng = random.Random(2)
+    assert mser_truncation([rng.gauss(1.0, 0.1) for _ in range(500)]) <= 10
+
+
+def test_online_detector_settles_on_a_transient():
+    rng = random.Random(3)
+    mser = MSERWarmup()
+    values = [5.0 * 0.99 ** i + rng.expovariate(1.0) for i in range(50_000)]
+    for x in values:
+        if mser.add(x):
+            break
+    else:
+        pytest.fail("MSER never settled")
+    assert mser.truncation is not None and mser.truncation > 0
+    assert mser.truncation % mser.m == 0
+
+
+def test_checks_stay_linear_when_it_never_settles(monkeypatch):
+    calls = []
+
+    def counting(means):
+        calls.append(len(means))
+        return mser_truncation(means)
+
+    monkeypatch.setattr(simstats, "mser_truncation", counting)
+    mser = MSERWarmup.for_run(2_000_000)
+    done = False
+    for i in range(1_000_000):
+        done = mser.add(float(i))    # always increasing: no stable truncation
+        if done:
+            break
+    assert done and mser.truncation is None
+    assert calls[-1] == mser.max_batches == 200_000
+    # geometric schedule: total rescanned batches is a small multiple of n
+    assert sum(calls) < 4 * mser.max_batches
+    assert len(calls) < 40
+
+
+def test_give_up_point_follows_the_run_length():
+    assert MSERWarmup.for_run(10_000).max_batches == 1_000
+    assert MSERWarmup.for_run(10).max_batches == MSERWarmup().min_batches
+    with pytest.raises(ValueError):
+        MSERWarmup(growth=1.0)
+
+
+def test_overloaded_run_gives_up_on_warmup():
+    import hw5
+    stats = hw5.simulate(220, 0.02, 2, 4, target_completions=20_000, warmup="mser")
+    assert stats["completed"] == 20_000
+    assert stats["mser_truncation"] is None
+    assert stats["warmup_jobs"] == 0
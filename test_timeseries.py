@@ -0,0 +1,52 @@
+"""
+Regression tests for timeseries.py: the windows add back up to the run's own
+avg_ready_q / cpu_utils (warm-up or not), and sampling doesn't change the run.
+"""
+
+import pytest
+
+import hw5
+from timeseries import COLUMNS, read_csv, write_csv
+
+DT = 0.01
+
+
+def measured_windows(stats):
+    """Indexes of the windows after warm-up (stats only count from there)."""
+    start = stats["warmup_time"] or 0.0
+    return [i for i, t in enumerate(stats["timeseries"]["time"]) if t > start + DT / 2]
+
+
+@pytest.mark.parametrize("scenario", [1, 2])
+@pytest.mark.parametrize("warmup", [None, "mser"])
+def test_windows_add_up_to_the_run_averages(scenario, warmup):
+    stats = hw5.simulate(180, 0.02, scenario, 4, target_completions=20_000,
+                         sample_interval=DT, warmup=warmup)
+    series = stats["timeseries"]
+    windows = measured_windows(stats)
+    # equal width windows, so the time-weighted average is the plain mean.
+    # they stop at the last grid point, the run goes on for < DT after it
+    assert len(windows) * DT == pytest.approx(stats["time"], abs=DT)
+    avg_q = sum(series["avg_ready_q"][i] for i in windows) / len(windows)
+    assert avg_q == pytest.approx(stats["avg_ready_q"], rel=1e-4)
+    # cpu_utils books a job's whole service when it starts, so it's ahead by
+    # whatever the jobs still running at the end had left
+    util = sum(series["utilization"][i] for i in windows) / len(windows)
+    assert util == pytest.approx(sum(stats["cpu_utils"]) / 4, abs=1e-3)
+    assert util <= sum(stats["cpu_utils"]) / 4
+    assert all(0 <= n <= 4 for n in series["busy_cpus"])
+
+
+def test_sampling_doesnt_change_the_run(tmp_path):
+    plain = hw5.simulate(150, 0.02, 1, 4, target_completions=10_000, policy="jsq")
+    sampled = hw5.simulate(150, 0.02, 1, 4, target_completions=10_000, policy="jsq",
+                           sample_interval=DT)
+    for key in plain:
+        if key not in ("sample_interval", "timeseries"):
+            assert sampled[key] == plain[key], key
+
+    path = str(tmp_path / "ts.csv")
+    write_csv(sampled["timeseries"], path)
+    back = read_csv(path)
+    for name in COLUMNS:
+        assert back[name] == list(sampled["timeseries"][name]), name
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Fixed-interval time series for hw5.simulate(sample_interval=...).
+
+avg_ready_q and cpu_utils are whole-run averages, so a burst or a slow
+saturation build-up just disappears into them. The sampler records the
+system state on a fixed simulated-time grid t = dt, 2dt, 3dt, ...:
+
+    time          grid point
+    ready_q       ready queue length at that instant (all queues together)
+    busy_cpus     CPUs busy at that instant
+    avg_ready_q   time-weighted avg queue length over the window (t-dt, t]
+    utilization   fraction of CPU capacity used over that window
+
+No sampling events get added. The event loop already keeps rq_area (area
+under the queue length curve) up to last_ev_time, and nothing changes
+between two events, so when an event is at or past the next grid point the
+sampler fills in every grid point up to it from the state left by the
+previous event. Busy time comes from the per-CPU booked busy time minus
+whatever the running jobs still have left (cpu_free_at - t), so that's
+O(num_cpus) once per event that crosses a grid point and nothing per event
+otherwise.
+
+Samples go into array('d') / array('l') columns (8 bytes per value), so
+memory is O(run length / dt) - a few MB for a million samples - however
+many jobs or events the run has.
+"""
+
+import csv
+from array import array
+
+
+COLUMNS = ("time", "ready_q", "busy_cpus", "avg_ready_q", "utilization")
+
+
+class TimeSeriesSampler:
+    """
+    Samples queue length / busy CPUs / windowed utilization every
+    `interval` seconds of simulated time (see module docstring).
+
+    simulate() calls take() whenever an event's time reaches next_t, and
+    rebase() when warm-up deletion resets its accumulators.
+    """
+
+    def __init__(self, interval, num_cpus):
+        if not interval > 0:
+            raise ValueError("sample interval has to be > 0")
+        self.interval = interval
+        self.num_cpus = num_cpus
+        self.next_t = interval
+        self.k = 1                  # next_t = k * interval (no drift from adding dt up)
+        self.prev_area = 0.0        # rq_area at the previous grid point
+        self.prev_busy = 0.0        # total CPU busy time at the previous grid point
+        self.time = array("d")
+        self.ready_q = array("l")
+        self.busy_cpus = array("l")
+        self.avg_ready_q = array("d")
+        self.utilization = array("d")
+
+    def take(self, now, rq_len, rq_area, last_ev_time, cpu_busy_time, cpu_free_at):
+        """
+        Records every grid point in (last_ev_time, now]. The state passed in
+        is the one left by the previous event (held since last_ev_time).
+
+        Returns the next grid time (so simulate() can keep it in a local).
+        """
+        # busy time up to t = booked busy time - work the running jobs have
+        # left after t. the running CPUs are the ones whose job ends after
+        # the previous event (idle ones stopped at or before it), and none of
+        # that changes until this event, so one pass covers every grid point:
+        #   left(t) = sum(their end times) - n_running * t
+        booked = sum(cpu_busy_time)
+        ends = [f for f in cpu_free_at if f > last_ev_time]
+        ends_sum = sum(ends)
+        n_running = len(ends)
+        interval = self.interval
+        capacity = interval * self.num_cpus
+        t = self.next_t
+        k = self.k
+        while t <= now:
+            area = rq_area + rq_len * (t - last_ev_time)
+            busy = booked - (ends_sum - n_running * t)
+
+            self.time.append(t)
+            self.ready_q.append(rq_len)
+            self.busy_cpus.append(n_running)
+            self.avg_ready_q.append((area - self.prev_area) / interval)
+            self.utilization.append((busy - self.prev_busy) / capacity)
+            self.prev_area = area
+            self.prev_busy = busy
+            k += 1
+            t = k * interval
+        self.k = k
+        self.next_t = t
+        return t
+
+    def rebase(self, area_drop, busy_drop):
+        """simulate() zeroed rq_area / cut the booked busy time by this much."""
+        self.prev_area -= area_drop
+        self.prev_busy -= busy_drop
+
+    def __len__(self):
+        return len(self.time)
+
+    def columns(self):
+        """The samples as {column name: array}."""
+        return {name: getattr(self, name) for name in COLUMNS}
+
+
+def write_csv(series, path):
+    """
+    Writes a time series ({column: values}, e.g. stats["timeseries"]) to a
+    CSV file, one row per grid point.
+    """
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        for row in zip(*(series[name] for name in COLUMNS)):
+            writer.writerow(row)
+
+
+def read_csv(path):
+    """Reads write_csv() output back into {column: list of floats}."""
+    series = {name: [] for name in COLUMNS}
+    with open(path, "r") as f:
+        for row in csv.DictReader(f):
+            for name in COLUMNS:
+                series[name].append(float(row[name]))
+    return series
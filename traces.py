@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Job traces for replaying real workloads through hw5.simulate(trace=...).
+
+A trace is a list of jobs (arrival_time, service_time[, cpu_hint]) sorted by
+arrival time (seconds, any origin - the sim clock starts at the first
+arrival). cpu_hint, if present and >= 0, pins the job to that CPU's queue in
+scenario 1 (hint % num_cpus); -1 / missing means "let the dispatch policy
+decide". Scenario 2 ignores hints.
+
+Two formats, picked by looking at the first bytes of the file:
+
+  CSV     arrival_time,service_time[,cpu_hint]   one job per line, optional
+          header line, blank lines and lines starting with # are skipped
+
+  binary  16 byte header: MAGIC (8 bytes) + uint64 record count, then
+          fixed 20 byte little-endian records "<ddi" (arrival float64,
+          service float64, cpu_hint int32). Read through mmap, so the OS
+          pages it in as we go - a 50M-job trace never sits in memory.
+
+Either way the reader only holds CHUNK parsed records at a time and keeps
+track of how long parsing took (simulate() reports it next to the
+simulation speed).
+
+CLI:
+  python3 traces.py convert jobs.csv jobs.bin      # CSV -> binary
+  python3 traces.py generate jobs.bin --jobs 1000000 --lmbda 150 --avg-service 0.02
+  python3 traces.py info jobs.bin
+"""
+
+import argparse
+import mmap
+import struct
+import sys
+import time
+
+try:
+    import numpy as np
+except ImportError:  # only load_trace_array() needs it
+    np = None
+
+
+MAGIC = b"HW5TRC1\0"
+HEADER = struct.Struct("<8sQ")       # magic + record count
+RECORD = struct.Struct("<ddi")       # arrival, service, cpu_hint
+CHUNK = 65536                        # records parsed per refill
+
+# same layout as RECORD, for numpy users (packed, no padding)
+TRACE_DTYPE = [("arrival", "<f8"), ("service", "<f8"), ("cpu_hint", "<i4")]
+
+
+class _TraceReader:
+    """
+    Common part of the readers: hands out parsed records one at a time
+    from a chunk buffer (same idea as variates.VariateStream).
+
+    next_record() -> (arrival, service, cpu_hint) or None at the end.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.records = 0          # records handed out so far
+        self.parse_sec = 0.0      # wall time spent parsing chunks
+        self.buf = []
+        self.pos = 0
+
+    def _parse_chunk(self):
+        raise NotImplementedError
+
+    def next_record(self):
+        pos = self.pos
+        if pos == len(self.buf):
+            t0 = time.perf_counter()
+            self.buf = self._parse_chunk()
+            self.parse_sec += time.perf_counter() - t0
+            pos = 0
+            if not self.buf:
+                return None
+        self.pos = pos + 1
+        self.records += 1
+        return self.buf[pos]
+
+    def __iter__(self):
+        while True:
+            rec = self.next_record()
+            if rec is None:
+                return
+            yield rec
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CSVTraceReader(_TraceReader):
+    """Streams a CSV trace, CHUNK lines at a time."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.f = open(path, "r")
+        self.line_no = 0
+
+    def _parse_chunk(self):
+        out = []
+        readline = self.f.readline
+        while len(out) < CHUNK:
+            line = readline()
+            if not line:
+                break
+            self.line_no += 1
+            line = line.strip()
+            if not line or line[0] == "#":
+                continue
+            parts = line.split(",")
+            try:
+                arrival = float(parts[0])
+                service = float(parts[1])
+                hint = int(parts[2]) if len(parts) > 2 and parts[2].strip() else -1
+            except (ValueError, IndexError):
+                if self.line_no == 1:
+                    continue          # header line
+                raise ValueError(f"{self.path}:{self.line_no}: can't parse {line!r}")
+            out.append((arrival, service, hint))
+        return out
+
+    def close(self):
+        self.f.close()
+
+
+class BinaryTraceReader(_TraceReader):
+    """Memory-mapped binary trace; records are unpacked straight out of the map."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.f = open(path, "rb")
+        self.mm = mmap.mmap(self.f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: not a binary trace (bad magic)")
+        expected = HEADER.size + count * RECORD.size
+        if len(self.mm) < expected:
+            raise ValueError(f"{path}: truncated, header says {count} records")
+        self.count = count
+        self.view = memoryview(self.mm)
+        self.offset = HEADER.size
+        self.end = expected
+
+    def _parse_chunk(self):
+        start = self.offset
+        stop = min(start + CHUNK * RECORD.size, self.end)
+        self.offset = stop
+        # memoryview slice = no copy, iter_unpack parses in C
+        return list(RECORD.iter_unpack(self.view[start:stop]))
+
+    def close(self):
+        self.view.release()
+        self.mm.close()
+        self.f.close()
+
+
+def open_trace(path):
+    """Reader for a CSV or binary trace (format detected from the magic bytes)."""
+    with open(path, "rb") as f:
+        head = f.read(len(MAGIC))
+    if head == MAGIC:
+        return BinaryTraceReader(path)
+    return CSVTraceReader(path)
+
+
+class TraceWriter:
+    """
+    Writes a binary trace, buffering CHUNK records at a time.
+    The record count in the header gets filled in by close().
+    """
+
+    def __init__(self, path):
+        self.f = open(path, "wb")
+        self.f.write(HEADER.pack(MAGIC, 0))
+        self.count = 0
+        self.buf = bytearray(CHUNK * RECORD.size)
+        self.n = 0
+
+    def write(self, arrival, service, cpu_hint=-1):
+        RECORD.pack_into(self.buf, self.n * RECORD.size, arrival, service, cpu_hint)
+        self.n += 1
+        if self.n == CHUNK:
+            self.flush()
+
+    def flush(self):
+        self.f.write(memoryview(self.buf)[:self.n * RECORD.size])
+        self.count += self.n
+        self.n = 0
+
+    def close(self):
+        self.flush()
+        self.f.seek(0)
+        self.f.write(HEADER.pack(MAGIC, self.count))
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def load_trace_array(path):
+    """
+    Whole binary trace as a numpy structured array (TRACE_DTYPE), backed by
+    the memory map - no copy, so it's fine for huge traces too.
+    """
+    if np is None:
+        raise RuntimeError("load_trace_array needs numpy")
+    return np.memmap(path, dtype=TRACE_DTYPE, mode="r", offset=HEADER.size)
+
+
+def convert(src, dst):
+    """CSV (or binary) trace -> binary trace. Returns the record count."""
+    with open_trace(src) as reader, TraceWriter(dst) as writer:
+        for arrival, service, hint in reader:
+            writer.write(arrival, service, hint)
+        return writer.count + writer.n
+
+
+def generate(path, jobs, lmbda, avg_service, seed=1, interarrival="exp", service="exp"):
+    """
+    Synthetic trace from the same streams simulate() uses, so replaying it
+    reproduces a normal run with that seed (and distributions, see
+    distributions.py - Poisson/exponential by default).
+    """
+    from variates import simulation_streams
+    streams = simulation_streams(seed, lmbda, avg_service, interarrival=interarrival,
+                                 service=service)
+    inter = streams["arrivals"].draw
+    service = streams["service"].draw
+    t = 0.0
+    with TraceWriter(path) as writer:
+        for _ in range(jobs):
+            t += inter()
+            writer.write(t, service())
+    return jobs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HW5 job trace tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("convert", help="CSV trace -> binary trace")
+    p.add_argument("src")
+    p.add_argument("dst")
+
+    p = sub.add_parser("generate", help="write a synthetic binary trace (Poisson/exponential "
+                                        "unless --interarrival / --service say otherwise)")
+    p.add_argument("dst")
+    p.add_argument("--jobs", type=int, default=1_000_000)
+    p.add_argument("--lmbda", type=float, default=150.0)
+    p.add_argument("--avg-service", type=float, default=0.02)
+    p.add_argument("--seed", type=int, default=1)
+    p.add_argument("--interarrival", default="exp", help="distribution spec (distributions.py)")
+    p.add_argument("--service", default="exp", help="distribution spec (distributions.py)")
+
+    p = sub.add_parser("info", help="record count, arrival rate, mean service, parse speed")
+    p.add_argument("path")
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == "convert":
+            t0 = time.perf_counter()
+            n = convert(args.src, args.dst)
+            print(f"Wrote {n} records to {args.dst} ({time.perf_counter() - t0:.2f} sec)")
+        elif args.command == "generate":
+            n = generate(args.dst, args.jobs, args.lmbda, args.avg_service, args.seed,
+                         args.interarrival, args.service)
+            print(f"Wrote {n} records to {args.dst}")
+        else:
+            n = 0
+            first = last = None
+            total_service = 0.0
+            with open_trace(args.path) as reader:
+                for arrival, service, _ in reader:
+                    if first is None:
+                        first = arrival
+                    last = arrival
+                    total_service += service
+                    n += 1
+                parse_sec = reader.parse_sec
+            print(f"Records: \t\t{n}")
+            if n:
+                span = last - first
+                print(f"Span: \t\t\t{span:.6f} sec")
+                if span > 0:
+                    print(f"Arrival rate: \t\t{(n - 1) / span:.6f} jobs/sec")
+                print(f"Avg service time: \t{total_service / n:.6f} sec")
+            if parse_sec > 0:
+                print(f"Parse speed: \t\t{n / parse_sec:,.0f} records/sec")
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
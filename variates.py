@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Random variate supply for the HW5 simulator.
+
+simulate() used to call random.expovariate / random.randint once per event
+on the one global `random` stream. Two problems with that:
+  - a Python RNG call per draw, every event
+  - arrivals, service times and routing all came out of the same stream, so
+    scenario 1 (which also draws a CPU per job) and scenario 2 saw totally
+    different arrival/service sequences for the same seed
+
+Here every purpose gets its own VariateStream, seeded from (seed, purpose),
+that refills a block of BLOCK_SIZE values at a time (one numpy call if numpy
+is installed, a list comprehension otherwise) and hands them out one by one.
+Same seed -> same arrivals and service times in every scenario and engine.
+
+Everything is generated from uniforms u in [0, 1):
+  "exp"      -> -mean * log(1 - u)
+  "uniform"  -> u            (routing / tie-breaking: int(u * n))
+  "dist"     -> any distributions.py distribution's inverse CDF, scaled to
+                the mean (lognormal, pareto, hyperexp, det, empirical)
+
+so the sequence doesn't depend on the block size, and a stream can be pickled
+(checkpointing) like any other object. It also makes antithetic runs easy:
+antithetic=True mirrors every uniform (u -> 1 - u), so a long interarrival in
+the normal run is a short one in the antithetic run and vice versa.
+
+NOTE: the numpy and stdlib backends are seeded differently, so the numbers
+you get depend on BACKEND (same seed + same backend = same results).
+"""
+
+import math
+import random
+import zlib
+
+try:
+    import numpy as np
+except ImportError:  # stdlib backend, slower refills but same behavior
+    np = None
+
+
+BACKEND = "numpy" if np is not None else "stdlib"
+BLOCK_SIZE = 4096
+
+# uniforms come out as k * 2^-53 with k in [0, 2^53), so MIRROR - u is the
+# exact antithetic partner and stays inside [0, 1) (plain 1 - u could be 1.0)
+MIRROR = 1.0 - 2.0 ** -53
+
+# the streams simulate() uses (one per purpose)
+PURPOSES = ("arrivals", "service", "routing", "tiebreak", "steal", "priority")
+
+
+class VariateStream:
+    """
+    One reproducible stream of variates, refilled in blocks.
+
+    Params:
+        seed: simulation seed
+        purpose: name of what it's for ("arrivals", "service", ...). Two
+                 streams with the same seed but different purposes are
+                 independent.
+        kind: "exp" (exponential with the given mean), "dist" (the
+              distribution `dist` scaled to the given mean) or "uniform"
+        mean: mean for kind="exp" / "dist"
+        block_size: how many values to make per refill
+        antithetic: mirror every uniform (u -> 1 - u) for antithetic pairs
+        dist: a distributions.Distribution, for kind="dist"
+
+    Usage:
+        s = VariateStream(1, "arrivals", "exp", mean=0.01)
+        s.draw()          # next value (float)
+        s.index(4)        # uniform int in [0, 4) (kind="uniform")
+        s.take(100000)    # next 100000 values as an array (list w/o numpy)
+    """
+
+    def __init__(self, seed, purpose, kind="uniform", mean=1.0, block_size=BLOCK_SIZE,
+                 antithetic=False, dist=None):
+        if kind not in ("exp", "uniform", "dist"):
+            raise ValueError(f"unknown variate kind {kind!r}")
+        if kind == "dist" and dist is None:
+            raise ValueError('kind="dist" needs a distribution')
+        self.kind = kind
+        self.dist = dist
+        self.mean = mean
+        self.block_size = block_size
+        self.antithetic = antithetic
+
+        # stable per-purpose key (str hash() changes every run, crc32 doesn't)
+        key = zlib.crc32(purpose.encode())
+        if np is not None:
+            self._rng = np.random.default_rng([key, seed & 0xFFFFFFFFFFFFFFFF])
+        else:
+            self._rng = random.Random(f"{seed}/{purpose}")
+
+        self.buf = []
+        self.pos = block_size       # pos == block_size means "buffer used up"
+
+    def _uniforms(self, n):
+        """n fresh uniforms straight from the generator."""
+        if np is not None:
+            u = self._rng.random(n)
+            return MIRROR - u if self.antithetic else u
+        rand = self._rng.random
+        if self.antithetic:
+            return [MIRROR - rand() for _ in range(n)]
+        return [rand() for _ in range(n)]
+
+    def _transform(self, u):
+        """Uniforms -> variates of this stream's kind (array or list)."""
+        if self.kind == "uniform":
+            return u
+        if self.kind == "dist":
+            return self.dist.transform(u, self.mean)
+        mean = self.mean
+        if np is not None:
+            return -mean * np.log1p(-u)
+        log1p = math.log1p
+        return [-mean * log1p(-x) for x in u]
+
+    def _refill(self):
+        block = self._transform(self._uniforms(self.block_size))
+        self.buf = block.tolist() if np is not None else block
+        self.pos = 0
+
+    def draw(self):
+        """Next value. This is the per-event call, so keep it cheap."""
+        pos = self.pos
+        if pos == self.block_size:
+            self._refill()
+            pos = 0
+        self.pos = pos + 1
+        return self.buf[pos]
+
+    def index(self, n):
+        """Uniform int in [0, n) from the next value (kind="uniform")."""
+        i = int(self.draw() * n)
+        return i if i < n else n - 1    # u*n can round up to n for huge n
+
+    def take(self, n):
+        """
+        Next n values in one go (numpy array, or a list without numpy).
+
+        Continues exactly where draw() left off, so mixing the two gives the
+        same sequence as only using draw().
+        """
+        rest = self.buf[self.pos:]
+        if len(rest) >= n:
+            self.pos += n
+            rest = rest[:n]
+            return np.array(rest) if np is not None else rest
+        self.pos = self.block_size
+        fresh = self._transform(self._uniforms(n - len(rest)))
+        if np is not None:
+            return np.concatenate((np.array(rest, dtype=float), fresh))
+        return rest + fresh
+
+
+def simulation_streams(seed, lmbda, avg_service, antithetic=False,
+                       interarrival="exp", service="exp"):
+    """
+    The four streams simulate() needs, as a dict keyed by purpose:
+      arrivals - interarrival times (mean 1/lmbda)
+      service  - service times (mean avg_service)
+      routing  - scenario 1: which CPU's queue a job joins
+      tiebreak - scenario 2: which idle CPU gets the next job
+      steal    - work stealing: which idle CPU / victim queue to try
+      priority - priority class of each job (discipline="priority")
+
+    antithetic=True gives the mirrored partner of the same seed's streams.
+    interarrival / service: distribution specs (distributions.py) for the
+    first two, exponential by default.
+    """
+    a = antithetic
+    return {
+        "arrivals": _timing_stream(seed, "arrivals", interarrival, 1.0 / lmbda, a),
+        "service": _timing_stream(seed, "service", service, avg_service, a),
+        "routing": VariateStream(seed, "routing", "uniform", antithetic=a),
+        "tiebreak": VariateStream(seed, "tiebreak", "uniform", antithetic=a),
+        "steal": VariateStream(seed, "steal", "uniform", antithetic=a),
+        "priority": VariateStream(seed, "priority", "uniform", antithetic=a),
+    }
+
+
+def _timing_stream(seed, purpose, spec, mean, antithetic):
+    """Exponential keeps its own kind (same numbers as before), anything else is "dist"."""
+    from distributions import Exponential, parse_spec
+    dist = parse_spec(spec)
+    if isinstance(dist, Exponential):
+        return VariateStream(seed, purpose, "exp", mean=mean, antithetic=antithetic)
+    return VariateStream(seed, purpose, "dist", mean=mean, antithetic=antithetic, dist=dist)
@@ -21,8 +21,14 @@ def view_results(csv_file="results.csv"):
             rows = list(reader)
 
         # Separate by scenario
-        scenario1 = [r for r in rows if r['scenario'] == '1']
-        scenario2 = [r for r in rows if r['scenario'] == '2']
+        # (scenario 1 with the original random routing only, if the sweep
+        # also ran other dispatch policies, work stealing or disciplines)
+        scenario1 = [r for r in rows if r['scenario'] == '1'
+                     and r.get('policy', 'random') == 'random'
+                     and r.get('steal', 'none') == 'none'
+                     and r.get('discipline', 'fcfs') == 'fcfs']
+        scenario2 = [r for r in rows if r['scenario'] == '2'
+                     and r.get('discipline', 'fcfs') == 'fcfs']
 
         # Sort by lambda
         scenario1.sort(key=lambda r: float(r['lambda']))